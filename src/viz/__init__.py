@@ -1,2 +1,8 @@
+import time
+
+# When the package started importing, the start of the startup profile
+IMPORT_STARTED = time.perf_counter()
+
+
 def hello() -> str:
     return "Hello from viz!"
@@ -0,0 +1,459 @@
+"""
+Batch spectrogram extraction over many audio files (viz-analyze).
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import numpy as np
+
+from .audio.analyzer import AudioAnalyzer
+from .audio.bands import get_band_plan
+from .audio.files import RAW_FORMATS, AudioFileReader
+from .utils import config
+
+# File extensions picked up when a directory is given
+WAV_EXTENSIONS = (".wav",)
+RAW_EXTENSIONS = (".raw", ".pcm")
+
+# Smoothing residue left when a segment's warm-up spectra are discarded;
+# segments then match a serial pass over the whole file to this precision
+SETTLE_RESIDUE = 1e-6
+
+
+def log(message):
+    """Print a status message."""
+    print(message, file=sys.stderr)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="viz-analyze",
+        description="Extract spectrograms from many audio files in parallel.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="WAV files, raw PCM files with --raw, or directories"
+    )
+    parser.add_argument(
+        "-o", "--output", default="spectra", help="directory for the .npy outputs"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="worker processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--segment",
+        type=float,
+        default=60.0,
+        help="seconds of audio per task; longer files are split across workers",
+    )
+    parser.add_argument(
+        "--block",
+        type=int,
+        default=1 << 18,
+        help="frames read from a file at a time",
+    )
+    parser.add_argument("--bands", type=int, default=config.NUM_FREQUENCY_BANDS)
+    parser.add_argument("--chunk", type=int, default=config.CHUNK_SIZE, help="FFT size")
+    parser.add_argument(
+        "--hop", type=int, help="samples between spectra (default: the FFT size)"
+    )
+    parser.add_argument(
+        "--layout",
+        choices=["mono", "split"],
+        default="mono",
+        help="downmix to one spectrogram, or one per channel",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=["float32", "float16"],
+        default="float32",
+        help="sample type of the stored spectra",
+    )
+    parser.add_argument(
+        "--raw", choices=sorted(RAW_FORMATS), help="read headerless PCM samples"
+    )
+    parser.add_argument(
+        "--rate", type=int, default=config.SAMPLE_RATE, help="raw PCM sample rate"
+    )
+    parser.add_argument(
+        "--channels", type=int, default=config.CHANNELS, help="raw PCM channels"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="analyze files that are already done"
+    )
+    args = parser.parse_args(argv)
+    if args.hop is None:
+        args.hop = args.chunk
+    return args
+
+
+def find_inputs(paths, raw=False):
+    """
+    Expand files and directories into the audio files to analyze.
+
+    Args:
+        paths: File and directory paths
+        raw: Pick up raw PCM files instead of WAV files in directories
+
+    Returns:
+        List of (source path, output name) pairs; output names keep the
+        layout below a directory and drop the extension
+    """
+    extensions = RAW_EXTENSIONS if raw else WAV_EXTENSIONS
+    inputs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            for source in sorted(path.rglob("*")):
+                if source.is_file() and source.suffix.lower() in extensions:
+                    inputs.append((source, source.relative_to(path).with_suffix("")))
+        else:
+            inputs.append((path, Path(path.stem)))
+    return inputs
+
+
+def find_clashes(inputs):
+    """
+    Find files that would be analyzed into the same output.
+
+    Output names drop the directories above a file given on its own, so
+    files of the same name from different directories collide.
+
+    Args:
+        inputs: List of (source path, output name) pairs from find_inputs
+
+    Returns:
+        Dictionary mapping each shared output name to its source paths
+    """
+    sources = {}
+    for source, name in inputs:
+        sources.setdefault(name, []).append(source)
+    return {name: paths for name, paths in sources.items() if len(paths) > 1}
+
+
+def count_spectra(frames, chunk_size, hop):
+    """Return the number of spectra of a file with this many frames."""
+    if frames < chunk_size:
+        return 0
+    return (frames - chunk_size) // hop + 1
+
+
+def warmup_spectra(smoothing):
+    """
+    Return the spectra a segment analyzes ahead of its start.
+
+    The smoothing state decays by the smoothing factor per spectrum, so
+    after this many spectra a segment no longer depends on where its
+    analysis began.
+    """
+    if smoothing <= 0:
+        return 0
+    if smoothing >= 1:
+        raise ValueError("Smoothing factor must be below 1 to split files")
+    return math.ceil(math.log(SETTLE_RESIDUE) / math.log(smoothing))
+
+
+def analysis_settings(args):
+    """Return the settings that shape the spectra, as stored in the metadata."""
+    return {
+        "chunk_size": args.chunk,
+        "hop": args.hop,
+        "num_bands": args.bands,
+        "min_frequency": config.MIN_FREQUENCY,
+        "max_frequency": config.MAX_FREQUENCY,
+        "smoothing": config.SMOOTHING_FACTOR,
+        "layout": args.layout,
+        "dtype": args.dtype,
+        # How headerless files are read
+        "raw": [args.raw, args.rate, args.channels] if args.raw else None,
+    }
+
+
+def is_done(source, metadata_path, output_path, settings):
+    """
+    Check whether a file was already analyzed with the same settings.
+
+    Args:
+        source: Path of the audio file
+        metadata_path: Path of its metadata file
+        output_path: Path of its spectrogram
+        settings: Current analysis settings
+
+    Returns:
+        True if the outputs exist and match the file and the settings
+    """
+    if not output_path.exists():
+        return False
+    try:
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return False
+    stat = source.stat()
+    return (
+        metadata.get("size") == stat.st_size
+        and metadata.get("mtime_ns") == stat.st_mtime_ns
+        and metadata.get("settings") == settings
+    )
+
+
+def analyze_segment(task):
+    """
+    Analyze spectra start to stop of one file into its output (worker).
+
+    Analysis begins warm-up spectra early so the smoothing state has
+    settled when the segment starts, and the file is read in blocks.
+
+    Args:
+        task: Dictionary with the file, reader, settings, output and
+            segment of the work item
+
+    Returns:
+        Number of spectra written
+    """
+    settings = task["settings"]
+    chunk_size = settings["chunk_size"]
+    hop = settings["hop"]
+    start, stop = task["start"], task["stop"]
+
+    reader = AudioFileReader(
+        task["source"],
+        raw_format=task["raw"],
+        sample_rate=task["rate"],
+        channels=task["channels"],
+    )
+    config.SAMPLE_RATE = reader.sample_rate
+    config.CHUNK_SIZE = chunk_size
+    config.NUM_FREQUENCY_BANDS = settings["num_bands"]
+    config.MIN_FREQUENCY = settings["min_frequency"]
+    config.MAX_FREQUENCY = settings["max_frequency"]
+    config.SMOOTHING_FACTOR = settings["smoothing"]
+    split = settings["layout"] == "split"
+    analyzers = [
+        AudioAnalyzer(realtime=False) for _ in range(reader.channels if split else 1)
+    ]
+    output = np.load(task["output"], mmap_mode="r+")
+
+    index = max(start - task["warmup"], 0)  # spectrum that begins the buffer
+    reader.seek(index * hop)
+    carry = np.zeros((0, reader.channels), dtype=np.float32)
+    try:
+        while index < stop:
+            block = reader.read(task["block"])
+            if len(block) == 0:
+                break
+            buffer = np.concatenate([carry, block])
+            count = min(count_spectra(len(buffer), chunk_size, hop), stop - index)
+            if count == 0:
+                carry = buffer
+                continue
+
+            frames = buffer[: (count - 1) * hop + chunk_size]
+            if split:
+                spectra = np.stack(
+                    [
+                        analyzer.analyze_batch(frames[:, channel], hop)
+                        for channel, analyzer in enumerate(analyzers)
+                    ],
+                    axis=1,
+                )
+            else:
+                spectra = analyzers[0].analyze_batch(frames.mean(axis=1), hop)
+
+            # Drop the warm-up spectra in front of the segment
+            skip = max(start - index, 0)
+            output[index + skip : index + count] = spectra[skip:]
+            index += count
+            carry = buffer[count * hop :]
+        output.flush()
+    finally:
+        reader.close()
+        del output
+    return stop - max(start, 0)
+
+
+def write_metadata(path, metadata):
+    """Write a metadata file, replacing any previous one at once."""
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(partial, path)
+
+
+def main(argv=None):
+    """Entry point for batch spectrogram extraction."""
+    args = parse_args(argv)
+    settings = analysis_settings(args)
+    output_dir = Path(args.output)
+    warmup = warmup_spectra(settings["smoothing"])
+
+    inputs = find_inputs(args.inputs, raw=args.raw is not None)
+    clashes = find_clashes(inputs)
+    for name, sources in clashes.items():
+        log(
+            f"⚠ {', '.join(map(str, sources))} would all be written to "
+            f"{output_dir / name}.npy"
+        )
+    if clashes:
+        log("⚠ Rename these files or analyze them into separate output directories")
+        sys.exit(1)
+
+    # Work out every file's outputs and split long files into segments
+    jobs = {}  # output path -> file job
+    tasks = []
+    skipped = 0
+    failed = 0
+    for source, name in inputs:
+        output_path = output_dir / name.with_name(name.name + ".npy")
+        metadata_path = output_dir / name.with_name(name.name + ".json")
+        if not args.force and is_done(source, metadata_path, output_path, settings):
+            skipped += 1
+            continue
+        try:
+            with AudioFileReader(
+                source,
+                raw_format=args.raw,
+                sample_rate=args.rate,
+                channels=args.channels,
+            ) as reader:
+                sample_rate, channels = reader.sample_rate, reader.channels
+                frames = reader.frames
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            log(f"⚠ {source}: {e or type(e).__name__}")
+            failed += 1
+            continue
+
+        count = count_spectra(frames, args.chunk, args.hop)
+        if args.layout == "split":
+            shape = (count, channels, args.bands)
+        else:
+            shape = (count, args.bands)
+        plan = get_band_plan(
+            args.chunk,
+            sample_rate,
+            args.bands,
+            settings["min_frequency"],
+            settings["max_frequency"],
+        )
+        stat = source.stat()
+        metadata = {
+            "source": str(source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "duration": frames / sample_rate,
+            "spectra": count,
+            "spectra_per_second": sample_rate / args.hop,
+            "shape": list(shape),
+            "band_edges": plan.edges.tolist(),
+            "settings": settings,
+        }
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        partial = output_path.with_name(output_path.name + ".partial")
+        job = {
+            "output": output_path,
+            "partial": partial,
+            "metadata_path": metadata_path,
+            "metadata": metadata,
+            "pending": 0,
+            "failed": False,
+        }
+        jobs[output_path] = job
+
+        if count == 0:
+            with open(partial, "wb") as f:
+                np.save(f, np.zeros(shape, dtype=args.dtype))
+            continue
+        # Preallocated for the workers to fill segment by segment
+        np.lib.format.open_memmap(partial, mode="w+", dtype=args.dtype, shape=shape)
+        step = max(1, round(args.segment * sample_rate / args.hop))
+        for start in range(0, count, step):
+            job["pending"] += 1
+            tasks.append(
+                {
+                    "key": output_path,
+                    "source": str(source),
+                    "raw": args.raw,
+                    "rate": args.rate,
+                    "channels": args.channels,
+                    "settings": settings,
+                    "output": str(partial),
+                    "start": start,
+                    "stop": min(start + step, count),
+                    "warmup": warmup,
+                    "block": args.block,
+                }
+            )
+
+    def finish(job):
+        os.replace(job["partial"], job["output"])
+        write_metadata(job["metadata_path"], job["metadata"])
+        log(f"✓ {job['output']} ({job['metadata']['duration']:.1f}s of audio)")
+
+    log(
+        f"Analyzing {len(jobs)} files in {len(tasks)} segments with "
+        f"{args.jobs} workers ({skipped} already done)"
+    )
+    start_time = time.perf_counter()
+    for job in jobs.values():
+        if job["pending"] == 0:
+            finish(job)
+    if tasks:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(analyze_segment, task): task for task in tasks}
+            for future in as_completed(futures):
+                job = jobs[futures[future]["key"]]
+                try:
+                    future.result()
+                except (
+                    OSError,
+                    EOFError,
+                    ValueError,
+                    wave.Error,
+                    BrokenProcessPool,
+                ) as e:
+                    if not job["failed"]:
+                        log(f"⚠ {job['metadata']['source']}: {e or type(e).__name__}")
+                        job["failed"] = True
+                job["pending"] -= 1
+                if job["pending"] == 0 and not job["failed"]:
+                    finish(job)
+
+    for job in jobs.values():
+        if job["failed"]:
+            failed += 1
+            job["partial"].unlink(missing_ok=True)
+
+    elapsed = time.perf_counter() - start_time
+    done = [job for job in jobs.values() if not job["failed"]]
+    audio = sum(job["metadata"]["duration"] for job in done)
+    if done and elapsed > 0:
+        rates = f"{len(done) / elapsed:.1f} files/s"
+        # Files without frames have no real-time factor
+        if audio > 0:
+            rates += (
+                f", {audio / elapsed:.1f}x real time, "
+                f"real-time factor {elapsed / audio:.4f}"
+            )
+        log(
+            f"Analyzed {len(done)} files, {audio:.1f}s of audio in {elapsed:.2f}s "
+            f"({rates})"
+        )
+    if failed:
+        log(f"⚠ {failed} files failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
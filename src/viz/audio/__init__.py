@@ -1,3 +1,13 @@
 """Audio capture and analysis modules."""
 
-__all__ = ["capture", "analyzer"]
+__all__ = [
+    "capture",
+    "analyzer",
+    "bands",
+    "ringbuffer",
+    "fake",
+    "sliding",
+    "engine",
+    "sources",
+    "recording",
+]
@@ -2,18 +2,88 @@
 Audio analysis module for FFT and frequency spectrum analysis.
 """
 import numpy as np
-from scipy import signal
+from .bands import get_band_plan
 from ..utils import config
+from ..utils.runtime import runtime
+from ..utils.telemetry import telemetry
+
+# Live settings that change the band plan and the buffer sizes
+BAND_FIELDS = ("NUM_FREQUENCY_BANDS", "MIN_FREQUENCY", "MAX_FREQUENCY")
 
 
 class AudioAnalyzer:
     """Performs FFT and frequency analysis on audio data."""
 
-    def __init__(self):
-        """Initialize the audio analyzer."""
-        self.window = signal.windows.hann(config.CHUNK_SIZE)
+    def __init__(self, realtime=None):
+        """
+        Initialize the audio analyzer.
+
+        Args:
+            realtime: Use the float32, allocation-free analysis path. The
+                returned spectrum is then a view of an internal buffer that
+                is overwritten by the next call. Defaults to
+                config.REALTIME_ANALYSIS.
+        """
+        if realtime is None:
+            realtime = config.REALTIME_ANALYSIS
+        self.realtime = realtime
+
+        # Symmetric Hann window, as scipy.signal.windows.hann builds it
+        self.window = np.hanning(config.CHUNK_SIZE)
+        self.band_plan = self._create_band_plan()
         self.prev_spectrum = None
 
+        # Per-channel buffers, allocated for the channel count of the input
+        self.channel_spectra = None
+
+        if self.realtime:
+            self._allocate_buffers()
+
+        # Follow band and smoothing changes made while running
+        runtime.subscribe(self._on_config_change, BAND_FIELDS + ("SMOOTHING_FACTOR",))
+
+    def _on_config_change(self, changed):
+        """
+        Rebuild what depends on the changed settings.
+
+        Args:
+            changed: Names of the changed settings
+        """
+        if changed.intersection(BAND_FIELDS):
+            self.band_plan = self._create_band_plan()
+            self.prev_spectrum = None
+            self.channel_spectra = None
+            if self.realtime:
+                self._allocate_buffers()
+        else:
+            self._smoothing = np.float32(config.SMOOTHING_FACTOR)
+            self._blend = np.float32(1 - config.SMOOTHING_FACTOR)
+
+    def _create_band_plan(self):
+        """Return the shared band plan of the current settings."""
+        return get_band_plan(
+            config.CHUNK_SIZE,
+            config.SAMPLE_RATE,
+            config.NUM_FREQUENCY_BANDS,
+            config.MIN_FREQUENCY,
+            config.MAX_FREQUENCY,
+        )
+
+    def _allocate_buffers(self):
+        """Allocate the reusable float32 buffers for realtime analysis."""
+        num_bins = config.CHUNK_SIZE // 2 + 1
+        self._window32 = self.window.astype(np.float32)
+        self._samples = np.zeros(config.CHUNK_SIZE, dtype=np.float32)
+        self._fft = np.zeros(num_bins, dtype=np.complex64)
+        self._magnitude = np.zeros(num_bins, dtype=np.float32)
+        self._bands = np.zeros(config.NUM_FREQUENCY_BANDS, dtype=np.float32)
+        self._spectrum = np.zeros(config.NUM_FREQUENCY_BANDS, dtype=np.float32)
+        self._silence = np.zeros(config.NUM_FREQUENCY_BANDS, dtype=np.float32)
+        self._peak = np.zeros((), dtype=np.float32)
+        self._workspace = self.band_plan.workspace(np.float32)
+        self._smoothing = np.float32(config.SMOOTHING_FACTOR)
+        self._blend = np.float32(1 - config.SMOOTHING_FACTOR)
+
     def analyze(self, audio_data):
         """
         Analyze audio data and return frequency spectrum.
@@ -24,6 +94,9 @@ class AudioAnalyzer:
         Returns:
             NumPy array of frequency amplitudes
         """
+        if self.realtime:
+            return self._analyze_realtime(audio_data)
+
         if audio_data is None or len(audio_data) == 0:
             return np.zeros(config.NUM_FREQUENCY_BANDS)
 
@@ -37,9 +110,11 @@ class AudioAnalyzer:
         # Perform FFT
         fft_data = np.fft.rfft(windowed)
         fft_magnitude = np.abs(fft_data)
+        telemetry.lap("fft")
 
         # Convert to frequency bins
         spectrum = self._map_to_frequency_bands(fft_magnitude)
+        telemetry.lap("bands")
 
         # Apply smoothing
         if self.prev_spectrum is not None:
@@ -47,46 +122,240 @@ class AudioAnalyzer:
                 config.SMOOTHING_FACTOR * self.prev_spectrum
                 + (1 - config.SMOOTHING_FACTOR) * spectrum
             )
+        telemetry.lap("smoothing")
 
         self.prev_spectrum = spectrum
         return spectrum
 
-    def _map_to_frequency_bands(self, fft_magnitude):
+    def analyze_batch(self, audio_data, hop=None):
         """
-        Map FFT output to logarithmic frequency bands.
+        Analyze many frames at once and return their smoothed spectra.
+
+        The result matches calling analyze() on each frame in order with
+        realtime=False, and the smoothing state carries over between
+        batches and single-frame calls.
 
         Args:
-            fft_magnitude: FFT magnitude array
+            audio_data: 1-D signal to split into frames of CHUNK_SIZE
+                samples, or 2-D array of shape (num_frames, CHUNK_SIZE)
+            hop: Samples between frame starts for 1-D input
+                (default: CHUNK_SIZE)
 
         Returns:
-            NumPy array of frequency band amplitudes
+            NumPy array of shape (num_frames, NUM_FREQUENCY_BANDS)
         """
-        # Create logarithmic frequency scale
-        freqs = np.fft.rfftfreq(config.CHUNK_SIZE, 1.0 / config.SAMPLE_RATE)
+        audio_data = np.asarray(audio_data)
+        if audio_data.ndim == 1:
+            if hop is None:
+                hop = config.CHUNK_SIZE
+            if len(audio_data) < config.CHUNK_SIZE:
+                return np.zeros((0, config.NUM_FREQUENCY_BANDS))
+            frames = np.lib.stride_tricks.sliding_window_view(
+                audio_data, config.CHUNK_SIZE
+            )[::hop]
+        else:
+            frames = audio_data[:, : config.CHUNK_SIZE]
 
-        # Filter to desired frequency range
-        freq_mask = (freqs >= config.MIN_FREQUENCY) & (freqs <= config.MAX_FREQUENCY)
-        filtered_freqs = freqs[freq_mask]
-        filtered_magnitudes = fft_magnitude[freq_mask]
+        if len(frames) == 0:
+            return np.zeros((0, config.NUM_FREQUENCY_BANDS))
 
-        if len(filtered_freqs) == 0:
-            return np.zeros(config.NUM_FREQUENCY_BANDS)
+        # Windowed FFT over all frames in one call
+        fft_magnitude = np.abs(np.fft.rfft(frames * self.window, axis=-1))
+        telemetry.lap("fft")
+
+        # Map all frames to bands and normalize each one
+        spectra = self.band_plan.apply(fft_magnitude)
+        max_vals = spectra.max(axis=-1, keepdims=True)
+        np.divide(spectra, max_vals, out=spectra, where=max_vals > 0)
+        telemetry.lap("bands")
+
+        # Exponential smoothing as a first-order IIR filter along time;
+        # imported here so that starting the app does not load SciPy
+        from scipy import signal
+
+        if self.prev_spectrum is None:
+            prev = spectra[0]
+            spectra = spectra[1:]
+        else:
+            prev = np.asarray(self.prev_spectrum, dtype=np.float64)
+        smoothed = signal.lfilter(
+            [1 - config.SMOOTHING_FACTOR],
+            [1.0, -config.SMOOTHING_FACTOR],
+            spectra,
+            axis=0,
+            zi=(config.SMOOTHING_FACTOR * prev)[np.newaxis],
+        )[0]
+        if self.prev_spectrum is None:
+            smoothed = np.concatenate([prev[np.newaxis], smoothed])
+
+        if len(smoothed) > 0:
+            if self.realtime:
+                self._spectrum[:] = smoothed[-1]
+                self.prev_spectrum = self._spectrum
+            else:
+                self.prev_spectrum = smoothed[-1]
+        telemetry.lap("smoothing")
+
+        return smoothed
+
+    def analyze_channels(self, audio_data, layout="split"):
+        """
+        Analyze every channel of a chunk with one batched FFT.
+
+        All channels are normalized by their common peak so that their
+        levels stay comparable, and each is smoothed like analyze().
+
+        Args:
+            audio_data: NumPy array of shape (frames, channels); 1-D input
+                is treated as a single channel
+            layout: "split" for one spectrum per channel, or "midside" for
+                the mid (L+R) and side (L-R) spectra of the first two
+                channels
+
+        Returns:
+            float32 array of shape (num_spectra, NUM_FREQUENCY_BANDS), a view
+            of an internal buffer that is overwritten by the next call
+        """
+        if audio_data is None or len(audio_data) == 0:
+            return np.zeros((0, config.NUM_FREQUENCY_BANDS), dtype=np.float32)
+
+        frames = audio_data[: config.CHUNK_SIZE]
+        if frames.ndim == 1:
+            frames = frames[:, np.newaxis]
+        count, channels = frames.shape
+
+        num_spectra = 2 if layout == "midside" else channels
+        if self.channel_spectra is None or len(self.channel_spectra) != num_spectra:
+            self._allocate_channel_buffers(num_spectra)
+        samples = self._channel_samples
+
+        # Deinterleave into one contiguous row per spectrum; mid/side scale
+        # factors are left out as the normalization cancels them
+        if layout == "midside":
+            right = frames[:, 1] if channels > 1 else frames[:, 0]
+            np.add(frames[:, 0], right, out=samples[0, :count])
+            np.subtract(frames[:, 0], right, out=samples[1, :count])
+        else:
+            samples[:, :count] = frames.T
+        samples[:, count:] = 0
 
-        # Create logarithmic bins
-        log_bins = np.logspace(
-            np.log10(config.MIN_FREQUENCY),
-            np.log10(config.MAX_FREQUENCY),
-            config.NUM_FREQUENCY_BANDS + 1,
+        # Window and transform every row in one call
+        np.multiply(samples, self._channel_window, out=samples)
+        np.fft.rfft(samples, axis=-1, norm="forward", out=self._channel_fft)
+        np.abs(self._channel_fft, out=self._channel_magnitude)
+        telemetry.lap("fft")
+
+        bands = self.band_plan.apply(self._channel_magnitude, out=self._channel_bands)
+        bands.max(out=self._peak)
+        if self._peak > 0:
+            np.divide(bands, self._peak, out=bands)
+        telemetry.lap("bands")
+
+        if self._channels_primed:
+            np.multiply(self.channel_spectra, self._smoothing, out=self.channel_spectra)
+            np.multiply(bands, self._blend, out=bands)
+            np.add(self.channel_spectra, bands, out=self.channel_spectra)
+        else:
+            self.channel_spectra[:] = bands
+            self._channels_primed = True
+        telemetry.lap("smoothing")
+
+        return self.channel_spectra
+
+    def _allocate_channel_buffers(self, num_spectra):
+        """
+        Allocate the reusable buffers of analyze_channels().
+
+        Args:
+            num_spectra: Number of spectra computed per chunk
+        """
+        if not self.realtime:
+            self._allocate_buffers()
+        num_bins = config.CHUNK_SIZE // 2 + 1
+        shape = (num_spectra, config.NUM_FREQUENCY_BANDS)
+        self._channel_samples = np.zeros(
+            (num_spectra, config.CHUNK_SIZE), dtype=np.float32
         )
+        # One window row per spectrum: broadcasting a single row in place
+        # makes numpy allocate a temporary buffer
+        self._channel_window = np.tile(self._window32, (num_spectra, 1))
+        self._channel_fft = np.zeros((num_spectra, num_bins), dtype=np.complex64)
+        self._channel_magnitude = np.zeros((num_spectra, num_bins), dtype=np.float32)
+        self._channel_bands = np.zeros(shape, dtype=np.float32)
+        self.channel_spectra = np.zeros(shape, dtype=np.float32)
+        self._channels_primed = False
 
-        # Map magnitudes to bins
-        spectrum = np.zeros(config.NUM_FREQUENCY_BANDS)
-        for i in range(config.NUM_FREQUENCY_BANDS):
-            bin_mask = (filtered_freqs >= log_bins[i]) & (
-                filtered_freqs < log_bins[i + 1]
-            )
-            if np.any(bin_mask):
-                spectrum[i] = np.mean(filtered_magnitudes[bin_mask])
+    def _analyze_realtime(self, audio_data):
+        """
+        Analyze audio data in float32 using only preallocated buffers.
+
+        Args:
+            audio_data: NumPy array of audio samples
+
+        Returns:
+            View of the internal float32 spectrum buffer
+        """
+        if audio_data is None or len(audio_data) == 0:
+            return self._silence
+
+        frames = audio_data[: config.CHUNK_SIZE]
+        count = len(frames)
+
+        # Convert stereo to mono if needed
+        if frames.ndim > 1:
+            samples = self._samples[:count]
+            samples[:] = frames[:, 0]
+            for channel in range(1, frames.shape[1]):
+                np.add(samples, frames[:, channel], out=samples)
+            np.multiply(samples, np.float32(1 / frames.shape[1]), out=samples)
+        else:
+            self._samples[:count] = frames
+        self._samples[count:] = 0
+
+        # Apply window function
+        np.multiply(self._samples, self._window32, out=self._samples)
+
+        # Perform FFT. norm="forward" keeps numpy's transform in float32; the
+        # 1/N scale cancels out in the band normalization.
+        np.fft.rfft(self._samples, norm="forward", out=self._fft)
+        np.abs(self._fft, out=self._magnitude)
+        telemetry.lap("fft")
+
+        # Convert to frequency bins
+        bands = self._map_to_frequency_bands(self._magnitude, out=self._bands)
+        telemetry.lap("bands")
+
+        # Apply smoothing
+        if self.prev_spectrum is None:
+            self._spectrum[:] = bands
+            self.prev_spectrum = self._spectrum
+        else:
+            np.multiply(self._spectrum, self._smoothing, out=self._spectrum)
+            np.multiply(bands, self._blend, out=bands)
+            np.add(self._spectrum, bands, out=self._spectrum)
+        telemetry.lap("smoothing")
+
+        return self._spectrum
+
+    def _map_to_frequency_bands(self, fft_magnitude, out=None):
+        """
+        Map FFT output to logarithmic frequency bands.
+
+        Args:
+            fft_magnitude: FFT magnitude array
+            out: Optional preallocated output array (realtime mode only)
+
+        Returns:
+            NumPy array of frequency band amplitudes
+        """
+        if out is not None:
+            self.band_plan.apply(fft_magnitude, out=out, workspace=self._workspace)
+            out.max(out=self._peak)
+            if self._peak > 0:
+                np.divide(out, self._peak, out=out)
+            return out
+
+        spectrum = self.band_plan.apply(fft_magnitude)
 
         # Normalize
         max_val = np.max(spectrum)
@@ -0,0 +1,171 @@
+"""
+Frequency band plan for mapping FFT bins onto logarithmic bands.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+class BandPlan:
+    """Precomputed mapping from FFT bins to logarithmic frequency bands."""
+
+    def __init__(
+        self, chunk_size, sample_rate, num_bands, min_frequency, max_frequency
+    ):
+        """
+        Build the band plan.
+
+        Args:
+            chunk_size: FFT length in samples
+            sample_rate: Sample rate in Hz
+            num_bands: Number of logarithmic bands
+            min_frequency: Lowest frequency in Hz
+            max_frequency: Highest frequency in Hz
+        """
+        self.chunk_size = chunk_size
+        self.sample_rate = sample_rate
+        self.num_bands = num_bands
+        self.min_frequency = min_frequency
+        self.max_frequency = max_frequency
+
+        self.freqs = np.fft.rfftfreq(chunk_size, 1.0 / sample_rate)
+        self.edges = np.logspace(
+            np.log10(min_frequency), np.log10(max_frequency), num_bands + 1
+        )
+
+        # Band index of every FFT bin, -1 for bins outside all bands
+        band_index = np.searchsorted(self.edges, self.freqs, side="right") - 1
+        in_range = (
+            (self.freqs >= min_frequency)
+            & (self.freqs <= max_frequency)
+            & (band_index >= 0)
+            & (band_index < num_bands)
+        )
+        band_index[~in_range] = -1
+        self.band_index = band_index
+
+        self.counts = np.bincount(band_index[in_range], minlength=num_bands)
+        filled = np.flatnonzero(self.counts)
+
+        if len(filled) == 0:
+            self._start = self._stop = 0
+            self._offsets = np.zeros(0, dtype=np.intp)
+            self._reduced = 0
+        else:
+            # In-range bins are contiguous and sorted by band, so every band
+            # is one run of bins and np.add.reduceat sums all runs at once.
+            bins = np.flatnonzero(in_range)
+            self._start = bins[0]
+            self._stop = bins[-1] + 1
+            self._reduced = filled[-1] + 1
+            starts = np.searchsorted(
+                band_index[self._start : self._stop], np.arange(self._reduced)
+            )
+            self._offsets = starts.astype(np.intp)
+
+        inv_counts = np.zeros(num_bands)
+        inv_counts[filled] = 1.0 / self.counts[filled]
+        self._inv_counts = inv_counts
+
+        # Empty bands are linearly interpolated between their nearest filled
+        # neighbours; bands are log-spaced so band index is log-frequency.
+        self._empty = np.flatnonzero(self.counts == 0)
+        if len(filled) > 0 and len(self._empty) > 0:
+            pos = np.searchsorted(filled, self._empty)
+            lower = filled[np.clip(pos - 1, 0, len(filled) - 1)]
+            upper = filled[np.clip(pos, 0, len(filled) - 1)]
+            span = upper - lower
+            weight = np.zeros(len(self._empty))
+            inner = span > 0
+            weight[inner] = (self._empty[inner] - lower[inner]) / span[inner]
+            self._lower = lower
+            self._upper = upper
+            self._weight = weight
+        else:
+            self._lower = self._upper = np.zeros(0, dtype=np.intp)
+            self._weight = np.zeros(0)
+
+    def workspace(self, dtype):
+        """
+        Allocate scratch buffers for allocation-free calls to apply().
+
+        Args:
+            dtype: Floating point dtype of the spectra to be mapped
+
+        Returns:
+            Tuple of scratch arrays to pass as apply(..., workspace=...)
+        """
+        dtype = np.dtype(dtype)
+        return (
+            np.empty(len(self._empty), dtype=dtype),
+            np.empty(len(self._empty), dtype=dtype),
+            self._inv_counts.astype(dtype),
+            self._weight.astype(dtype),
+        )
+
+    def apply(self, magnitude, out=None, workspace=None):
+        """
+        Average FFT magnitudes into bands.
+
+        Works on a single spectrum or on a stack of spectra along the
+        last axis. A single spectrum mapped with both out and workspace
+        given does not allocate any arrays.
+
+        Args:
+            magnitude: FFT magnitude array of shape (..., chunk_size // 2 + 1)
+            out: Optional output array of shape (..., num_bands)
+            workspace: Optional scratch buffers from workspace()
+
+        Returns:
+            NumPy array of shape (..., num_bands) with band amplitudes
+        """
+        if out is None:
+            out = np.empty(
+                magnitude.shape[:-1] + (self.num_bands,), dtype=magnitude.dtype
+            )
+        if self._reduced == 0:
+            out[...] = 0
+            return out
+
+        if workspace is None or out.ndim != 1:
+            lower = upper = None
+            inv_counts = self._inv_counts.astype(out.dtype, copy=False)
+            weight = self._weight.astype(out.dtype, copy=False)
+        else:
+            lower, upper, inv_counts, weight = workspace
+
+        segment = magnitude[..., self._start : self._stop]
+        np.add.reduceat(segment, self._offsets, axis=-1, out=out[..., : self._reduced])
+        out[..., self._reduced :] = 0
+        np.multiply(out, inv_counts, out=out)
+
+        if len(self._empty) > 0:
+            lower = np.take(out, self._lower, axis=-1, out=lower)
+            upper = np.take(out, self._upper, axis=-1, out=upper)
+            np.subtract(upper, lower, out=upper)
+            np.multiply(upper, weight, out=upper)
+            np.add(lower, upper, out=lower)
+            if out.ndim == 1:
+                np.put(out, self._empty, lower)
+            else:
+                out[..., self._empty] = lower
+
+        return out
+
+
+@lru_cache(maxsize=8)
+def get_band_plan(chunk_size, sample_rate, num_bands, min_frequency, max_frequency):
+    """
+    Return the shared band plan for the given analysis settings.
+
+    Args:
+        chunk_size: FFT length in samples
+        sample_rate: Sample rate in Hz
+        num_bands: Number of logarithmic bands
+        min_frequency: Lowest frequency in Hz
+        max_frequency: Highest frequency in Hz
+
+    Returns:
+        BandPlan instance
+    """
+    return BandPlan(chunk_size, sample_rate, num_bands, min_frequency, max_frequency)
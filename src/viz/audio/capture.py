@@ -1,74 +1,262 @@
 """
 Audio capture module for capturing audio from BlackHole device.
 """
+import json
+import os
 import numpy as np
+from .decimate import Decimator, decimation_factor
+from .ringbuffer import SampleRingBuffer
 from ..utils import config
 
-try:
-    import pyaudio
+# PortAudio constants, also used when PyAudio is replaced by a fake
+PA_FLOAT32 = 1
+PA_CONTINUE = 0
+PA_INPUT_OVERFLOW = 2
 
-    PYAUDIO_AVAILABLE = True
-except ImportError:
-    PYAUDIO_AVAILABLE = False
-    pyaudio = None
+# Device found by the last scan in this process, as (index, name)
+_found_device = None
+
+
+def _load_device_cache():
+    """Return the remembered (index, name) of the input device, or None."""
+    if _found_device is not None:
+        return _found_device
+    if not config.DEVICE_CACHE_PATH:
+        return None
+    try:
+        with open(os.path.expanduser(config.DEVICE_CACHE_PATH)) as f:
+            cached = json.load(f)
+        return int(cached["index"]), str(cached["name"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_device_cache(index, name):
+    """Remember the input device for the next start."""
+    global _found_device
+    _found_device = (index, name)
+    if not config.DEVICE_CACHE_PATH:
+        return
+    path = os.path.expanduser(config.DEVICE_CACHE_PATH)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"index": index, "name": name}, f)
+    except OSError:
+        # A read-only home only costs a device scan on the next start
+        pass
 
 
 class AudioCapture:
     """Handles audio input capture from BlackHole device."""
 
-    def __init__(self):
-        """Initialize the audio capture system."""
-        if not PYAUDIO_AVAILABLE:
-            raise RuntimeError(
-                "PyAudio is not installed. Install with: uv pip install pyaudio"
-            )
+    def __init__(self, pa=None, mode=None):
+        """
+        Initialize the audio capture system.
+
+        Args:
+            pa: PyAudio-compatible object used to open the stream, defaults
+                to a new pyaudio.PyAudio(); pass a FakePyAudio to run without
+                an audio device
+            mode: "callback" to fill a ring buffer from the stream callback,
+                or "blocking" to read in the caller (default:
+                config.CAPTURE_MODE)
+        """
+        if pa is None:
+            # Imported here so that starting the app does not wait for it
+            try:
+                import pyaudio
+            except ImportError:
+                raise RuntimeError(
+                    "PyAudio is not installed. Install with: uv pip install pyaudio"
+                ) from None
+            pa = pyaudio.PyAudio()
 
-        self.pa = pyaudio.PyAudio()
+        self.pa = pa
+        self.mode = mode or config.CAPTURE_MODE
         self.stream = None
+        self.input_overflows = 0
+        self.ring = SampleRingBuffer(config.CAPTURE_BUFFER_SIZE, config.CHANNELS)
+        self._chunk = np.zeros((config.CHUNK_SIZE, config.CHANNELS), dtype=np.float32)
+        self._available = np.zeros(
+            (config.CAPTURE_BUFFER_SIZE, config.CHANNELS), dtype=np.float32
+        )
         self.device_index = self._find_blackhole_device()
 
+        # Rates well above twice MAX_FREQUENCY are decimated before they
+        # reach the ring buffer, so the analysis runs at the reduced rate
+        self.device_rate = self._device_rate()
+        self.decimator = None
+        factor = 1
+        if config.CAPTURE_DECIMATE:
+            factor = decimation_factor(self.device_rate, config.MAX_FREQUENCY)
+        if factor > 1:
+            self.decimator = Decimator(
+                factor, self.device_rate, config.MAX_FREQUENCY, config.CHANNELS
+            )
+        self.factor = factor
+        self.sample_rate = self.device_rate // factor  # rate of the frames read
+
+    @property
+    def overruns(self):
+        """Frames dropped because the ring buffer was full."""
+        return self.ring.overruns
+
+    @property
+    def underruns(self):
+        """Reads that found no new audio."""
+        return self.ring.underruns
+
     def _find_blackhole_device(self):
-        """Find the BlackHole audio device."""
-        # TODO: Implement device detection
-        # For now, return None (will need to be implemented)
+        """
+        Find the BlackHole audio device.
+
+        The device found last time (see DEVICE_CACHE_PATH) is checked first,
+        which costs one device query instead of a scan of every device. The
+        full scan runs when nothing is remembered or the remembered index now
+        belongs to another device.
+
+        Returns:
+            Device index, or None if no BlackHole input is present
+        """
+        cached = _load_device_cache()
+        if cached is not None:
+            index, name = cached
+            if self._is_blackhole_input(index, name):
+                return index
+
         for i in range(self.pa.get_device_count()):
             device_info = self.pa.get_device_info_by_index(i)
-            if "BlackHole" in device_info.get("name", ""):
+            name = device_info.get("name", "")
+            if "BlackHole" in name:
+                _save_device_cache(i, name)
                 return i
         return None
 
+    def _device_rate(self):
+        """
+        Return the sample rate to open the stream at (CAPTURE_SAMPLE_RATE).
+
+        Returns:
+            Rate in Hz: the device's native rate for "native", else the
+            configured rate
+        """
+        rate = config.CAPTURE_SAMPLE_RATE
+        if rate == "native":
+            rate = None
+            if self.device_index is not None:
+                info = self.pa.get_device_info_by_index(self.device_index)
+                rate = info.get("defaultSampleRate")
+        return int(rate or config.SAMPLE_RATE)
+
+    def _is_blackhole_input(self, index, name):
+        """Check that a device index still refers to the named input."""
+        try:
+            device_info = self.pa.get_device_info_by_index(index)
+        except OSError:
+            # PyAudio raises IOError for an index that no longer exists
+            return False
+        return (
+            device_info.get("name", "") == name
+            and device_info.get("maxInputChannels", 1) > 0
+        )
+
     def start(self):
         """Start the audio capture stream."""
         if self.device_index is None:
             raise RuntimeError("BlackHole device not found")
 
+        callback = self._on_audio if self.mode == "callback" else None
         self.stream = self.pa.open(
-            format=pyaudio.paFloat32,
+            format=PA_FLOAT32,
             channels=config.CHANNELS,
-            rate=config.SAMPLE_RATE,
+            rate=self.device_rate,
             input=True,
             input_device_index=self.device_index,
-            frames_per_buffer=config.CHUNK_SIZE,
+            frames_per_buffer=(
+                config.CAPTURE_BLOCK_SIZE if callback else config.CHUNK_SIZE
+            )
+            * self.factor,
+            stream_callback=callback,
         )
 
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """Stream callback: copy the new frames into the ring buffer."""
+        frames = np.frombuffer(in_data, dtype=np.float32).reshape(-1, config.CHANNELS)
+        if self.decimator is not None:
+            frames = self.decimator.process(frames)
+        self.ring.write(frames)
+        if status & PA_INPUT_OVERFLOW:
+            self.input_overflows += 1
+        return None, PA_CONTINUE
+
     def read_chunk(self):
-        """Read a chunk of audio data."""
+        """
+        Read a chunk of audio data.
+
+        In callback mode this never blocks: it returns the latest CHUNK_SIZE
+        frames from the ring buffer, or None if no new audio has arrived
+        since the previous call.
+
+        Returns:
+            NumPy array of shape (CHUNK_SIZE, CHANNELS), or None
+        """
         if self.stream is None:
             return None
 
+        if self.mode == "callback":
+            return self.ring.read_latest(config.CHUNK_SIZE, self._chunk)
+
         try:
-            data = self.stream.read(config.CHUNK_SIZE, exception_on_overflow=False)
+            data = self.stream.read(
+                config.CHUNK_SIZE * self.factor, exception_on_overflow=False
+            )
+            # Deinterleave as a reshape view of the buffer, without a copy
             audio_data = np.frombuffer(data, dtype=np.float32)
-            return audio_data
+            return self._decimate(audio_data.reshape(-1, config.CHANNELS))
+        except Exception as e:
+            print(f"Error reading audio: {e}")
+            return None
+
+    def read_available(self):
+        """
+        Read all audio captured since the previous call.
+
+        In callback mode this never blocks and may return no frames; in
+        blocking mode it waits for CAPTURE_BLOCK_SIZE frames.
+
+        Returns:
+            NumPy array of shape (num_frames, CHANNELS), or None if the
+            stream is not running
+        """
+        if self.stream is None:
+            return None
+
+        if self.mode == "callback":
+            return self.ring.read_available(self._available)
+
+        try:
+            data = self.stream.read(
+                config.CAPTURE_BLOCK_SIZE * self.factor, exception_on_overflow=False
+            )
+            frames = np.frombuffer(data, dtype=np.float32)
+            return self._decimate(frames.reshape(-1, config.CHANNELS))
         except Exception as e:
             print(f"Error reading audio: {e}")
             return None
 
+    def _decimate(self, frames):
+        """Decimate frames read at the device rate, if decimating."""
+        if self.decimator is None:
+            return frames
+        return self.decimator.process(frames)
+
     def stop(self):
         """Stop the audio capture stream."""
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
+            self.stream = None
 
     def close(self):
         """Clean up audio resources."""
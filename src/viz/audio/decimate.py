@@ -0,0 +1,133 @@
+"""
+Streaming polyphase decimation of high sample rate input.
+"""
+import math
+import numpy as np
+
+# Analysis rate as a multiple of MAX_FREQUENCY that decimation keeps at
+# least; the margin above twice the top frequency is the filter transition
+MIN_RATE_FACTOR = 2.2
+
+# Stopband attenuation of the anti-aliasing filter in dB
+STOPBAND_ATTENUATION = 60.0
+
+
+def decimation_factor(rate, max_frequency):
+    """
+    Return the largest integer factor that keeps max_frequency analyzable.
+
+    Args:
+        rate: Input sample rate in Hz
+        max_frequency: Highest frequency displayed in Hz
+
+    Returns:
+        Decimation factor, 1 if the rate cannot be reduced
+    """
+    return max(1, int(rate // (MIN_RATE_FACTOR * max_frequency)))
+
+
+def design_lowpass(factor, rate, max_frequency):
+    """
+    Design the anti-aliasing filter of a decimator as a Kaiser-windowed sinc.
+
+    The output rate is rate / factor. Frequencies that fold back onto
+    0..max_frequency must be removed, so the stopband starts at the output
+    rate minus max_frequency; between max_frequency and there, aliases only
+    land above the displayed range.
+
+    Args:
+        factor: Decimation factor
+        rate: Input sample rate in Hz
+        max_frequency: Highest frequency that must pass in Hz
+
+    Returns:
+        float32 NumPy array of filter taps with unit DC gain
+    """
+    output_rate = rate / factor
+    stop = output_rate - max_frequency
+    cutoff = (max_frequency + stop) / 2 / rate  # cycles per input sample
+    width = (stop - max_frequency) / rate
+
+    # Kaiser's estimates of the window length and shape for the attenuation
+    attenuation = STOPBAND_ATTENUATION
+    num_taps = math.ceil((attenuation - 8) / (2.285 * 2 * math.pi * width)) + 1
+    num_taps += 1 - num_taps % 2  # odd, for a whole-sample delay
+    beta = 0.1102 * (attenuation - 8.7)
+
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, beta)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class Decimator:
+    """
+    Low-pass filters and downsamples a stream of audio blocks.
+
+    Only every factor-th output of the FIR filter is computed, straight from
+    a strided view of the input, which is the polyphase form of filtering
+    then downsampling. The last inputs of each block are kept for the next
+    one, so blocks of any size join seamlessly and the output equals
+    decimating the whole stream at once.
+    """
+
+    def __init__(self, factor, rate, max_frequency, channels=1):
+        """
+        Initialize the decimator.
+
+        Args:
+            factor: Decimation factor, at least 2
+            rate: Input sample rate in Hz
+            max_frequency: Highest frequency that must pass in Hz
+            channels: Channel count of the input blocks
+        """
+        self.factor = factor
+        self.rate = rate
+        self.output_rate = rate / factor
+        self.channels = channels
+        # Reversed, so each output is a dot product with an input window
+        self.taps = design_lowpass(factor, rate, max_frequency)[::-1].copy()
+        # Inputs not yet consumed; starts as silence before the stream
+        self._buffer = np.zeros((len(self.taps) - 1, channels), dtype=np.float32)
+        self._fill = len(self._buffer)
+
+    @property
+    def delay(self):
+        """Delay of the filter in input samples."""
+        return (len(self.taps) - 1) / 2
+
+    def process(self, samples):
+        """
+        Decimate the next block of the stream.
+
+        Args:
+            samples: float32 NumPy array of shape (frames, channels)
+
+        Returns:
+            float32 NumPy array of shape (outputs, channels), about
+            frames / factor outputs
+        """
+        num_taps = len(self.taps)
+        needed = self._fill + len(samples)
+        if needed > len(self._buffer):
+            buffer = np.zeros((needed, self.channels), dtype=np.float32)
+            buffer[: self._fill] = self._buffer[: self._fill]
+            self._buffer = buffer
+        self._buffer[self._fill : needed] = samples
+        self._fill = needed
+
+        count = (needed - num_taps) // self.factor + 1 if needed >= num_taps else 0
+        if count == 0:
+            return np.zeros((0, self.channels), dtype=np.float32)
+
+        # Windows of num_taps inputs, one per kept output
+        windows = np.lib.stride_tricks.sliding_window_view(
+            self._buffer[:needed], num_taps, axis=0
+        )[: (count - 1) * self.factor + 1 : self.factor]
+        output = windows @ self.taps
+
+        # Keep the inputs the next outputs still need
+        consumed = count * self.factor
+        remaining = needed - consumed
+        self._buffer[:remaining] = self._buffer[consumed:needed]
+        self._fill = remaining
+        return output
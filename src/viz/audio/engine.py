@@ -0,0 +1,321 @@
+"""
+Analysis engine running audio capture and analysis in a worker process.
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from ..utils import config
+
+# Header slots of the shared spectrum ring (int64)
+_SEQUENCE = 0  # spectra published since the worker started
+_STOP = 1  # set to 1 by the parent to stop the worker
+_SMOOTHING = 2  # SMOOTHING_FACTOR set by the parent, stored as float64
+_HEADER_SLOTS = 8
+
+
+class SpectrumRing:
+    """
+    Ring of spectra in a shared memory block, one writer and one reader.
+
+    The writer fills the next row and only then advances the sequence
+    counter, so every row below the counter is complete. Readers get views
+    straight into the shared block; a row stays valid until the writer
+    laps it, capacity spectra later.
+    """
+
+    def __init__(self, buffer, capacity, num_bands):
+        """
+        Map the ring onto a shared buffer.
+
+        Args:
+            buffer: Memory of at least SpectrumRing.nbytes(capacity, num_bands)
+                bytes, usually SharedMemory.buf
+            capacity: Number of spectra the ring holds
+            num_bands: Bands per spectrum
+        """
+        self.capacity = capacity
+        self.num_bands = num_bands
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=buffer)
+        self._values = self._header.view(np.float64)
+        self._rows = np.ndarray(
+            (capacity, num_bands),
+            dtype=np.float32,
+            buffer=buffer,
+            offset=self._header.nbytes,
+        )
+        self._read_seq = 0
+        self.skipped = 0  # spectra overwritten before they were read
+
+    @staticmethod
+    def nbytes(capacity, num_bands):
+        """Return the shared memory size needed for a ring."""
+        return _HEADER_SLOTS * 8 + capacity * num_bands * 4
+
+    @property
+    def sequence(self):
+        """Number of spectra published so far."""
+        return int(self._header[_SEQUENCE])
+
+    def write(self, spectrum):
+        """
+        Publish a spectrum (writer side).
+
+        Args:
+            spectrum: NumPy array of num_bands amplitudes
+        """
+        seq = int(self._header[_SEQUENCE])
+        self._rows[seq % self.capacity] = spectrum
+        self._header[_SEQUENCE] = seq + 1
+
+    def read(self):
+        """
+        Return the spectra published since the previous read (reader side).
+
+        Returns:
+            List of views into the ring, oldest first
+        """
+        end = int(self._header[_SEQUENCE])
+        # Leave a margin of one row the writer may be filling right now
+        start = max(self._read_seq, end - self.capacity + 1)
+        self.skipped += start - self._read_seq
+        self._read_seq = end
+        return [self._rows[seq % self.capacity] for seq in range(start, end)]
+
+    @property
+    def stop_requested(self):
+        """True once the reader asked the writer to stop."""
+        return bool(self._header[_STOP])
+
+    def request_stop(self):
+        """Ask the writer to stop (reader side)."""
+        self._header[_STOP] = 1
+
+    @property
+    def smoothing(self):
+        """Smoothing factor the writer should analyze with."""
+        return float(self._values[_SMOOTHING])
+
+    @smoothing.setter
+    def smoothing(self, value):
+        self._values[_SMOOTHING] = value
+
+    def release(self):
+        """Drop the views into the shared buffer so it can be closed."""
+        self._header = None
+        self._values = None
+        self._rows = None
+
+
+def _config_snapshot():
+    """Return the plain settings of the config module."""
+    return {
+        name: value
+        for name, value in vars(config).items()
+        if name.isupper()
+        and isinstance(value, (bool, int, float, str, tuple, type(None)))
+    }
+
+
+def _run_worker(shm_name, capacity, settings, pa_factory, conn):
+    """
+    Worker process: capture, analyze and publish until asked to stop.
+
+    Args:
+        shm_name: Name of the shared memory block holding the ring
+        capacity: Ring capacity in spectra
+        settings: Config values of the parent process
+        pa_factory: Picklable callable returning a PyAudio-like object, or
+            None for the real PyAudio
+        conn: Pipe connection for the startup status
+    """
+    for name, value in settings.items():
+        setattr(config, name, value)
+
+    # Imported here so the parent never loads the capture stack for the engine
+    from .analyzer import AudioAnalyzer
+    from .capture import AudioCapture
+    from .sliding import SlidingAnalyzer
+    from ..utils.runtime import runtime
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = SpectrumRing(shm.buf, capacity, config.NUM_FREQUENCY_BANDS)
+    capture = None
+    try:
+        try:
+            pa = pa_factory() if pa_factory is not None else None
+            capture = AudioCapture(pa=pa, mode="callback")
+            capture.start()
+        except (RuntimeError, OSError, ValueError) as e:
+            # No device or PyAudio, or a stream PortAudio cannot open
+            conn.send(("error", str(e)))
+            return
+        # Analyze at the capture's rate, reduced if it decimates
+        config.SAMPLE_RATE = capture.sample_rate
+
+        # Without render frames to pace it, "frame" means one spectrum per
+        # frame period of audio
+        hop = config.ANALYSIS_HOP
+        if hop is None:
+            hop = config.CHUNK_SIZE
+        elif hop == "frame":
+            hop = round(config.SAMPLE_RATE / config.FPS_TARGET)
+        analyzer = SlidingAnalyzer(AudioAnalyzer(), hop=hop)
+        idle = config.CAPTURE_BLOCK_SIZE / config.SAMPLE_RATE / 2
+
+        conn.send(("ready", capture.sample_rate))
+        while not ring.stop_requested:
+            # Smoothing changes arrive through the ring header, so they
+            # need no restart; the analyzer picks them up as a live update
+            smoothing = ring.smoothing
+            if smoothing != config.SMOOTHING_FACTOR:
+                runtime.update(SMOOTHING_FACTOR=smoothing)
+            spectra = analyzer.push(capture.read_available())
+            for spectrum in spectra:
+                ring.write(spectrum)
+            if len(spectra) == 0:
+                time.sleep(idle)
+    finally:
+        if capture is not None:
+            capture.close()
+        ring.release()
+        shm.close()
+        conn.close()
+
+
+class AnalysisEngine:
+    """
+    Runs AudioCapture and AudioAnalyzer in a separate process.
+
+    Spectra are published into a SpectrumRing in shared memory, so the
+    render loop only copies finished spectra into its history and analysis
+    runs on its own core, outside the renderer's GIL.
+    """
+
+    def __init__(self, capacity=None, pa_factory=None):
+        """
+        Initialize the engine (not started).
+
+        Args:
+            capacity: Spectra held by the shared ring
+                (default: config.ENGINE_RING_SIZE)
+            pa_factory: Picklable callable returning a PyAudio-like object
+                for the worker, None for the real PyAudio
+        """
+        self.capacity = capacity or config.ENGINE_RING_SIZE
+        self.pa_factory = pa_factory
+        self.process = None
+        self.ring = None
+        self.error = None
+        self.sample_rate = None  # analysis rate reported by the worker
+        self._shm = None
+        self._conn = None
+
+    @property
+    def running(self):
+        """True while the worker process is alive."""
+        return self.process is not None and self.process.is_alive()
+
+    def start(self, timeout=None):
+        """
+        Start the worker and wait until its audio stream is running.
+
+        Args:
+            timeout: Seconds to wait for the worker
+                (default: config.ENGINE_START_TIMEOUT)
+
+        Raises:
+            RuntimeError: If the worker fails or does not start in time
+        """
+        timeout = timeout or config.ENGINE_START_TIMEOUT
+        num_bands = config.NUM_FREQUENCY_BANDS
+
+        # Spawn rather than fork: the parent holds SDL and audio threads
+        context = multiprocessing.get_context("spawn")
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=SpectrumRing.nbytes(self.capacity, num_bands)
+        )
+        self.ring = SpectrumRing(self._shm.buf, self.capacity, num_bands)
+        self.ring.smoothing = config.SMOOTHING_FACTOR
+        self._conn, child_conn = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_run_worker,
+            args=(
+                self._shm.name,
+                self.capacity,
+                _config_snapshot(),
+                self.pa_factory,
+                child_conn,
+            ),
+            name="viz-analysis",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        deadline = time.monotonic() + timeout
+        status, message = None, None
+        while status is None and time.monotonic() < deadline:
+            if self._conn.poll(0.05):
+                try:
+                    status, message = self._conn.recv()
+                except EOFError:
+                    status, message = "error", "worker exited during startup"
+            elif not self.process.is_alive():
+                status, message = "error", "worker exited during startup"
+
+        if status != "ready":
+            self.stop()
+            self.error = message or "worker did not start in time"
+            raise RuntimeError(f"Analysis engine failed: {self.error}")
+        self.sample_rate = message
+
+    def set_smoothing(self, value):
+        """
+        Change the smoothing factor of the running worker.
+
+        Args:
+            value: New SMOOTHING_FACTOR, used from the worker's next block
+        """
+        self.ring.smoothing = value
+
+    def read(self):
+        """
+        Return the spectra published since the previous read.
+
+        Returns:
+            List of zero-copy spectrum views, valid until the next read, or
+            None if the worker has died
+        """
+        spectra = self.ring.read()
+        if not spectra and not self.process.is_alive():
+            self.error = f"worker exited with code {self.process.exitcode}"
+            return None
+        return spectra
+
+    def stop(self, timeout=2.0):
+        """
+        Stop the worker and release the shared memory.
+
+        Args:
+            timeout: Seconds to wait for a clean exit before terminating
+        """
+        if self.process is not None:
+            # A flag in shared memory rather than an Event: setting an
+            # Event can deadlock if the worker was killed while waiting on it
+            self.ring.request_stop()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+        if self._shm is not None:
+            self.ring.release()
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
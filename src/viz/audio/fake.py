@@ -0,0 +1,183 @@
+"""
+Fake PyAudio implementation for running audio capture without a device.
+"""
+import threading
+import time
+import numpy as np
+from .capture import PA_CONTINUE, PA_FLOAT32
+
+
+def sine_source(frequency=440.0, amplitude=0.5):
+    """
+    Create a generator function producing a continuous sine tone.
+
+    Args:
+        frequency: Tone frequency in Hz
+        amplitude: Peak amplitude
+
+    Returns:
+        Function (num_frames, channels, rate) -> float32 array
+    """
+    state = {"phase": 0.0}
+
+    def generate(num_frames, channels, rate):
+        step = 2 * np.pi * frequency / rate
+        phases = state["phase"] + step * np.arange(num_frames)
+        state["phase"] = (state["phase"] + step * num_frames) % (2 * np.pi)
+        tone = (amplitude * np.sin(phases)).astype(np.float32)
+        return np.repeat(tone[:, np.newaxis], channels, axis=1)
+
+    return generate
+
+
+class FakeStream:
+    """Stand-in for a PyAudio input stream fed by a generator function."""
+
+    def __init__(
+        self,
+        channels,
+        rate,
+        frames_per_buffer,
+        stream_callback=None,
+        source=None,
+        realtime=True,
+    ):
+        """
+        Initialize the fake stream.
+
+        Args:
+            channels: Number of channels
+            rate: Sample rate in Hz
+            frames_per_buffer: Frames delivered per callback or read
+            stream_callback: PyAudio-style callback, enables callback mode
+            source: Function (num_frames, channels, rate) -> float32 array
+            realtime: Pace callbacks at the sample rate instead of as fast
+                as possible
+        """
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.stream_callback = stream_callback
+        self.source = source or sine_source()
+        self.realtime = realtime
+        self.callbacks = 0
+        self._active = False
+        self._thread = None
+
+    def _generate(self, num_frames):
+        """Return interleaved float32 bytes for num_frames frames."""
+        frames = self.source(num_frames, self.channels, self.rate)
+        return np.ascontiguousarray(frames, dtype=np.float32).tobytes()
+
+    def _run(self):
+        """Deliver buffers to the callback until the stream is stopped."""
+        period = self.frames_per_buffer / self.rate
+        deadline = time.perf_counter()
+        while self._active:
+            data = self._generate(self.frames_per_buffer)
+            self.callbacks += 1
+            _, flag = self.stream_callback(data, self.frames_per_buffer, {}, 0)
+            if flag != PA_CONTINUE:
+                self._active = False
+                break
+            if self.realtime:
+                deadline += period
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+
+    def start_stream(self):
+        """Start delivering audio."""
+        if self._active:
+            return
+        self._active = True
+        if self.stream_callback is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop_stream(self):
+        """Stop delivering audio."""
+        self._active = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_active(self):
+        """Return True while the stream is running."""
+        return self._active
+
+    def read(self, num_frames, exception_on_overflow=True):
+        """Return the next num_frames frames as bytes (blocking mode)."""
+        return self._generate(num_frames)
+
+    def close(self):
+        """Close the stream."""
+        self.stop_stream()
+
+
+class FakePyAudio:
+    """Minimal PyAudio replacement exposing a single fake BlackHole device."""
+
+    def __init__(
+        self,
+        source=None,
+        realtime=True,
+        device_name="BlackHole 2ch",
+        default_rate=44100.0,
+    ):
+        """
+        Initialize the fake audio system.
+
+        Args:
+            source: Function (num_frames, channels, rate) -> float32 array
+            realtime: Pace callback streams at the sample rate
+            device_name: Name reported for the only input device
+            default_rate: Native sample rate reported for the device
+        """
+        self.source = source
+        self.realtime = realtime
+        self.device_name = device_name
+        self.default_rate = default_rate
+        self.streams = []
+
+    def get_device_count(self):
+        """Return the number of devices."""
+        return 1
+
+    def get_device_info_by_index(self, index):
+        """Return the device info dictionary for a device index."""
+        return {
+            "index": index,
+            "name": self.device_name,
+            "maxInputChannels": 2,
+            "defaultSampleRate": self.default_rate,
+        }
+
+    def open(
+        self,
+        format=PA_FLOAT32,
+        channels=2,
+        rate=44100,
+        input=True,
+        input_device_index=None,
+        frames_per_buffer=1024,
+        stream_callback=None,
+        start=True,
+    ):
+        """Open a fake input stream."""
+        stream = FakeStream(
+            channels,
+            rate,
+            frames_per_buffer,
+            stream_callback=stream_callback,
+            source=self.source,
+            realtime=self.realtime,
+        )
+        self.streams.append(stream)
+        if start:
+            stream.start_stream()
+        return stream
+
+    def terminate(self):
+        """Close all open streams."""
+        for stream in self.streams:
+            stream.close()
+        self.streams = []
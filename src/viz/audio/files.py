@@ -0,0 +1,133 @@
+"""
+Streaming readers for WAV and raw PCM audio files.
+"""
+import contextlib
+import wave
+import numpy as np
+
+# Raw PCM sample formats: name -> (dtype, scale to [-1, 1])
+RAW_FORMATS = {
+    "f32": (np.float32, 1.0),
+    "s16": (np.int16, 1.0 / 32768),
+    "s32": (np.int32, 1.0 / 2147483648),
+}
+
+
+class AudioFileReader:
+    """Reads an audio file block by block as float32 frames."""
+
+    def __init__(self, path, raw_format=None, sample_rate=44100, channels=2):
+        """
+        Open an audio file.
+
+        Args:
+            path: Path to a WAV file, or to raw PCM data if raw_format is set
+            raw_format: Sample format of raw PCM data ("f32", "s16", "s32"),
+                None to read a WAV file
+            sample_rate: Sample rate of raw PCM data in Hz
+            channels: Channel count of raw PCM data
+        """
+        self.path = str(path)
+        self._wave = None
+        self._file = None
+
+        # The file stays open until close(), unless the header is rejected
+        with contextlib.ExitStack() as stack:
+            if raw_format is None:
+                self._wave = stack.enter_context(wave.open(self.path, "rb"))
+                self.sample_rate = self._wave.getframerate()
+                self.channels = self._wave.getnchannels()
+                self.frames = self._wave.getnframes()
+                self._sample_width = self._wave.getsampwidth()
+                if self._sample_width not in (1, 2, 3, 4):
+                    raise ValueError(
+                        f"Unsupported WAV sample width: {self._sample_width} bytes"
+                    )
+            else:
+                if raw_format not in RAW_FORMATS:
+                    raise ValueError(f"Unknown raw PCM format: {raw_format}")
+                self._dtype, self._scale = RAW_FORMATS[raw_format]
+                self._file = stack.enter_context(open(self.path, "rb"))
+                self._file.seek(0, 2)
+                self._frame_bytes = np.dtype(self._dtype).itemsize * channels
+                self.frames = self._file.tell() // self._frame_bytes
+                self._file.seek(0)
+                self.sample_rate = sample_rate
+                self.channels = channels
+            stack.pop_all()
+
+    @property
+    def duration(self):
+        """Length of the file in seconds."""
+        return self.frames / self.sample_rate
+
+    def read(self, num_frames):
+        """
+        Read the next block of frames.
+
+        Args:
+            num_frames: Maximum number of frames to read
+
+        Returns:
+            float32 NumPy array of shape (frames_read, channels); empty at
+            the end of the file
+        """
+        if self._wave is not None:
+            data = self._wave.readframes(num_frames)
+            samples = self._decode_wave(data)
+        else:
+            itemsize = np.dtype(self._dtype).itemsize
+            data = self._file.read(num_frames * self.channels * itemsize)
+            usable = len(data) - len(data) % (itemsize * self.channels)
+            samples = np.frombuffer(data[:usable], dtype=self._dtype)
+            samples = samples.astype(np.float32) * np.float32(self._scale)
+
+        return samples.reshape(-1, self.channels)
+
+    def _decode_wave(self, data):
+        """Convert WAV PCM bytes to float32 samples."""
+        width = self._sample_width
+        if width == 1:
+            samples = np.frombuffer(data, dtype=np.uint8).astype(np.float32)
+            return (samples - 128) / 128
+        if width == 3:
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+            padded = np.zeros((len(raw), 4), dtype=np.uint8)
+            padded[:, 1:] = raw
+            samples = padded.view("<i4").ravel()
+            return samples.astype(np.float32) / 2147483648
+        samples = np.frombuffer(data, dtype="<i2" if width == 2 else "<i4")
+        return samples.astype(np.float32) / (2 ** (8 * width - 1))
+
+    def rewind(self):
+        """Go back to the first frame."""
+        if self._wave is not None:
+            self._wave.rewind()
+        else:
+            self._file.seek(0)
+
+    def seek(self, frame):
+        """
+        Continue reading at a frame.
+
+        Args:
+            frame: Index of the next frame to read
+        """
+        frame = min(max(frame, 0), self.frames)
+        if self._wave is not None:
+            self._wave.setpos(frame)
+        else:
+            self._file.seek(frame * self._frame_bytes)
+
+    def close(self):
+        """Close the file."""
+        if self._wave is not None:
+            self._wave.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,411 @@
+"""
+Compact spectrum recordings and their memory-mapped replay.
+"""
+import contextlib
+import os
+import struct
+import time
+import numpy as np
+
+# File layout: a fixed header, the band edges in Hz as float64, padding to
+# a multiple of 64 bytes, then one row per spectrum until the end of the
+# file. The row count follows from the file size, so a recording can be
+# read while it is still being written. Every row starts with its
+# timestamp: the float64 seconds of audio from the start of the recording
+# to the end of the spectrum's window.
+MAGIC = b"VIZSPEC\0"  # the format version is the header's version field
+# Header fields: magic, version, format code, bands, channels, hop, sample
+# rate, full scale
+_HEADER = struct.Struct("<8sHHIIIIf")
+_VERSION = 1
+_ALIGN = 64
+
+# Row formats: name -> (header code, dtype, quantization steps or None)
+RECORD_FORMATS = {
+    "float16": (0, np.float16, None),
+    "uint8": (1, np.uint8, 255),
+    "uint16": (2, np.uint16, 65535),
+}
+
+
+def _header_size(num_bands):
+    """Return the size of the header, band edges and padding in bytes."""
+    size = _HEADER.size + (num_bands + 1) * 8
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _row_dtype(dtype, channels, num_bands):
+    """Return the packed row type: a timestamp and the quantized spectra."""
+    return np.dtype([("time", "<f8"), ("spectra", dtype, (channels, num_bands))])
+
+
+class SpectrumRecorder:
+    """
+    Appends analyzer output to a compact recording file.
+
+    Quantized formats store amplitude / full_scale in 255 or 65535 steps;
+    amplitudes outside [0, full_scale] are clipped. An hour of 64-band
+    spectra at 86 per second takes 22 MB as uint8, timestamps included.
+    """
+
+    def __init__(
+        self,
+        path,
+        num_bands,
+        hop,
+        sample_rate,
+        band_edges=None,
+        channels=1,
+        fmt="uint8",
+        full_scale=1.0,
+    ):
+        """
+        Create a recording file, replacing an existing one.
+
+        Args:
+            path: Output file path
+            num_bands: Frequency bands per spectrum
+            hop: Audio samples between consecutive spectra, used for rows
+                appended without a timestamp
+            sample_rate: Audio sample rate in Hz
+            band_edges: num_bands + 1 band edges in Hz (default: zeros)
+            channels: Spectra per row, one per waterfall
+            fmt: Row format, a key of RECORD_FORMATS
+            full_scale: Amplitude stored as the largest quantized value
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if fmt not in RECORD_FORMATS:
+            raise ValueError(f"Unknown recording format: {fmt}")
+        code, self.dtype, self._steps = RECORD_FORMATS[fmt]
+        self.num_bands = num_bands
+        self.channels = channels
+        self.count = 0
+        self.time = 0.0  # timestamp of the last row
+        self._period = hop / sample_rate
+
+        self._scale = np.float32(1.0)
+        if self._steps is not None:
+            self._scale = np.float32(self._steps / full_scale)
+        self._limit = np.float32(self._steps or np.finfo(np.float16).max)
+        self._row = np.empty((channels, num_bands), dtype=np.float32)
+        self._record = np.zeros((), dtype=_row_dtype(self.dtype, channels, num_bands))
+        self._quantized = self._record["spectra"]
+
+        if band_edges is None:
+            band_edges = np.zeros(num_bands + 1)
+        header = _HEADER.pack(
+            MAGIC,
+            _VERSION,
+            code,
+            num_bands,
+            channels,
+            int(hop),
+            int(sample_rate),
+            full_scale,
+        )
+        header += np.asarray(band_edges, dtype="<f8").tobytes()
+        header += bytes(_header_size(num_bands) - len(header))
+
+        # The file stays open until close(), unless the header cannot be written
+        with contextlib.ExitStack() as stack:
+            self._file = stack.enter_context(open(path, "wb"))
+            self._file.write(header)
+            stack.pop_all()
+
+    def append(self, spectrum, timestamp=None):
+        """
+        Append one spectrum row.
+
+        Args:
+            spectrum: NumPy array of num_bands amplitudes, or of shape
+                (channels, num_bands)
+            timestamp: Seconds from the start of the recording to the end
+                of the spectrum's audio (default: one hop after the
+                previous row)
+        """
+        row = self._row.reshape(np.shape(spectrum))
+        np.multiply(spectrum, self._scale, out=row)
+        if self._steps is not None:
+            np.rint(row, out=row)
+        np.clip(row, 0, self._limit, out=row)
+        self._quantized[...] = self._row
+        if timestamp is None:
+            timestamp = self.time + self._period
+        self.time = timestamp
+        self._record["time"] = timestamp
+        self._file.write(self._record.tobytes())
+        self.count += 1
+
+    def flush(self):
+        """Make the rows appended so far visible to readers."""
+        self._file.flush()
+
+    def close(self):
+        """Finish the recording."""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SpectrumRecording:
+    """
+    Read-only view of a recording file through a memory map.
+
+    Opening only parses the header and maps the file, so it is instant at
+    any length; rows are paged in as they are read.
+    """
+
+    def __init__(self, path):
+        """
+        Open a recording.
+
+        Args:
+            path: Recording file path
+
+        Raises:
+            ValueError: If the file is not a spectrum recording
+        """
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            fixed = f.read(_HEADER.size)
+            if len(fixed) < _HEADER.size or fixed[:8] != MAGIC:
+                raise ValueError(f"Not a spectrum recording: {self.path}")
+            (
+                _,
+                version,
+                code,
+                self.num_bands,
+                self.channels,
+                self.hop,
+                self.sample_rate,
+                self.full_scale,
+            ) = _HEADER.unpack(fixed)
+            if version != _VERSION:
+                raise ValueError(f"Unsupported recording version: {version}")
+            self.band_edges = np.frombuffer(
+                f.read((self.num_bands + 1) * 8), dtype="<f8"
+            )
+
+        formats = {value[0]: (name, value) for name, value in RECORD_FORMATS.items()}
+        if code not in formats:
+            raise ValueError(f"Unknown recording format code: {code}")
+        self.format, (_, self.dtype, steps) = formats[code]
+        self._scale = np.float32(self.full_scale / steps if steps else 1.0)
+        self._offset = _header_size(self.num_bands)
+        self._row_type = _row_dtype(self.dtype, self.channels, self.num_bands)
+        self._rows = None
+        self._times = None
+        self.refresh()
+
+    def refresh(self):
+        """Map rows appended since the file was opened."""
+        size = os.path.getsize(self.path)
+        count = max(size - self._offset, 0) // self._row_type.itemsize
+        if self._rows is not None and len(self._rows) == count:
+            return
+        if count == 0:
+            rows = np.zeros(0, dtype=self._row_type)
+        else:
+            rows = np.memmap(
+                self.path,
+                dtype=self._row_type,
+                mode="r",
+                offset=self._offset,
+                shape=(count,),
+            )
+        self._rows = rows["spectra"]
+        self._times = rows["time"]
+
+    @property
+    def rate(self):
+        """Average spectra per second of audio."""
+        if self.duration > 0:
+            return len(self) / self.duration
+        return self.sample_rate / self.hop
+
+    @property
+    def duration(self):
+        """Length of the recording in seconds."""
+        return float(self._times[-1]) if len(self) else 0.0
+
+    def time_at(self, row):
+        """
+        Return the audio time at which a row starts.
+
+        Args:
+            row: Row index, up to len(self)
+
+        Returns:
+            Seconds of audio; the end of the previous row, 0.0 for row 0
+        """
+        return float(self._times[row - 1]) if row > 0 else 0.0
+
+    def rows_until(self, seconds):
+        """
+        Return the number of rows that end by a point in time.
+
+        Args:
+            seconds: Seconds of audio from the start of the recording
+
+        Returns:
+            Index of the first row that ends after seconds
+        """
+        return int(np.searchsorted(self._times, seconds, side="right"))
+
+    def rows(self, start, stop):
+        """
+        Return a range of spectra as float32 amplitudes.
+
+        Args:
+            start: First row index
+            stop: Row index after the last row
+
+        Returns:
+            NumPy array of shape (rows, num_bands), or (rows, channels,
+            num_bands) for multi-channel recordings
+        """
+        block = self._rows[start:stop].astype(np.float32)
+        if self._scale != 1:
+            block *= self._scale
+        if self.channels == 1:
+            return block[:, 0]
+        return block
+
+    def close(self):
+        """Release the memory map."""
+        self._rows = None
+        self._times = None
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class ReplaySource:
+    """
+    Feeds recorded spectra at their original pace or any multiple of it.
+
+    Replay costs a memory map read and a dequantization per spectrum, with
+    no capture or analysis. Positions are counted in rows and paced by the
+    row timestamps; seeking moves the position and restarts the pacing
+    from there.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        """
+        Open a recording for replay.
+
+        Args:
+            path: Recording file path
+            speed: Playback speed, 1.0 for real time
+            loop: Start over at the end instead of stopping
+        """
+        self.recording = SpectrumRecording(path)
+        self.speed = speed
+        self.loop = loop
+        self.position = 0  # index of the next row
+        self._anchor_time = None
+        self._anchor_seconds = 0.0  # audio time at the anchor
+
+    @property
+    def time(self):
+        """Replay position in seconds of audio."""
+        return self.recording.time_at(self.position)
+
+    @property
+    def finished(self):
+        """True once a non-looping replay has reached the end."""
+        return not self.loop and self.position >= len(self.recording)
+
+    def start(self):
+        """Start pacing from the current position."""
+        self._anchor_time = time.perf_counter()
+        self._anchor_seconds = self.recording.time_at(self.position)
+
+    def set_speed(self, speed):
+        """
+        Change the playback speed without jumping.
+
+        Args:
+            speed: Playback speed, 1.0 for real time
+        """
+        self.speed = speed
+        self.start()
+
+    def seek(self, seconds):
+        """
+        Move the replay position.
+
+        Args:
+            seconds: New position in seconds of audio, clamped to the
+                recording
+        """
+        self.position = self.recording.rows_until(max(seconds, 0.0))
+        self.start()
+
+    def preceding(self, count):
+        """
+        Return the spectra just before the current position.
+
+        Used to fill the display history after a seek.
+
+        Args:
+            count: Maximum number of spectra
+
+        Returns:
+            float32 spectra, oldest first
+        """
+        return self.recording.rows(max(self.position - count, 0), self.position)
+
+    def read(self, limit=None):
+        """
+        Return the spectra due since the previous read.
+
+        Args:
+            limit: Most spectra to return; when more are due, only the
+                newest are returned but the position still advances past
+                all of them
+
+        Returns:
+            float32 spectra, oldest first (empty when none are due)
+        """
+        if self._anchor_time is None:
+            self.start()
+        elapsed = time.perf_counter() - self._anchor_time
+        target = self._anchor_seconds + elapsed * self.speed
+
+        tail = None
+        duration = self.recording.duration
+        if target > duration:
+            self.recording.refresh()
+            duration = self.recording.duration
+            if target > duration and self.loop and duration > 0:
+                # Finish the lap, then continue from the start; whole laps
+                # passed over at once are skipped
+                tail = self.recording.rows(self.position, len(self.recording))
+                laps = target // duration
+                target -= laps * duration
+                self._anchor_seconds -= laps * duration
+                self.position = 0
+        due = self.recording.rows_until(target)
+
+        start = self.position
+        if limit is not None:
+            start = max(start, due - limit)
+        self.position = max(self.position, due)
+        spectra = self.recording.rows(start, due)
+        if tail is None or len(tail) == 0:
+            return spectra
+        if limit is not None:
+            tail = tail[len(tail) - max(limit - len(spectra), 0) :]
+        return np.concatenate([tail, spectra])
+
+    def close(self):
+        """Close the recording."""
+        self.recording.close()
@@ -0,0 +1,131 @@
+"""
+Single-producer/single-consumer sample ring buffer for audio capture.
+"""
+import numpy as np
+
+
+class SampleRingBuffer:
+    """
+    Lock-free ring of audio frames shared by one writer and one reader.
+
+    The writer (the audio callback thread) only advances the write
+    position and the reader (the render loop) only advances the read
+    position, so neither side ever blocks the other. Positions count
+    frames since creation and are mapped onto the buffer modulo its
+    capacity.
+    """
+
+    def __init__(self, capacity, channels):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity: Number of frames the buffer holds
+            channels: Number of samples per frame
+        """
+        self.capacity = capacity
+        self.channels = channels
+        self._buffer = np.zeros((capacity, channels), dtype=np.float32)
+        self._write_pos = 0  # frames published by the writer
+        self._reserved = 0  # frames the writer may be writing right now
+        self._read_pos = 0  # frames consumed by the reader
+        self.overruns = 0  # frames overwritten before they were read
+        self.underruns = 0  # reads that found no new frames
+
+    @property
+    def available(self):
+        """Number of frames written since the last read."""
+        return min(self._write_pos - self._read_pos, self.capacity)
+
+    def write(self, frames):
+        """
+        Append frames to the buffer (writer side).
+
+        Args:
+            frames: NumPy array of shape (num_frames, channels)
+        """
+        count = len(frames)
+        if count > self.capacity:
+            self.overruns += count - self.capacity
+            frames = frames[-self.capacity :]
+            count = self.capacity
+
+        start = self._write_pos
+        unread = start - self._read_pos
+        if unread + count > self.capacity:
+            self.overruns += min(unread + count - self.capacity, count)
+
+        # Announce the range before touching it so a concurrent read can
+        # detect that its frames were overwritten mid-copy
+        self._reserved = start + count
+        offset = start % self.capacity
+        first = min(count, self.capacity - offset)
+        self._buffer[offset : offset + first] = frames[:first]
+        self._buffer[: count - first] = frames[first:]
+        self._write_pos = start + count
+
+    def read_latest(self, count, out):
+        """
+        Copy the most recent frames without waiting for new data (reader side).
+
+        Args:
+            count: Number of frames to read
+            out: NumPy array of shape (count, channels) to copy into
+
+        Returns:
+            out, or None if no frames arrived since the previous read or
+            fewer than count frames have been written in total
+        """
+        for _ in range(3):
+            end = self._write_pos
+            if end == self._read_pos or end < count:
+                self.underruns += 1
+                return None
+
+            start = end - count
+            offset = start % self.capacity
+            first = min(count, self.capacity - offset)
+            out[:first] = self._buffer[offset : offset + first]
+            out[first:] = self._buffer[: count - first]
+
+            # Retry if the writer lapped the frames while they were copied
+            if self._reserved - start <= self.capacity:
+                self._read_pos = end
+                return out
+
+        self._read_pos = self._write_pos
+        self.underruns += 1
+        return None
+
+    def read_available(self, out):
+        """
+        Copy every frame written since the previous read (reader side).
+
+        Frames the writer already overwrote are skipped, as are the oldest
+        frames when out is too small to hold all of them.
+
+        Args:
+            out: NumPy array of shape (max_frames, channels) to copy into
+
+        Returns:
+            View of out holding the new frames, possibly empty
+        """
+        for _ in range(3):
+            end = self._write_pos
+            start = max(self._read_pos, end - self.capacity, end - len(out))
+            count = end - start
+
+            offset = start % self.capacity
+            first = min(count, self.capacity - offset)
+            out[:first] = self._buffer[offset : offset + first]
+            out[first:count] = self._buffer[: count - first]
+
+            if self._reserved - start <= self.capacity:
+                self._read_pos = end
+                if count == 0:
+                    self.underruns += 1
+                return out[:count]
+
+        self._read_pos = self._write_pos
+        self.underruns += 1
+        return out[:0]
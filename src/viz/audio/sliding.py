@@ -0,0 +1,124 @@
+"""
+Sliding-window analysis with a hop size independent of the FFT length.
+"""
+import numpy as np
+from .analyzer import AudioAnalyzer
+from ..utils import config
+
+
+class SlidingAnalyzer:
+    """
+    Emits spectra of overlapping CHUNK_SIZE windows at a fixed hop.
+
+    Incoming audio of any block size is appended to a rolling sample buffer.
+    Every window that became complete since the previous push is analyzed,
+    all of them with one batched FFT, so a short hop gives fast spectrum
+    updates while the long window keeps the frequency resolution.
+    """
+
+    def __init__(self, analyzer=None, hop=None):
+        """
+        Initialize the sliding analyzer.
+
+        Args:
+            analyzer: AudioAnalyzer to use (default: a new one)
+            hop: Samples between window ends, or "frame" to emit the latest
+                window once per push (default: config.ANALYSIS_HOP)
+        """
+        self.analyzer = analyzer or AudioAnalyzer()
+        self.hop = hop if hop is not None else config.ANALYSIS_HOP
+        self.window_size = config.CHUNK_SIZE
+
+        step = self.window_size if self.hop == "frame" else self.hop
+        self._buffer = np.zeros(4 * self.window_size + step, dtype=np.float32)
+        self._fill = 0  # samples currently held in the buffer
+        self._total = 0  # samples pushed since creation
+        self._next_end = self.window_size  # end of the next window to emit
+        self.skipped = 0  # windows dropped because their samples were lost
+
+        if self.hop != "frame":
+            # Batches are smoothed with SciPy; load it now rather than on the
+            # first batch, where it would stall the stream for over a second
+            from scipy import signal  # noqa: F401
+
+    def push(self, audio_data):
+        """
+        Add audio and return the spectra of all newly completed windows.
+
+        Args:
+            audio_data: NumPy array of samples, mono or (frames, channels)
+
+        Returns:
+            NumPy array of shape (num_spectra, NUM_FREQUENCY_BANDS)
+        """
+        if audio_data is not None and len(audio_data) > 0:
+            if audio_data.ndim > 1:
+                audio_data = np.mean(audio_data, axis=1)
+            self._append(audio_data)
+
+        ends = self._window_ends()
+        if len(ends) == 0:
+            return np.zeros((0, config.NUM_FREQUENCY_BANDS))
+
+        first = ends[0] - self.window_size - (self._total - self._fill)
+        if len(ends) == 1:
+            window = self._buffer[first : first + self.window_size]
+            return self.analyzer.analyze(window)[np.newaxis]
+
+        hop = ends[1] - ends[0]
+        span = self._buffer[first : first + (len(ends) - 1) * hop + self.window_size]
+        frames = np.lib.stride_tricks.sliding_window_view(span, self.window_size)
+        return self.analyzer.analyze_batch(frames[::hop])
+
+    def _append(self, samples):
+        """
+        Append samples to the rolling buffer, discarding unneeded history.
+
+        Args:
+            samples: 1-D NumPy array of samples
+        """
+        size = len(self._buffer)
+        if len(samples) > size:
+            self._total += len(samples) - size
+            self._fill = 0
+            samples = samples[-size:]
+
+        count = len(samples)
+        if self._fill + count > size:
+            # Keep only what the next window still needs, as far as it fits
+            needed = self._total - (self._next_end - self.window_size)
+            keep = max(0, min(self._fill, needed, size - count))
+            self._buffer[:keep] = self._buffer[self._fill - keep : self._fill]
+            self._fill = keep
+
+        self._buffer[self._fill : self._fill + count] = samples
+        self._fill += count
+        self._total += count
+
+    def _window_ends(self):
+        """
+        Return the end positions of all windows ready for analysis.
+
+        Returns:
+            NumPy array of absolute sample positions
+        """
+        earliest = self._total - self._fill + self.window_size
+
+        if self.hop == "frame":
+            if self._fill < self.window_size or self._total < self._next_end:
+                return np.zeros(0, dtype=np.int64)
+            self._next_end = self._total + 1
+            return np.array([self._total])
+
+        if self._next_end < earliest:
+            missed = -(-(earliest - self._next_end) // self.hop)
+            self._next_end += missed * self.hop
+            self.skipped += missed
+
+        if self._next_end > self._total:
+            return np.zeros(0, dtype=np.int64)
+
+        count = (self._total - self._next_end) // self.hop + 1
+        ends = self._next_end + self.hop * np.arange(count)
+        self._next_end += count * self.hop
+        return ends
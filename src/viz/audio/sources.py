@@ -0,0 +1,434 @@
+"""
+Generated and file audio sources with the same reading interface as capture.
+"""
+import time
+import numpy as np
+from .files import AudioFileReader
+from ..utils import config
+
+TWO_PI = 2 * np.pi
+
+# Pinking filter (-3 dB/octave) for white noise, by Julius O. Smith
+_PINK_B = [0.049922035, -0.095993537, 0.050612699, -0.004408786]
+_PINK_A = [1, -2.494956002, 2.017265875, -0.522189400]
+_PINK_GAIN = 11.6  # brings the filtered noise to roughly unit RMS
+
+
+def _channel_generators(seed, channels):
+    """
+    Create one random generator per channel.
+
+    Separate streams make the output independent of the block sizes it is
+    read in.
+    """
+    return [np.random.default_rng([seed, channel]) for channel in range(channels)]
+
+
+class SignalSource:
+    """
+    Base class of generated and file audio sources.
+
+    Sources read like AudioCapture (start, read_chunk, read_available, stop,
+    close), so the visualizer can use either. By default they are paced at
+    their sample rate like a live stream; read() produces the next block
+    immediately, which runs far faster than real time. Generators write into
+    preallocated buffers and keep their phase between blocks.
+    """
+
+    def __init__(self, sample_rate=None, channels=None, realtime=True):
+        """
+        Initialize the source.
+
+        Args:
+            sample_rate: Sample rate in Hz (default: config.SAMPLE_RATE)
+            channels: Number of output channels (default: config.CHANNELS)
+            realtime: Pace read_chunk() and read_available() at the sample
+                rate; otherwise every call returns a new block
+        """
+        self.sample_rate = sample_rate or config.SAMPLE_RATE
+        self.channels = channels or config.CHANNELS
+        self.realtime = realtime
+        self.max_frames = max(config.CAPTURE_BUFFER_SIZE, config.CHUNK_SIZE)
+        self.position = 0  # frames generated since creation
+        self._started = None
+
+        self._out = np.zeros((self.max_frames, self.channels), dtype=np.float32)
+        self._chunk = np.zeros((config.CHUNK_SIZE, self.channels), dtype=np.float32)
+        self._ramp = np.arange(self.max_frames, dtype=np.float64)
+        self._mono = np.zeros(self.max_frames)
+        self._work = np.zeros(self.max_frames)
+
+    def generate(self, out):
+        """
+        Fill out with the next frames (implemented by subclasses).
+
+        Args:
+            out: float32 array of shape (num_frames, channels)
+
+        Returns:
+            Number of frames written, less than requested only at the end
+            of a finite source
+        """
+        raise NotImplementedError
+
+    def read(self, num_frames):
+        """
+        Produce the next frames without pacing.
+
+        Args:
+            num_frames: Number of frames, at most max_frames
+
+        Returns:
+            View of an internal float32 buffer of shape (frames, channels),
+            overwritten by the next read
+        """
+        out = self._out[: min(num_frames, self.max_frames)]
+        count = self.generate(out)
+        self.position += count
+        return out[:count]
+
+    def start(self):
+        """Start the stream clock."""
+        self._started = time.perf_counter() - self.position / self.sample_rate
+
+    def _due(self, default):
+        """Return how many frames the stream owes, dropping any backlog."""
+        if not self.realtime:
+            return default
+
+        elapsed = time.perf_counter() - self._started
+        due = int(elapsed * self.sample_rate) - self.position
+        if due > self.max_frames:
+            # Fell behind: skip ahead like an overrunning capture buffer
+            self.position += due - self.max_frames
+            due = self.max_frames
+        return max(due, 0)
+
+    def read_chunk(self):
+        """
+        Return the latest CHUNK_SIZE frames.
+
+        Returns:
+            NumPy array of shape (CHUNK_SIZE, channels), or None if no new
+            frames are due or the source is not started
+        """
+        if self._started is None:
+            return None
+
+        due = self._due(config.CHUNK_SIZE)
+        if due == 0:
+            return None
+        block = self.read(due)
+        if len(block) == 0:
+            return None
+
+        # Slide the new frames into the chunk window
+        count = min(len(block), config.CHUNK_SIZE)
+        keep = config.CHUNK_SIZE - count
+        self._chunk[:keep] = self._chunk[count:]
+        self._chunk[keep:] = block[-count:]
+        return self._chunk
+
+    def read_available(self):
+        """
+        Return all frames due since the previous call.
+
+        Returns:
+            NumPy array of shape (num_frames, channels), or None if the
+            source is not started
+        """
+        if self._started is None:
+            return None
+        return self.read(self._due(config.CAPTURE_BLOCK_SIZE))
+
+    def stop(self):
+        """Stop the stream clock."""
+        self._started = None
+
+    def close(self):
+        """Release the source."""
+        self.stop()
+
+    def _add_tone(self, mono, phase, frequency, amplitude):
+        """
+        Add a sine tone to a buffer with a phase accumulator.
+
+        Args:
+            mono: float64 buffer to add to
+            phase: Phase of the first sample in radians
+            frequency: Frequency in Hz
+            amplitude: Peak amplitude
+
+        Returns:
+            Phase of the sample after the buffer
+        """
+        count = len(mono)
+        step = TWO_PI * frequency / self.sample_rate
+        work = self._work[:count]
+        np.multiply(self._ramp[:count], step, out=work)
+        np.add(work, phase, out=work)
+        np.sin(work, out=work)
+        np.multiply(work, amplitude, out=work)
+        np.add(mono, work, out=mono)
+        return (phase + step * count) % TWO_PI
+
+
+class DemoSource(SignalSource):
+    """
+    Three drifting tones plus noise, different on every channel.
+
+    The tone frequencies drift once per block, so the output depends on
+    the block sizes it is read in; phases stay continuous.
+    """
+
+    def __init__(self, seed=0, **kwargs):
+        """
+        Initialize the demo synth.
+
+        Args:
+            seed: Seed of the noise generator
+            **kwargs: SignalSource arguments
+        """
+        super().__init__(**kwargs)
+        self._rngs = _channel_generators(seed, self.channels)
+        self._noise = np.zeros(self.max_frames, dtype=np.float32)
+        self._phases = np.zeros((self.channels, 3))
+        self._lfo = 0.0
+        # Drift speed of the classic demo: 0.05 rad per 2048-sample chunk
+        self._lfo_rate = 0.05 * 44100 / 2048
+
+    def generate(self, out):
+        count = len(out)
+        mono = self._mono[:count]
+        noise = self._noise[:count]
+        for channel in range(self.channels):
+            lfo = self._lfo + 1.3 * channel
+            tones = (
+                (200 + 100 * np.sin(lfo), 0.3),
+                (800 + 400 * np.sin(lfo * 0.7), 0.2),
+                (3000 + 1000 * np.sin(lfo * 0.5), 0.15),
+            )
+            mono[:] = 0
+            for index, (frequency, amplitude) in enumerate(tones):
+                self._phases[channel, index] = self._add_tone(
+                    mono, self._phases[channel, index], frequency, amplitude
+                )
+            self._rngs[channel].standard_normal(out=noise, dtype=np.float32)
+            np.multiply(noise, np.float32(0.05), out=noise)
+            out[:, channel] = mono
+            np.add(out[:, channel], noise, out=out[:, channel])
+
+        self._lfo += self._lfo_rate * count / self.sample_rate
+        return count
+
+
+class LogSweepSource(SignalSource):
+    """Repeating logarithmic sine sweep."""
+
+    def __init__(
+        self, start=20.0, stop=20000.0, duration=10.0, amplitude=0.5, **kwargs
+    ):
+        """
+        Initialize the sweep.
+
+        Args:
+            start: Start frequency in Hz
+            stop: End frequency in Hz, capped below Nyquist
+            duration: Seconds per sweep
+            amplitude: Peak amplitude
+            **kwargs: SignalSource arguments
+        """
+        super().__init__(**kwargs)
+        stop = min(stop, 0.49 * self.sample_rate)
+        self.start_frequency = start
+        self.amplitude = amplitude
+        self._period = max(1, round(duration * self.sample_rate))
+        self._growth = np.log(stop / start) / self._period
+        self._phase = 0.0
+
+    def generate(self, out):
+        count = len(out)
+        work = self._work[:count]
+
+        # Per-sample phase increment from the instantaneous frequency
+        np.add(self._ramp[:count], self.position % self._period, out=work)
+        np.remainder(work, self._period, out=work)
+        np.multiply(work, self._growth, out=work)
+        np.exp(work, out=work)
+        np.multiply(work, TWO_PI * self.start_frequency / self.sample_rate, out=work)
+
+        np.cumsum(work, out=work)
+        np.add(work, self._phase, out=work)
+        self._phase = work[-1] % TWO_PI
+        np.sin(work, out=work)
+        np.multiply(work, self.amplitude, out=work)
+        out[:] = work[:, np.newaxis]
+        return count
+
+
+class PinkNoiseSource(SignalSource):
+    """Pink (-3 dB/octave) noise from filtered white noise."""
+
+    def __init__(self, amplitude=0.2, seed=0, **kwargs):
+        """
+        Initialize the noise generator.
+
+        Args:
+            amplitude: Approximate RMS level
+            seed: Seed of the noise generator
+            **kwargs: SignalSource arguments
+        """
+        super().__init__(**kwargs)
+        self.amplitude = amplitude
+        self._rngs = _channel_generators(seed, self.channels)
+        self._state = np.zeros((self.channels, len(_PINK_A) - 1))
+        # Imported here so that starting the app does not load SciPy
+        from scipy import signal
+
+        self._lfilter = signal.lfilter
+
+    def generate(self, out):
+        count = len(out)
+        white = self._work[:count]
+        for channel in range(self.channels):
+            self._rngs[channel].standard_normal(out=white)
+            # lfilter returns a new array; the filter state carries over
+            pink, self._state[channel] = self._lfilter(
+                _PINK_B, _PINK_A, white, zi=self._state[channel]
+            )
+            out[:, channel] = pink
+        np.multiply(out, np.float32(self.amplitude * _PINK_GAIN), out=out)
+        return count
+
+
+class ImpulseSource(SignalSource):
+    """Single-sample clicks at a fixed interval."""
+
+    def __init__(self, interval=0.5, amplitude=1.0, **kwargs):
+        """
+        Initialize the impulse train.
+
+        Args:
+            interval: Seconds between impulses
+            amplitude: Impulse height
+            **kwargs: SignalSource arguments
+        """
+        super().__init__(**kwargs)
+        self.amplitude = amplitude
+        self._period = max(1, round(interval * self.sample_rate))
+
+    def generate(self, out):
+        out[:] = 0
+        first = -self.position % self._period
+        out[first :: self._period] = self.amplitude
+        return len(out)
+
+
+class MultitoneSource(SignalSource):
+    """Sum of steady sine tones of equal amplitude."""
+
+    def __init__(self, frequencies=(100, 1000, 5000, 10000), amplitude=0.8, **kwargs):
+        """
+        Initialize the multitone.
+
+        Args:
+            frequencies: Tone frequencies in Hz
+            amplitude: Peak amplitude of the sum
+            **kwargs: SignalSource arguments
+        """
+        super().__init__(**kwargs)
+        self.frequencies = tuple(frequencies)
+        self.amplitude = amplitude / max(len(self.frequencies), 1)
+        self._phases = np.zeros(len(self.frequencies))
+
+    def generate(self, out):
+        mono = self._mono[: len(out)]
+        mono[:] = 0
+        for index, frequency in enumerate(self.frequencies):
+            self._phases[index] = self._add_tone(
+                mono, self._phases[index], frequency, self.amplitude
+            )
+        out[:] = mono[:, np.newaxis]
+        return len(out)
+
+
+class FileSource(SignalSource):
+    """Plays a WAV or raw PCM file, optionally looping."""
+
+    def __init__(self, path, loop=True, **kwargs):
+        """
+        Open the file.
+
+        Args:
+            path: Audio file path
+            loop: Start over at the end of the file instead of stopping
+            **kwargs: SignalSource arguments (sample_rate defaults to the
+                file's) plus AudioFileReader's raw_format
+        """
+        raw_format = kwargs.pop("raw_format", None)
+        reader_args = {}
+        if raw_format is not None:
+            reader_args = {
+                "raw_format": raw_format,
+                "sample_rate": kwargs.get("sample_rate") or config.SAMPLE_RATE,
+                "channels": kwargs.get("channels") or config.CHANNELS,
+            }
+        self.reader = AudioFileReader(path, **reader_args)
+        kwargs["sample_rate"] = self.reader.sample_rate
+        super().__init__(**kwargs)
+        self.loop = loop and self.reader.frames > 0
+        # File channel feeding each output channel
+        self._channel_map = np.arange(self.channels) % self.reader.channels
+
+    def generate(self, out):
+        count = 0
+        while count < len(out):
+            block = self.reader.read(len(out) - count)
+            if len(block) == 0:
+                if not self.loop:
+                    break
+                self.reader.rewind()
+                continue
+            np.take(
+                block, self._channel_map, axis=1, out=out[count : count + len(block)]
+            )
+            count += len(block)
+        return count
+
+    def close(self):
+        """Close the file."""
+        super().close()
+        self.reader.close()
+
+
+# Generated sources by config.AUDIO_SOURCE name
+SOURCES = {
+    "demo": DemoSource,
+    "sweep": LogSweepSource,
+    "pink": PinkNoiseSource,
+    "impulses": ImpulseSource,
+    "multitone": MultitoneSource,
+}
+
+
+def create_source(name, **kwargs):
+    """
+    Create a generated or file source by name.
+
+    Args:
+        name: "file" (reads config.AUDIO_FILE) or a key of SOURCES
+        **kwargs: Arguments for the source class
+
+    Returns:
+        SignalSource instance
+
+    Raises:
+        ValueError: If the name is unknown or no file is configured
+    """
+    if name == "file":
+        if not config.AUDIO_FILE:
+            raise ValueError("AUDIO_SOURCE is 'file' but AUDIO_FILE is not set")
+        return FileSource(config.AUDIO_FILE, **kwargs)
+    if name not in SOURCES:
+        raise ValueError(f"Unknown audio source: {name}")
+    return SOURCES[name](**kwargs)
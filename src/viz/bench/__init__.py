@@ -0,0 +1,3 @@
+"""Benchmarks for the analysis, projection and rendering hot paths."""
+
+__all__ = ["runner", "cli"]
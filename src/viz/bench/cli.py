@@ -0,0 +1,194 @@
+"""
+Command line interface for the benchmark suite (viz-bench).
+"""
+import argparse
+import json
+import sys
+
+from ..audio.sources import SOURCES
+from .runner import metadata, run_suite
+
+
+def int_list(text):
+    """Parse a comma-separated list of integers."""
+    return [int(item) for item in text.split(",") if item]
+
+
+def size_list(text):
+    """Parse a comma-separated list of WIDTHxHEIGHT sizes."""
+    sizes = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="viz-bench",
+        description="Benchmark the Viz analysis, projection and rendering paths.",
+    )
+    parser.add_argument("--bands", type=int_list, default=[64, 256, 1024])
+    parser.add_argument("--chunks", type=int_list, default=[1024, 2048, 4096])
+    parser.add_argument("--histories", type=int_list, default=[80, 400])
+    parser.add_argument(
+        "--sizes", type=size_list, default=[(1280, 720)], help="e.g. 1280x720,3840x2160"
+    )
+    parser.add_argument(
+        "--backends",
+        type=lambda text: text.split(","),
+        default=["lines", "scrolling", "raster"],
+    )
+    parser.add_argument(
+        "--raster-styles",
+        type=lambda text: text.split(","),
+        default=["lines", "filled"],
+        help="RASTER_STYLE values timed for the raster backend",
+    )
+    parser.add_argument(
+        "--presents",
+        type=lambda text: text.split(","),
+        default=["flip", "dirty"],
+        help='"flip" presents whole frames, "dirty" only the changed regions',
+    )
+    parser.add_argument(
+        "--sources",
+        type=lambda text: text.split(","),
+        default=list(SOURCES),
+        help="synthetic audio sources to time",
+    )
+    parser.add_argument("--rates", type=int_list, default=[48000, 96000, 192000])
+    parser.add_argument(
+        "--transports",
+        type=lambda text: text.split(","),
+        default=["udp", "unix"],
+        help="spectrum publishing transports to time",
+    )
+    parser.add_argument(
+        "--batches",
+        type=int_list,
+        default=[1, 8],
+        help="spectra per published datagram",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--render-iterations", type=int, default=30)
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="runs per case; the fastest run's p50 is reported (default 3)",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="small sweep for a fast sanity check",
+    )
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative p50 slowdown reported as a regression (default 0.10)",
+    )
+    parser.add_argument(
+        "--min-change-ms",
+        type=float,
+        default=0.05,
+        help="smallest absolute p50 slowdown flagged, in ms (default 0.05)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.bands = args.bands[:1]
+        args.chunks = args.chunks[1:2] or args.chunks[:1]
+        args.histories = args.histories[:1]
+        args.rates = args.rates[:1]
+        args.batches = args.batches[:1]
+        args.iterations = min(args.iterations, 50)
+        args.render_iterations = min(args.render_iterations, 10)
+    return args
+
+
+def run_noise(result):
+    """
+    Return the relative spread of a case's p50 over its runs.
+
+    Args:
+        result: Case result, with p50_runs_ms if it was run more than once
+
+    Returns:
+        (slowest - fastest) / fastest run p50, 0.0 for a single run
+    """
+    runs = result.get("p50_runs_ms") or [result["p50_ms"]]
+    fastest = min(runs)
+    return (max(runs) - fastest) / fastest if fastest > 0 else 0.0
+
+
+def compare(results, baseline, threshold, min_change_ms=0.0):
+    """
+    Compare results against a baseline and print the differences.
+
+    A case regresses when its p50 is slower by more than the threshold, by
+    more than the run-to-run noise of both runs added together, and by at
+    least min_change_ms. Either run's fastest p50 can be off by its own
+    spread, so cases that vary a lot need a larger slowdown to be flagged,
+    and microsecond cases are not flagged for timer jitter.
+
+    Args:
+        results: Case results of this run
+        baseline: Case results of the baseline run
+        threshold: Relative p50 slowdown counted as a regression
+        min_change_ms: Smallest absolute p50 slowdown counted as a regression
+
+    Returns:
+        List of regressed case names
+    """
+    regressions = []
+    print(f"\n{'case':<55} {'base p50':>10} {'p50':>10} {'change':>8} {'noise':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["p50_ms"]
+        current = result["p50_ms"]
+        change = (current - base) / base if base > 0 else 0.0
+        noise = run_noise(baseline[name]) + run_noise(result)
+        marker = ""
+        if change > max(threshold, noise) and current - base >= min_change_ms:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<55} {base:10.3f} {current:10.3f} {change:+8.1%} "
+            f"{noise:7.1%}{marker}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    """Entry point for the benchmark suite."""
+    args = parse_args(argv)
+
+    print("Running Viz benchmarks...\n")
+    results = run_suite(args)
+    report = {"meta": metadata(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_change_ms)
+        if regressions:
+            print(f"\n⚠ {len(regressions)} case(s) slower than the baseline")
+            sys.exit(1)
+        print("\n✓ No regressions")
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Benchmark cases for the analysis, projection and rendering stages.
+"""
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import partial
+
+import numpy as np
+
+# Benchmarks always run headless
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from ..audio.analyzer import AudioAnalyzer
+from ..audio.sources import SOURCES
+from ..graphics.isometric import IsometricProjection
+from ..graphics.renderer import Renderer
+from ..net.publisher import SpectrumPublisher
+from ..net.subscriber import SpectrumSubscriber
+from ..utils import config
+
+
+@contextmanager
+def override(**values):
+    """
+    Temporarily replace config settings.
+
+    Args:
+        **values: Config attribute names and the values to use
+    """
+    saved = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def measure(func, iterations, warmup=5):
+    """
+    Time repeated calls of a function.
+
+    Args:
+        func: Function called with no arguments
+        iterations: Number of timed calls
+        warmup: Number of untimed calls first
+
+    Returns:
+        Dictionary with latency percentiles in milliseconds and calls per
+        second
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - start
+
+    samples *= 1000
+    mean = float(samples.mean())
+    return {
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "mean_ms": mean,
+        "per_second": 1000 / mean if mean > 0 else 0.0,
+        "iterations": iterations,
+    }
+
+
+def peak_allocation(func, calls=10):
+    """
+    Return the largest transient allocation of a warmed-up function.
+
+    Args:
+        func: Function called with no arguments
+        calls: Number of calls to check
+
+    Returns:
+        Peak traced bytes above the level before the call
+    """
+    func()
+    tracemalloc.start()
+    try:
+        worst = 0
+        for _ in range(calls):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            worst = max(worst, peak - before)
+    finally:
+        tracemalloc.stop()
+    return worst
+
+
+def metadata():
+    """Describe the machine and library versions the results came from."""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+    }
+
+
+def synthetic_audio(num_samples, rng):
+    """Return a float32 test signal: three tones plus noise."""
+    t = np.arange(num_samples) / config.SAMPLE_RATE
+    audio = (
+        0.3 * np.sin(2 * np.pi * 220 * t)
+        + 0.2 * np.sin(2 * np.pi * 1760 * t)
+        + 0.1 * np.sin(2 * np.pi * 7040 * t)
+        + 0.05 * rng.standard_normal(num_samples)
+    )
+    return audio.astype(np.float32)
+
+
+def synthetic_spectra(count, num_bands, rng):
+    """Return smooth random spectra in [0, 1] for filling a history."""
+    bands = np.arange(num_bands)
+    phases = rng.uniform(0, 2 * np.pi, size=(count, 1))
+    spectra = 0.5 + 0.4 * np.sin(bands * 8 / num_bands + phases)
+    spectra += 0.1 * rng.random((count, num_bands))
+    return spectra.astype(np.float32)
+
+
+def bench_analysis(chunk_size, num_bands, iterations):
+    """Benchmark AudioAnalyzer.analyze on consecutive synthetic chunks."""
+    rng = np.random.default_rng(0)
+    with override(CHUNK_SIZE=chunk_size, NUM_FREQUENCY_BANDS=num_bands):
+        analyzer = AudioAnalyzer()
+        audio = synthetic_audio(chunk_size * 16, rng)
+        chunks = audio.reshape(16, chunk_size)
+        state = {"i": 0}
+
+        def step():
+            analyzer.analyze(chunks[state["i"] % 16])
+            state["i"] += 1
+
+        result = measure(step, iterations)
+        result["alloc_bytes"] = peak_allocation(step)
+    return result
+
+
+def bench_source(name, sample_rate, iterations):
+    """Benchmark generating one CHUNK_SIZE block of a synthetic source."""
+    source = SOURCES[name](sample_rate=sample_rate, realtime=False)
+    result = measure(lambda: source.read(config.CHUNK_SIZE), iterations)
+    result["realtime_factor"] = result["per_second"] * config.CHUNK_SIZE / sample_rate
+    return result
+
+
+def bench_band_mapping(chunk_size, num_bands, iterations):
+    """Benchmark mapping one FFT magnitude spectrum onto bands."""
+    rng = np.random.default_rng(0)
+    with override(CHUNK_SIZE=chunk_size, NUM_FREQUENCY_BANDS=num_bands):
+        analyzer = AudioAnalyzer(realtime=False)
+        magnitude = np.abs(rng.standard_normal(chunk_size // 2 + 1))
+        return measure(lambda: analyzer._map_to_frequency_bands(magnitude), iterations)
+
+
+def bench_projection(history_length, num_bands, iterations):
+    """Benchmark projecting a full history grid to screen coordinates."""
+    rng = np.random.default_rng(0)
+    projection = IsometricProjection(config.WINDOW_WIDTH, config.WINDOW_HEIGHT)
+    heights = synthetic_spectra(history_length, num_bands, rng) * 100
+    return measure(lambda: projection.project_grid(heights), iterations)
+
+
+def bench_render(
+    backend, size, history_length, num_bands, iterations, dirty=False, style=None
+):
+    """
+    Benchmark adding a spectrum and rendering a frame with a full history.
+
+    With dirty set, frames are damage tracked (DIRTY_RECTS) and present only
+    the changed regions. style selects the RASTER_STYLE of the raster
+    backend.
+    """
+    rng = np.random.default_rng(0)
+    width, height = size
+    with override(
+        RENDER_BACKEND=backend,
+        RASTER_STYLE=style or config.RASTER_STYLE,
+        DIRTY_RECTS=dirty,
+        WINDOW_WIDTH=width,
+        WINDOW_HEIGHT=height,
+        TIME_HISTORY_LENGTH=history_length,
+        NUM_FREQUENCY_BANDS=num_bands,
+        VSYNC=False,
+    ):
+        pygame.init()
+        try:
+            renderer = Renderer()
+            spectra = synthetic_spectra(history_length + 64, num_bands, rng)
+            for spectrum in spectra[:history_length]:
+                renderer.add_spectrum(spectrum)
+            state = {"i": 0}
+
+            def step():
+                renderer.add_spectrum(spectra[state["i"] % len(spectra)])
+                renderer.render()
+                state["i"] += 1
+
+            return measure(step, iterations, warmup=3)
+        finally:
+            pygame.quit()
+
+
+def bench_publish(transport, batch, num_bands, iterations):
+    """
+    Benchmark publishing a batch of spectra to a loopback subscriber.
+
+    Each call publishes and receives one datagram, so the latency is the
+    time from publish() to the decoded spectra on the subscriber side.
+    """
+    rng = np.random.default_rng(0)
+    spectra = synthetic_spectra(batch, num_bands, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        if transport == "unix":
+            address = f"unix://{os.path.join(directory, 'bench.sock')}"
+        else:
+            address = "udp://127.0.0.1:0"
+        subscriber = SpectrumSubscriber(address, timeout=1.0)
+        publisher = SpectrumPublisher([subscriber.address], num_bands, batch=batch)
+        try:
+
+            def step():
+                for spectrum in spectra:
+                    publisher.publish(spectrum)
+                publisher.flush()
+                subscriber.receive()
+
+            result = measure(step, iterations)
+        finally:
+            publisher.close()
+            subscriber.close()
+    result["spectra_per_second"] = result["per_second"] * batch
+    result["lost"] = subscriber.lost
+    return result
+
+
+def run_suite(options, report=print):
+    """
+    Run every benchmark case of the sweep.
+
+    Args:
+        options: Object with bands, chunks, histories, sizes, backends,
+            raster_styles, presents, sources, rates, transports, batches,
+            iterations, render_iterations and repeats attributes
+        report: Function called with a progress line per case
+
+    Returns:
+        Dictionary mapping case names to result dictionaries
+    """
+    cases = []
+
+    def record(name, stage, params, run):
+        cases.append((name, stage, params, run))
+
+    for chunk in options.chunks:
+        for bands in options.bands:
+            params = {"chunk": chunk, "bands": bands}
+            record(
+                f"analysis/chunk={chunk}/bands={bands}",
+                "analysis",
+                params,
+                partial(bench_analysis, chunk, bands, options.iterations),
+            )
+            record(
+                f"band_mapping/chunk={chunk}/bands={bands}",
+                "band_mapping",
+                params,
+                partial(bench_band_mapping, chunk, bands, options.iterations),
+            )
+
+    for name in options.sources:
+        for rate in options.rates:
+            record(
+                f"source/{name}/rate={rate}",
+                "source",
+                {"source": name, "rate": rate},
+                partial(bench_source, name, rate, options.iterations),
+            )
+
+    for transport in options.transports:
+        for batch in options.batches:
+            for bands in options.bands:
+                record(
+                    f"publish/{transport}/batch={batch}/bands={bands}",
+                    "publish",
+                    {"transport": transport, "batch": batch, "bands": bands},
+                    partial(bench_publish, transport, batch, bands, options.iterations),
+                )
+
+    for history in options.histories:
+        for bands in options.bands:
+            record(
+                f"projection/history={history}/bands={bands}",
+                "projection",
+                {"history": history, "bands": bands},
+                partial(bench_projection, history, bands, options.iterations),
+            )
+
+    # The raster backend is timed once per style, named like "raster-filled"
+    variants = []
+    for backend in options.backends:
+        if backend == "raster":
+            variants.extend(
+                (f"{backend}-{style}", backend, style)
+                for style in options.raster_styles
+            )
+        else:
+            variants.append((backend, backend, None))
+
+    for label, backend, style in variants:
+        for width, height in options.sizes:
+            for history in options.histories:
+                for bands in options.bands:
+                    for present in options.presents:
+                        params = {
+                            "backend": backend,
+                            "style": style,
+                            "size": f"{width}x{height}",
+                            "history": history,
+                            "bands": bands,
+                            "present": present,
+                        }
+                        # Full flips keep the case names of earlier runs
+                        suffix = "" if present == "flip" else f"/{present}"
+                        record(
+                            f"render/{label}/{width}x{height}/history={history}"
+                            f"/bands={bands}{suffix}",
+                            "render",
+                            params,
+                            partial(
+                                bench_render,
+                                backend,
+                                (width, height),
+                                history,
+                                bands,
+                                options.render_iterations,
+                                dirty=present == "dirty",
+                                style=style,
+                            ),
+                        )
+
+    # The sweep runs several times over and every case keeps its fastest
+    # run. Repeating the whole sweep rather than each case back to back
+    # spreads slow load changes on the machine over the runs of every case,
+    # so they show up in the run-to-run spread that --compare allows for
+    runs = {name: [] for name, _, _, _ in cases}
+    for _ in range(options.repeats):
+        for name, _, _, run in cases:
+            runs[name].append(run())
+
+    results = {}
+    for name, stage, params, _ in cases:
+        result = dict(
+            min(runs[name], key=lambda run_result: run_result["p50_ms"]),
+            stage=stage,
+            params=params,
+            p50_runs_ms=[run_result["p50_ms"] for run_result in runs[name]],
+        )
+        results[name] = result
+        report(
+            f"{name:<55} p50 {result['p50_ms']:8.3f} ms  "
+            f"p99 {result['p99_ms']:8.3f} ms  {result['per_second']:9.1f}/s"
+        )
+    return results
@@ -1,3 +1,3 @@
 """Graphics rendering modules."""
 
-__all__ = ["renderer", "isometric"]
+__all__ = ["renderer", "isometric", "history", "layers", "raster", "quality"]
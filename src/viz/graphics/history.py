@@ -0,0 +1,277 @@
+"""
+Spectrum history ring buffer and pyramid for the waterfall display.
+"""
+import numpy as np
+from ..utils import config
+
+# Time and band pooling of the history pyramid: name -> (reduce, averages)
+POOLING = {"max": (np.maximum, False), "mean": (np.add, True)}
+
+
+def create_history(length, num_bands):
+    """
+    Create the display history configured by HISTORY_LEVELS.
+
+    Args:
+        length: Number of time slices drawn
+        num_bands: Number of frequency bands per slice
+
+    Returns:
+        SpectrumHistory, or HistoryPyramid for more than one level
+    """
+    if config.HISTORY_LEVELS > 1:
+        return HistoryPyramid(
+            length,
+            num_bands,
+            levels=config.HISTORY_LEVELS,
+            decimation=config.HISTORY_DECIMATION,
+            pooling=config.HISTORY_POOLING,
+            merge_bands=config.HISTORY_MERGE_BANDS,
+        )
+    return SpectrumHistory(length, num_bands)
+
+
+class SpectrumHistory:
+    """Fixed-size history of spectra stored in one contiguous array."""
+
+    # Every append moves each row one slice further back
+    scrolls = True
+
+    def __init__(self, length, num_bands):
+        """
+        Initialize the history buffer.
+
+        Rows are written one after another into a buffer twice the history
+        length. When the write head reaches the end, the newest rows are
+        moved back to the start, so the ordered history is always a single
+        contiguous slice and appends stay O(1) amortized.
+
+        Args:
+            length: Maximum number of time slices kept
+            num_bands: Number of frequency bands per slice
+        """
+        self.length = length
+        self.num_bands = num_bands
+        self._buffer = np.zeros((2 * length, num_bands), dtype=np.float32)
+        self.head = 0  # index one past the newest row
+        self.count = 0
+        self.total = 0  # spectra appended since creation
+
+    @property
+    def span(self):
+        """Number of spectra the full history covers."""
+        return self.length
+
+    def append(self, spectrum):
+        """
+        Write a spectrum into the next row of the buffer.
+
+        Args:
+            spectrum: NumPy array of frequency band amplitudes
+        """
+        if self.head == len(self._buffer):
+            keep = self.length - 1
+            self._buffer[:keep] = self._buffer[self.head - keep : self.head]
+            self.head = keep
+
+        self._buffer[self.head] = spectrum
+        self.head += 1
+        self.total += 1
+        if self.count < self.length:
+            self.count += 1
+
+    def view(self):
+        """
+        Return the history ordered from oldest to newest.
+
+        Returns:
+            Read-only NumPy view of shape (len(self), num_bands); it is only
+            valid until the next append
+        """
+        view = self._buffer[self.head - self.count : self.head]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """Drop all stored spectra."""
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.view()[index]
+
+
+class HistoryPyramid:
+    """
+    History that keeps recent spectra at full resolution and older ones coarser.
+
+    The slices are split into levels like the levels of a mipmap. Level 0
+    holds the newest spectra, one per slice. Every decimation slices that
+    age out of a level are pooled into one slice of the next level, so a
+    slice of level k covers decimation**k spectra. The oldest slices of
+    the last level are dropped. With merge_bands, every level also pools
+    pairs of bands of the level before it.
+
+    Each level has a fixed number of slices, so memory and drawing cost
+    depend on the slice count only, while the time covered grows
+    geometrically with the number of levels. view() returns the levels
+    stacked oldest first, at full band resolution, so the back of the
+    waterfall shows the coarsest level.
+    """
+
+    # Coarse slices move back only when a pooled slice is complete
+    scrolls = False
+
+    def __init__(
+        self,
+        length,
+        num_bands,
+        levels=4,
+        decimation=2,
+        pooling="max",
+        merge_bands=False,
+    ):
+        """
+        Initialize the levels.
+
+        Args:
+            length: Number of time slices over all levels; level 0 gets the
+                slices left over by an uneven split
+            num_bands: Number of frequency bands per slice
+            levels: Number of levels
+            decimation: Slices of a level pooled into one of the next level
+            pooling: "max" keeps peaks, "mean" averages
+            merge_bands: Halve the bands from one level to the next
+
+        Raises:
+            ValueError: If the pooling is unknown or a level gets no slices
+        """
+        if pooling not in POOLING:
+            raise ValueError(f"Unknown history pooling: {pooling}")
+        if length < levels or decimation < 2:
+            raise ValueError(
+                f"Cannot split {length} slices into {levels} levels "
+                f"decimated by {decimation}"
+            )
+        self.length = length
+        self.num_bands = num_bands
+        self.decimation = decimation
+        self.total = 0  # spectra appended since creation
+        self._reduce, self._averages = POOLING[pooling]
+
+        rows = [length // levels] * levels
+        rows[0] += length % levels
+        self.levels = []
+        self._starts = []  # band group starts for pooling into each level
+        self._sizes = []  # bands pooled into each band of each level
+        self._expand = []  # band of the level shown by every full band
+        sizes = np.ones(num_bands, dtype=np.intp)
+        for level in range(levels):
+            if merge_bands and level > 0 and len(sizes) > 1:
+                starts = np.arange(0, len(sizes), 2)
+                sizes = np.add.reduceat(sizes, starts)
+            else:
+                starts = np.arange(len(sizes))
+            self._starts.append(starts)
+            self._sizes.append(sizes.astype(np.float32))
+            self._expand.append(np.repeat(np.arange(len(sizes)), sizes))
+            self.levels.append(SpectrumHistory(rows[level], len(sizes)))
+
+        # Slices aging out of each level, pooled until decimation are in
+        self._pending = [np.zeros(level.num_bands) for level in self.levels]
+        self._pending_count = [0] * levels
+        self._view = np.zeros((length, num_bands), dtype=np.float32)
+
+    @property
+    def count(self):
+        """Number of slices held over all levels."""
+        return sum(len(level) for level in self.levels)
+
+    @property
+    def span(self):
+        """Number of spectra the full history covers."""
+        return sum(
+            level.length * self.decimation**index
+            for index, level in enumerate(self.levels)
+        )
+
+    def append(self, spectrum):
+        """
+        Add a spectrum to level 0 and pool what ages out into coarser levels.
+
+        Args:
+            spectrum: NumPy array of frequency band amplitudes
+        """
+        self.total += 1
+        self._push(0, np.asarray(spectrum, dtype=np.float32))
+
+    def _push(self, index, row):
+        """Append a slice to a level, passing its oldest slice on if full."""
+        level = self.levels[index]
+        aged = None
+        if len(level) == level.length and index + 1 < len(self.levels):
+            aged = level[0].copy()
+        level.append(row)
+        if aged is not None:
+            self._pool(index + 1, aged)
+
+    def _pool(self, index, row):
+        """Pool a slice aging out of the level before into a level."""
+        level = self.levels[index]
+        if len(row) != level.num_bands:
+            # Merge pairs of bands; means are weighted by the bands they cover
+            starts = self._starts[index]
+            if self._averages:
+                row = np.add.reduceat(row * self._sizes[index - 1], starts)
+                row /= self._sizes[index]
+            else:
+                row = np.maximum.reduceat(row, starts)
+
+        pending = self._pending[index]
+        if self._pending_count[index] == 0:
+            pending[:] = row
+        else:
+            self._reduce(pending, row, out=pending)
+        self._pending_count[index] += 1
+        if self._pending_count[index] == self.decimation:
+            self._pending_count[index] = 0
+            if self._averages:
+                pending /= self.decimation
+            self._push(index, pending)
+
+    def view(self):
+        """
+        Return the history ordered from oldest to newest.
+
+        Returns:
+            Read-only NumPy array of shape (len(self), num_bands), coarsest
+            level first; it is only valid until the next append
+        """
+        count = self.count
+        view = self._view[:count]
+        position = 0
+        for index in reversed(range(len(self.levels))):
+            rows = self.levels[index].view()
+            stop = position + len(rows)
+            if self.levels[index].num_bands == self.num_bands:
+                view[position:stop] = rows
+            else:
+                np.take(rows, self._expand[index], axis=1, out=view[position:stop])
+            position = stop
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """Drop all stored spectra."""
+        for level in self.levels:
+            level.clear()
+        self._pending_count = [0] * len(self.levels)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.view()[index]
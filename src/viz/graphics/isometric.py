@@ -8,24 +8,33 @@ from ..utils import config
 class IsometricProjection:
     """Handles 3D to 2D isometric projection."""
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, center=None, scale=1.0):
         """
         Initialize the isometric projection.
 
         Args:
             width: Screen width in pixels
             height: Screen height in pixels
+            center: Screen position (x, y) of the origin (default: the
+                screen center)
+            scale: Factor applied to SCALE_X, SCALE_Y and SCALE_Z
         """
         self.width = width
         self.height = height
-        self.center_x = width // 2
-        self.center_y = height // 2
+        if center is None:
+            center = (width // 2, height // 2)
+        self.center_x, self.center_y = center
+        self.scale = scale
 
         # Pre-calculate rotation matrices
         angle_rad = np.radians(config.ISO_ANGLE)
         self.cos_angle = np.cos(angle_rad)
         self.sin_angle = np.sin(angle_rad)
 
+        # Screen-space base grid for (time slice, band), built on demand
+        self._grid_x = np.zeros((0, 0), dtype=int)
+        self._grid_y = np.zeros((0, 0))
+
     def project(self, x, y, z):
         """
         Project a 3D point to 2D screen coordinates.
@@ -44,9 +53,9 @@ class IsometricProjection:
             Tuple of (screen_x, screen_y)
         """
         # Scale the coordinates
-        scaled_x = x * config.SCALE_X
-        scaled_y = y * config.SCALE_Y
-        scaled_z = z * config.SCALE_Z
+        scaled_x = x * config.SCALE_X * self.scale
+        scaled_y = y * config.SCALE_Y * self.scale
+        scaled_z = z * config.SCALE_Z * self.scale
 
         # Isometric projection formula
         screen_x = (scaled_x - scaled_z) * self.cos_angle
@@ -72,8 +81,8 @@ class IsometricProjection:
             return np.array([])
 
         # Scale
-        scaled = points * np.array(
-            [config.SCALE_X, config.SCALE_Y, config.SCALE_Z]
+        scaled = points * (
+            np.array([config.SCALE_X, config.SCALE_Y, config.SCALE_Z]) * self.scale
         )
 
         # Project
@@ -85,3 +94,79 @@ class IsometricProjection:
         screen_y = self.center_y - screen_y
 
         return np.column_stack([screen_x, screen_y]).astype(int)
+
+    def _base_grid(self, num_slices, num_bands):
+        """
+        Return the amplitude-independent part of the projection.
+
+        The x/z contribution of every grid point never changes, so it is
+        computed once for the largest grid requested and sliced after that.
+
+        Args:
+            num_slices: Number of time slices
+            num_bands: Number of frequency bands
+
+        Returns:
+            Tuple of (screen_x, depth_y) arrays of shape (num_slices, num_bands)
+        """
+        rows, cols = self._grid_x.shape
+        if rows < num_slices or cols != num_bands:
+            scaled_x = np.arange(num_bands) * (config.SCALE_X * self.scale)
+            scaled_z = np.arange(num_slices)[:, np.newaxis] * (
+                config.SCALE_Z * self.scale
+            )
+
+            screen_x = (scaled_x - scaled_z) * self.cos_angle
+            screen_x += self.center_x
+            self._grid_x = screen_x.astype(int)
+            self._grid_y = (scaled_x + scaled_z) * self.sin_angle
+
+        return self._grid_x[:num_slices], self._grid_y[:num_slices]
+
+    def project_grid(self, heights, first_slice=0):
+        """
+        Project a whole (time slice, band) grid to 2D screen coordinates.
+
+        Point [t, b] of the result equals project(b, heights[t, b],
+        first_slice + t).
+
+        Args:
+            heights: NumPy array of shape (num_slices, num_bands) with the
+                Y coordinate (amplitude) of every grid point
+            first_slice: Z coordinate of the first row of heights
+
+        Returns:
+            NumPy array of shape (num_slices, num_bands, 2) with screen
+            coordinates
+        """
+        num_slices, num_bands = heights.shape
+        grid_x, grid_y = self._base_grid(first_slice + num_slices, num_bands)
+        grid_x = grid_x[first_slice:]
+        grid_y = grid_y[first_slice:]
+
+        screen = np.empty((num_slices, num_bands, 2), dtype=int)
+        screen[..., 0] = grid_x
+        screen[..., 1] = self.center_y - (
+            heights * (config.SCALE_Y * self.scale) - grid_y
+        )
+        return screen
+
+    def grid_bounds(self, num_slices, num_bands, max_height):
+        """
+        Return the screen rectangle covered by a projected grid.
+
+        Args:
+            num_slices: Number of time slices
+            num_bands: Number of frequency bands
+            max_height: Largest Y coordinate (amplitude) of any point
+
+        Returns:
+            Tuple of (left, top, width, height) in screen coordinates
+        """
+        low = self.project_grid(np.zeros((num_slices, num_bands)))
+        high = self.project_grid(np.full((num_slices, num_bands), max_height))
+        left = low[..., 0].min()
+        right = low[..., 0].max()
+        top = min(low[..., 1].min(), high[..., 1].min())
+        bottom = max(low[..., 1].max(), high[..., 1].max())
+        return int(left), int(top), int(right - left + 1), int(bottom - top + 1)
@@ -0,0 +1,257 @@
+"""
+Scrolling layer cache for incremental waterfall rendering.
+"""
+import math
+import numpy as np
+import pygame
+from ..utils import config
+
+# Entries in the 8-bit layer palette; index 0 is the background
+PALETTE_SIZE = 256
+
+
+class ScrollingLayer:
+    """
+    Waterfall layer that rasterizes each time slice once and then scrolls it.
+
+    Moving a slice one step back in time is a constant screen-space offset.
+    The layer is an 8-bit canvas that wraps around at its edges: scrolling
+    only moves the canvas origin, new slices are drawn at the wrapped
+    position and the visible part is blitted in at most four pieces. Pixels
+    store the palette index of the slice group that drew them and the fade
+    is applied by rewriting the palette, so the per-frame cost does not
+    depend on the history length.
+    """
+
+    def __init__(self, projection, length, num_bands, transparent=False):
+        """
+        Initialize the layer.
+
+        Args:
+            projection: IsometricProjection used for the waterfall
+            length: Maximum number of time slices in the history
+            num_bands: Number of frequency bands per slice
+            transparent: Blit the background as transparent, for layers
+                that overlap other drawings (slower to blit)
+        """
+        self.projection = projection
+        self.length = length
+        self.num_bands = num_bands
+
+        # Consecutive slices share a palette index once the history is
+        # longer than the palette; an index is only reused after every slice
+        # that drew with it has left the history.
+        self.group_size = max(1, math.ceil((length - 1) / (PALETTE_SIZE - 2)))
+        self._group_rects = [[] for _ in range(PALETTE_SIZE)]
+
+        # Slices only ever move up and to the right, so anything beyond the
+        # top or right edge of the screen can be dropped from the layer.
+        left, top, width, height = projection.grid_bounds(length, num_bands, 100)
+        margin = config.LINE_THICKNESS
+        right = min(left + width + margin, projection.width)
+        bottom = top + height + margin
+        left -= margin
+        top = max(top - margin, 0)
+        self.origin = np.array([left, top])
+        self.size = (max(right - left, 1), max(bottom - top, 1))
+        self.surface = pygame.Surface(self.size, depth=8)
+        # Screen rectangle the layer is blitted to
+        self.bounds = pygame.Rect(left, top, *self.size).clip(
+            0, 0, projection.width, projection.height
+        )
+        if transparent:
+            self.surface.set_colorkey(0)
+
+        # Part of the layer that lies on screen, in layer coordinates
+        view_left = max(0, -left)
+        view_top = max(0, -top)
+        self._view = (
+            view_left,
+            view_top,
+            max(min(self.size[0], projection.width - left) - view_left, 0),
+            max(min(self.size[1], projection.height - top) - view_top, 0),
+        )
+
+        self._step_x = config.SCALE_Z * projection.scale * projection.cos_angle
+        self._step_y = config.SCALE_Z * projection.scale * projection.sin_angle
+        self._reset()
+
+    def _reset(self):
+        """Clear the layer and forget all drawn slices."""
+        self.surface.fill(0)
+        for rects in self._group_rects:
+            rects.clear()
+        self._count = 0  # slices currently drawn in the layer
+        self._drawn = 0  # history.total at the last update
+        self._shifts = 0
+        self._scroll = (0, 0)  # layer offset of the canvas origin
+
+    def draw(self, screen, history):
+        """
+        Bring the layer up to date with the history and blit it.
+
+        Args:
+            screen: Target pygame surface
+            history: SpectrumHistory holding the spectra
+        """
+        rows = history.view()
+        count = len(rows)
+        pending = history.total - self._drawn
+        expected = min(self._count + pending, self.length)
+        # A history pyramid moves its slices unevenly, so it is redrawn
+        if (
+            pending < 0
+            or pending > count
+            or expected != count
+            or (pending and not history.scrolls)
+        ):
+            self._reset()
+            pending = count
+
+        for time_idx in range(count - pending, count):
+            self._add_slice(rows, time_idx, history.total - (count - time_idx))
+        self._drawn = history.total
+
+        if count > 0:
+            self._update_palette(history.total - 1, count)
+            for canvas_rect, layer_x, layer_y in self._pieces(*self._view):
+                position = (self.origin[0] + layer_x, self.origin[1] + layer_y)
+                screen.blit(self.surface, position, canvas_rect)
+
+    def _pieces(self, x, y, width, height):
+        """
+        Split a layer rectangle into canvas rectangles at the wrap edges.
+
+        Args:
+            x, y, width, height: Rectangle in layer coordinates
+
+        Returns:
+            List of (canvas_rect, layer_x, layer_y) tuples
+        """
+        canvas_w, canvas_h = self.size
+        start_x = (x - self._scroll[0]) % canvas_w
+        start_y = (y - self._scroll[1]) % canvas_h
+        columns = [(start_x, min(width, canvas_w - start_x), x)]
+        if columns[0][1] < width:
+            columns.append((0, width - columns[0][1], x + columns[0][1]))
+        rows = [(start_y, min(height, canvas_h - start_y), y)]
+        if rows[0][1] < height:
+            rows.append((0, height - rows[0][1], y + rows[0][1]))
+
+        return [
+            (pygame.Rect(cx, cy, w, h), lx, ly)
+            for cx, w, lx in columns
+            for cy, h, ly in rows
+            if w > 0 and h > 0
+        ]
+
+    def _add_slice(self, rows, time_idx, sequence):
+        """
+        Rasterize one new time slice and its connectors into the layer.
+
+        Args:
+            rows: Ordered history view
+            time_idx: Index of the slice in rows
+            sequence: Number of spectra appended before this one
+        """
+        if self._count == self.length:
+            self._advance()
+        else:
+            self._count += 1
+
+        index = (sequence // self.group_size) % (PALETTE_SIZE - 1) + 1
+        if sequence % self.group_size == 0:
+            self._clear_index(index)
+
+        # Project at the depth the slice has on arrival; later slices in the
+        # same update scroll it back to its place in the history
+        first = max(time_idx - 1, 0)
+        depth = self._count - 1 - (time_idx - first)
+        points = self.projection.project_grid(rows[first : time_idx + 1] * 100, depth)
+        points -= self.origin
+
+        # Bounding box of the slice, clipped to the layer
+        margin = config.LINE_THICKNESS
+        x0 = max(points[..., 0].min() - margin, 0)
+        y0 = max(points[..., 1].min() - margin, 0)
+        x1 = min(points[..., 0].max() + margin + 1, self.size[0])
+        y1 = min(points[..., 1].max() + margin + 1, self.size[1])
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        for canvas_rect, layer_x, layer_y in self._pieces(x0, y0, x1 - x0, y1 - y0):
+            offset = np.array([canvas_rect.x - layer_x, canvas_rect.y - layer_y])
+            shifted = (points + offset).tolist()
+            self.surface.set_clip(canvas_rect)
+
+            # Draw the spectrum line
+            pygame.draw.lines(
+                self.surface, index, False, shifted[-1], config.LINE_THICKNESS
+            )
+
+            # Draw connection to previous time slice for waterfall effect
+            if time_idx > 0:
+                for pos1, pos2 in zip(shifted[1], shifted[0]):
+                    pygame.draw.line(
+                        self.surface, index, pos1, pos2, config.LINE_THICKNESS // 2
+                    )
+
+            self._group_rects[index].append(canvas_rect)
+        self.surface.set_clip(None)
+
+    def _advance(self):
+        """Move all drawn slices one step back in time."""
+        self._shifts += 1
+        scroll_x = round(self._shifts * self._step_x)
+        scroll_y = -round(self._shifts * self._step_y)
+        dx = scroll_x - self._scroll[0]
+        dy = self._scroll[1] - scroll_y
+        self._scroll = (scroll_x, scroll_y)
+
+        # Content that left through the top or right edge wraps around into
+        # the strips uncovered at the left and bottom
+        width, height = self.size
+        strips = []
+        if dx > 0:
+            strips.extend(self._pieces(0, 0, min(dx, width), height))
+        if dy > 0:
+            strips.extend(self._pieces(0, height - dy, width, min(dy, height)))
+        for canvas_rect, _, _ in strips:
+            self.surface.fill(0, canvas_rect)
+
+    def _clear_index(self, index):
+        """
+        Erase stale pixels of a palette index before it is reused.
+
+        Args:
+            index: Palette index
+        """
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        for rect in self._group_rects[index]:
+            area = pixels[rect.left : rect.right, rect.top : rect.bottom]
+            area[area == index] = 0
+        del pixels
+        self._group_rects[index].clear()
+
+    def _update_palette(self, newest, count):
+        """
+        Rewrite the palette so every slice group shows its faded colour.
+
+        Args:
+            newest: Sequence number of the newest slice
+            count: Number of slices in the history
+        """
+        newest_group = newest // self.group_size
+        slots = np.arange(PALETTE_SIZE - 1)
+        groups = newest_group - (newest_group - slots) % (PALETTE_SIZE - 1)
+        latest = np.minimum(newest, (groups + 1) * self.group_size - 1)
+        time_idx = count - 1 - (newest - latest)
+
+        alpha = 255 * (time_idx + 1) // count
+        colors = np.array(config.LINE_COLOR) * alpha[:, np.newaxis] // 255
+        visible = (groups >= 0) & (time_idx >= 0)
+
+        palette = np.empty((PALETTE_SIZE, 3), dtype=int)
+        palette[0] = config.BACKGROUND_COLOR
+        palette[1:] = np.where(visible[:, np.newaxis], colors, config.BACKGROUND_COLOR)
+        self.surface.set_palette(palette.tolist())
@@ -0,0 +1,112 @@
+"""
+Adaptive level of detail that keeps the frame rate on target.
+"""
+import math
+from ..utils import config
+
+# Levels of detail, full detail first. resolution scales the offscreen
+# surface the waterfall is drawn on; slice_step keeps every n-th slice in
+# the far part of the history; connector_depth is the newest fraction of
+# the history that keeps its connectors. Slice and connector reduction
+# apply to the "lines" backend, resolution to every backend.
+QUALITY_LEVELS = [
+    {"name": "full", "resolution": 1.0, "slice_step": 1, "connector_depth": 1.0},
+    {"name": "connectors", "resolution": 1.0, "slice_step": 1, "connector_depth": 0.5},
+    {"name": "decimated", "resolution": 1.0, "slice_step": 2, "connector_depth": 0.5},
+    {"name": "75% res", "resolution": 0.75, "slice_step": 2, "connector_depth": 0.5},
+    {"name": "50% res", "resolution": 0.5, "slice_step": 2, "connector_depth": 0.25},
+    {"name": "minimum", "resolution": 0.5, "slice_step": 4, "connector_depth": 0.25},
+]
+
+
+class QualityGovernor:
+    """
+    Picks a quality level from measured frame work time.
+
+    The work time of each frame (everything except waiting for the next
+    frame) is smoothed and compared with the frame budget. Sustained load
+    above QUALITY_DEGRADE_LOAD lowers the detail one level; sustained load
+    below QUALITY_RECOVER_LOAD raises it again. The gap between the two
+    thresholds, the longer delay for recovering, and a settling period after
+    every change keep the level from oscillating. A recovery that has to be
+    undone right away doubles the recovery delay.
+    """
+
+    def __init__(self, fps_target=None, max_level=None):
+        """
+        Initialize the governor at full detail.
+
+        Args:
+            fps_target: Frame rate to hold (default: config.FPS_TARGET)
+            max_level: Lowest detail level allowed
+                (default: config.QUALITY_MAX_LEVEL)
+        """
+        fps_target = fps_target or config.FPS_TARGET
+        self.budget = 1.0 / fps_target
+        if max_level is None:
+            max_level = config.QUALITY_MAX_LEVEL
+        self.max_level = min(max_level, len(QUALITY_LEVELS) - 1)
+        self.level = 0
+        self.load = 0.0  # smoothed work time as a fraction of the budget
+
+        self._degrade_frames = math.ceil(config.QUALITY_DEGRADE_DELAY * fps_target)
+        self._recover_base = math.ceil(config.QUALITY_RECOVER_DELAY * fps_target)
+        self._recover_frames = self._recover_base
+        self._settle_frames = math.ceil(config.QUALITY_SETTLE_TIME * fps_target)
+        self._settle = self._settle_frames
+        self._over = 0  # consecutive frames above the degrade threshold
+        self._under = 0  # consecutive frames below the recover threshold
+        self._since_recovery = None  # frames since the last recovery
+
+    @property
+    def settings(self):
+        """Level of detail settings of the current level."""
+        return QUALITY_LEVELS[self.level]
+
+    def update(self, work_time):
+        """
+        Record the work time of a frame and adjust the level.
+
+        Args:
+            work_time: Seconds the frame spent working
+
+        Returns:
+            True if the level changed
+        """
+        load = work_time / self.budget
+        self.load += (load - self.load) * config.QUALITY_SMOOTHING
+        if self._since_recovery is not None:
+            self._since_recovery += 1
+
+        # Let the smoothed load reflect the current level before judging it
+        if self._settle > 0:
+            self._settle -= 1
+            return False
+
+        self._over = self._over + 1 if self.load > config.QUALITY_DEGRADE_LOAD else 0
+        self._under = self._under + 1 if self.load < config.QUALITY_RECOVER_LOAD else 0
+
+        if self._over >= self._degrade_frames and self.level < self.max_level:
+            recovered_recently = (
+                self._since_recovery is not None
+                and self._since_recovery <= self._recover_frames
+            )
+            if recovered_recently:
+                self._recover_frames = min(
+                    self._recover_frames * 2, self._recover_base * 8
+                )
+            self._change(self.level + 1)
+            return True
+
+        if self._under >= self._recover_frames and self.level > 0:
+            self._change(self.level - 1)
+            self._since_recovery = 0
+            return True
+        return False
+
+    def _change(self, level):
+        """Switch to a level and wait for the load to settle."""
+        self.level = level
+        self._over = 0
+        self._under = 0
+        self._settle = self._settle_frames
@@ -0,0 +1,333 @@
+"""
+NumPy software rasterizer for the waterfall.
+"""
+import numpy as np
+import pygame
+from ..utils import config
+
+RASTER_STYLES = ("lines", "filled")
+
+
+class RasterLayer:
+    """
+    Waterfall rasterized with NumPy straight into the screen pixels.
+
+    Each pixel of the layer's screen rectangle gets a code in an index
+    buffer: 0 where nothing was drawn, 2 * (time_idx + 1) for the fill of a
+    slice and one more for its line. A fade lookup table turns the codes
+    into mapped screen colours, written into pygame.surfarray.pixels2d
+    without a copy, so a frame costs about as much as the pixels it covers
+    rather than the number of lines in it.
+
+    The "lines" style draws the wireframe of the pygame.draw path, newer
+    slices over older ones; it samples every segment of every slice, so it
+    is slower than pygame.draw and mainly serves as a reference. The
+    "filled" style draws an opaque heightmap in
+    which nearer slices hide what lies behind them: every screen column is
+    split into one span per visible slice with a floating horizon, so each
+    pixel is written once.
+    """
+
+    def __init__(self, projection, length, num_bands, transparent=False, style=None):
+        """
+        Initialize the layer.
+
+        Args:
+            projection: IsometricProjection used for the waterfall
+            length: Maximum number of time slices in the history
+            num_bands: Number of frequency bands per slice
+            transparent: Leave undrawn pixels untouched, for layers that
+                overlap other drawings (slower to write)
+            style: "lines" or "filled" (default: config.RASTER_STYLE)
+
+        Raises:
+            ValueError: If the style is unknown
+        """
+        self.projection = projection
+        self.length = length
+        self.num_bands = num_bands
+        self.transparent = transparent
+        self.style = style or config.RASTER_STYLE
+        if self.style not in RASTER_STYLES:
+            raise ValueError(f"Unknown raster style: {self.style}")
+
+        # Screen rectangle of the waterfall at full height; pixels outside
+        # it are clipped
+        left, top, width, height = projection.grid_bounds(length, num_bands, 100)
+        margin = config.LINE_THICKNESS
+        right = min(left + width + margin, projection.width)
+        bottom = min(top + height + margin, projection.height)
+        left = max(left - margin, 0)
+        top = max(top - margin, 0)
+        self.origin = np.array([left, top])
+        self.size = (max(right - left, 1), max(bottom - top, 1))
+        # Screen rectangle the index buffer is written to
+        self.bounds = pygame.Rect(left, top, *self.size)
+
+        # Index buffer as (x, y) like surfarray, stored row by row like the
+        # screen so lookups write the pixels in memory order
+        width, height = self.size
+        self._flat = np.zeros(width * height, dtype=np.int32)
+        self._codes = self._flat.reshape(height, width).T
+        # Span steps by (y, x), with one more row for ends at the bottom edge
+        self._spans = np.zeros((height + 1, width), dtype=np.int32)
+
+        # Screen columns covered by one slice of the filled style, as
+        # fractional band positions
+        step = config.SCALE_X * projection.scale * projection.cos_angle
+        columns = int((num_bands - 1) * step) + 1
+        position = np.minimum(np.arange(columns) / step, num_bands - 1)
+        self._band = np.minimum(position.astype(int), max(num_bands - 2, 0))
+        self._frac = (position - self._band).astype(np.float32)
+
+        # Baseline of the filled style: screen y of amplitude 0 at each of
+        # those columns, plus a fixed step per slice
+        rise = projection.scale * projection.sin_angle
+        self._base_columns = (position * config.SCALE_X * rise).astype(np.float32)
+        self._base_step = config.SCALE_Z * rise
+        self._base_offset = projection.center_y - top
+
+        self._lut = None
+        self._lut_key = None
+
+    def draw(self, screen, history):
+        """
+        Rasterize the history and write it into the screen.
+
+        Args:
+            screen: Target pygame surface
+            history: SpectrumHistory holding the spectra
+        """
+        rows = history.view()
+        count = len(rows)
+        if count == 0 or rows.shape[1] < 2:
+            return
+
+        points = self.projection.project_grid(rows * 100)
+        points -= self.origin
+        if self.style == "filled":
+            self._rasterize_filled(points)
+        else:
+            self._rasterize_lines(points)
+        self._blit(screen, count)
+
+    def _rasterize_lines(self, points):
+        """
+        Fill the index buffer with the wireframe of a projected history.
+
+        Args:
+            points: Projected grid in layer coordinates, oldest slice first
+        """
+        count = points.shape[0]
+
+        # Segments of every slice in drawing order: its spectrum line, once
+        # per pixel of line width, then its connections to the previous
+        # slice. The connections of the first slice are single points on
+        # its own line.
+        previous = np.concatenate([points[:1], points[:-1]])
+        starts, ends = self._widen(points[:, :-1], points[:, 1:], config.LINE_THICKNESS)
+        connector_starts, connector_ends = self._widen(
+            points, previous, config.LINE_THICKNESS // 2
+        )
+        starts = np.concatenate([starts, connector_starts], axis=1)
+        ends = np.concatenate([ends, connector_ends], axis=1)
+        codes = np.repeat(2 * np.arange(1, count + 1) + 1, starts.shape[1])
+
+        xs, ys, values = self._segment_pixels(
+            starts.reshape(-1, 2), ends.reshape(-1, 2), codes
+        )
+        width, height = self.size
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+
+        # Pixels come out oldest slice first, so where lines overlap the
+        # last write, from the newest slice, wins as in pygame.draw
+        self._codes.fill(0)
+        self._flat[ys[inside] * width + xs[inside]] = values[inside]
+
+    def _widen(self, starts, ends, width):
+        """
+        Turn segments of a line width into one-pixel segments.
+
+        Copies are offset along the minor axis of each segment like
+        pygame.draw.line does.
+
+        Args:
+            starts: Integer array of shape (..., 2) with the first endpoints
+            ends: Integer array of shape (..., 2) with the last endpoints
+            width: Line width in pixels; 0 draws nothing
+
+        Returns:
+            Tuple of (starts, ends) arrays of shape (count, segments, 2)
+        """
+        count = len(starts)
+        delta = np.abs(ends - starts)
+        normal = np.empty(starts.shape, dtype=int)
+        normal[..., 1] = delta[..., 0] >= delta[..., 1]
+        normal[..., 0] = 1 - normal[..., 1]
+
+        shifts = np.arange(width) - (width - 1) // 2
+        widened = [(starts + shift * normal, ends + shift * normal) for shift in shifts]
+        if not widened:
+            empty = np.zeros((count, 0, 2), dtype=int)
+            return empty, empty
+        return (
+            np.concatenate([a.reshape(count, -1, 2) for a, _ in widened], axis=1),
+            np.concatenate([b.reshape(count, -1, 2) for _, b in widened], axis=1),
+        )
+
+    def _segment_pixels(self, starts, ends, values):
+        """
+        Return the pixels of many one-pixel line segments at once.
+
+        Segments are stepped along their major axis with one sample per
+        pixel, in order.
+
+        Args:
+            starts: Integer array of shape (N, 2) with the first endpoints
+            ends: Integer array of shape (N, 2) with the last endpoints
+            values: Code of every segment
+
+        Returns:
+            Tuple of (x, y, code) arrays, one entry per pixel
+        """
+        delta = ends - starts
+        steps = np.abs(delta).max(axis=1)
+        lengths = steps + 1
+        step = (delta / np.maximum(steps, 1)[:, np.newaxis]).astype(np.float32)
+        first = lengths.cumsum() - lengths
+        offset = np.arange(lengths.sum(), dtype=np.float32)
+        offset -= np.repeat(first.astype(np.float32), lengths)
+
+        # Per-segment values are repeated rather than gathered; starting
+        # half a pixel in makes flooring round to the nearest pixel
+        xs = np.repeat(step[:, 0], lengths)
+        xs *= offset
+        xs += np.repeat(starts[:, 0] + 0.5, lengths)
+        ys = np.repeat(step[:, 1], lengths)
+        ys *= offset
+        ys += np.repeat(starts[:, 1] + 0.5, lengths)
+        return (
+            np.floor(xs).astype(np.int32),
+            np.floor(ys).astype(np.int32),
+            np.repeat(values, lengths),
+        )
+
+    def _rasterize_filled(self, points):
+        """
+        Fill the index buffer with the opaque heightmap of a projected history.
+
+        Args:
+            points: Projected grid in layer coordinates, oldest slice first
+        """
+        count = len(points)
+        width, height = self.size
+        slices = np.arange(count, dtype=np.int32)[:, np.newaxis]
+
+        # Curve and baseline of every slice at each screen column it covers
+        screen_y = points[..., 1].astype(np.float32)
+        curve = np.take(screen_y, self._band, axis=1)
+        curve *= 1 - self._frac
+        curve += np.take(screen_y, self._band + 1, axis=1) * self._frac
+        base = self._base_columns + (
+            slices * self._base_step + self._base_offset
+        ).astype(np.float32)
+        column = (points[:, :1, 0] + np.arange(len(self._band))).astype(np.int32)
+
+        # The line reaches halfway to the neighbouring columns so steep
+        # edges stay connected
+        middle = curve[:, :-1] + curve[:, 1:]
+        middle /= 2
+        upper = curve.copy()
+        lower = curve
+        for side in (upper[:, 1:], upper[:, :-1]):
+            np.minimum(side, middle, out=side)
+        for side in (lower[:, 1:], lower[:, :-1]):
+            np.maximum(side, middle, out=side)
+        start = np.floor(upper).astype(np.int32)
+        line_end = np.floor(lower).astype(np.int32)
+        line_end += config.LINE_THICKNESS
+
+        # Floating horizon: a slice is visible above the highest point of
+        # every nearer (newer) slice in the same column. Columns off the
+        # layer go to two padding columns that are never read back.
+        stride = width + 2
+        cell = np.clip(column, -1, width) + 1 + slices * stride
+        tops = np.full((count + 1, stride), height, dtype=np.int32)
+        tops.reshape(-1)[cell] = start
+        horizon = np.minimum.accumulate(tops[::-1], axis=0)[::-1]
+        end = horizon.reshape(-1)[cell + stride]
+
+        np.minimum(end, np.floor(base).astype(np.int32) + 1, out=end)
+        np.clip(start, 0, height, out=start)
+        np.clip(end, 0, height, out=end)
+        np.clip(line_end, start, end, out=line_end)
+        drawn = (end > start) & (column >= 0) & (column < width)
+
+        # Spans as steps of a running sum down every column. Spans of a
+        # column are disjoint, so each kind of step lands on a distinct row
+        # and plain fancy-index adds are exact.
+        xs = column[drawn]
+        fill = 2 * (np.broadcast_to(slices, drawn.shape)[drawn] + 1)
+        self._spans.fill(0)
+        self._spans[start[drawn], xs] += fill + 1
+        self._spans[line_end[drawn], xs] -= 1
+        self._spans[end[drawn], xs] -= fill
+        np.cumsum(self._spans[:height], axis=0, out=self._codes.T)
+
+    def _fade_lut(self, screen, count, dtype):
+        """
+        Return the mapped screen colour of every index code.
+
+        Args:
+            screen: Target pygame surface
+            count: Number of slices in the history
+            dtype: Pixel array type of the surface
+
+        Returns:
+            Integer NumPy array indexed by code
+        """
+        key = (
+            count,
+            screen.get_bitsize(),
+            screen.get_masks(),
+            dtype,
+            config.LINE_COLOR,
+            config.BACKGROUND_COLOR,
+            config.RASTER_FILL_SHADE,
+        )
+        if self._lut_key != key:
+            alpha = 255 * np.arange(1, count + 1) // count
+            line = np.array(config.LINE_COLOR) * alpha[:, np.newaxis] // 255
+            fill = (line * config.RASTER_FILL_SHADE).astype(int)
+
+            colors = np.empty((2 * count + 2, 3), dtype=int)
+            colors[:2] = config.BACKGROUND_COLOR
+            colors[2::2] = fill
+            colors[3::2] = line
+            self._lut = np.array(
+                [screen.map_rgb(color) for color in colors.tolist()], dtype=dtype
+            )
+            self._lut_key = key
+        return self._lut
+
+    def _blit(self, screen, count):
+        """
+        Write the index buffer into the screen through the fade table.
+
+        Args:
+            screen: Target pygame surface
+            count: Number of slices in the history
+        """
+        left, top = self.origin
+        width, height = self.size
+
+        pixels = pygame.surfarray.pixels2d(screen)
+        lut = self._fade_lut(screen, count, pixels.dtype)
+        area = pixels[left : left + width, top : top + height]
+        if self.transparent:
+            mask = self._codes != 0
+            area[mask] = lut[self._codes[mask]]
+        else:
+            # Look up straight into the screen pixels, row by row in memory
+            np.take(lut, self._codes.T, out=area.T, mode="clip")
+        del pixels
@@ -1,18 +1,47 @@
 """
 Graphics renderer module for drawing the 3D audio visualization.
 """
+import itertools
+import math
+import time
 import pygame
 import numpy as np
-from collections import deque
+from .history import create_history
 from .isometric import IsometricProjection
+from .layers import ScrollingLayer
+from .quality import QUALITY_LEVELS
+from .raster import RASTER_STYLES, RasterLayer
 from ..utils import config
+from ..utils.runtime import runtime
+from ..utils.telemetry import telemetry
+
+# Live settings that reshape the histories, move the projected grid, or
+# change how the backend layers draw. Colours and fade steps only key the
+# fade caches and need no rebuild.
+HISTORY_FIELDS = (
+    "NUM_FREQUENCY_BANDS",
+    "TIME_HISTORY_LENGTH",
+    "HISTORY_LEVELS",
+    "HISTORY_DECIMATION",
+    "HISTORY_POOLING",
+    "HISTORY_MERGE_BANDS",
+)
+PROJECTION_FIELDS = HISTORY_FIELDS + ("ISO_ANGLE", "SCALE_X", "SCALE_Y", "SCALE_Z")
+LAYER_FIELDS = PROJECTION_FIELDS + ("LINE_THICKNESS", "RENDER_BACKEND", "RASTER_STYLE")
 
 
 class Renderer:
     """Handles all graphics rendering for the visualizer."""
 
-    def __init__(self):
-        """Initialize the renderer."""
+    def __init__(self, show_ui=True):
+        """
+        Initialize the renderer.
+
+        Args:
+            show_ui: Draw the FPS and buffer overlay
+        """
+        self.show_ui = show_ui
+
         # Set up display
         flags = pygame.DOUBLEBUF
         if config.USE_HARDWARE_ACCELERATION:
@@ -23,108 +52,569 @@ class Renderer:
         )
         pygame.display.set_caption(config.WINDOW_TITLE)
 
-        # Initialize projection
-        self.projection = IsometricProjection(
-            config.WINDOW_WIDTH, config.WINDOW_HEIGHT
-        )
+        # One waterfall per displayed channel, each with its own projection
+        # and time history
+        self.channel_names = self._channel_names(config.CHANNEL_LAYOUT)
+        self.histories = [
+            create_history(config.TIME_HISTORY_LENGTH, config.NUM_FREQUENCY_BANDS)
+            for _ in self.channel_names
+        ]
 
-        # Time history buffer - stores spectrum data over time
-        self.history = deque(maxlen=config.TIME_HISTORY_LENGTH)
+        # Level of detail; below full resolution the waterfalls are drawn on
+        # a smaller canvas that is scaled up onto the screen
+        self.quality_level = None
+        self.canvas = None
+        self.target = self.screen
+        self.set_quality(0)
+
+        # Fade colour per time slice, rebuilt when the history length or the
+        # fade settings change
+        self._fade_cache = []
+        self._fade_key = None
+        self._fade_groups_cache = []
+        self._fade_groups_key = None
+
+        # Follow display changes made while running
+        runtime.subscribe(self._on_config_change, LAYER_FIELDS)
 
         # Font for debug info
         self.font = pygame.font.Font(None, 24)
 
+        # Channel labels of split layouts, rendered once and shown in the
+        # bottom-left corner of each panel
+        self._labels = []
+        if len(self.projections) > 1:
+            cols, rows = self._panel_grid(len(self.projections))
+            for index, name in enumerate(self.channel_names):
+                row, col = divmod(index, cols)
+                position = (
+                    col * config.WINDOW_WIDTH // cols + 10,
+                    (row + 1) * config.WINDOW_HEIGHT // rows - 30,
+                )
+                label = self.font.render(name, True, (150, 150, 150))
+                self._labels.append((label, position))
+
+        # Telemetry overlay lines, re-rendered when the statistics refresh
+        self._telemetry_font = None
+        self._telemetry_lines = []
+        self._telemetry_refresh = 0
+
+        # Overlay text by line, re-rendered only when the text changes
+        self._texts = {}
+
+        # Damage tracking (DIRTY_RECTS): regions drawn in the previous frame,
+        # cleared and presented again so that what moved away is erased
+        self._full_frame = True  # next frame clears and presents everything
+        self._drawn = []  # rectangles drawn on the target this frame
+        self._overlay = []  # rectangles drawn on the screen this frame
+        self._previous_target = []
+        self._previous_screen = []
+
         # Clock for FPS tracking
         self.clock = pygame.time.Clock()
+        self.flip_time = 0.0  # seconds spent in the last display flip
+
+    def set_quality(self, level):
+        """
+        Switch to a level of detail.
+
+        Changing the resolution rebuilds the projections and backend layers.
+
+        Args:
+            level: Index into QUALITY_LEVELS, 0 for full detail
+        """
+        settings = QUALITY_LEVELS[level]
+        previous = (
+            self._quality["resolution"] if self.quality_level is not None else None
+        )
+        self.quality_level = level
+        self._quality = settings
+
+        resolution = settings["resolution"]
+        self._update_line_widths()
+        if resolution == previous:
+            return
+
+        width, height = config.WINDOW_WIDTH, config.WINDOW_HEIGHT
+        self.canvas = None
+        self.target = self.screen
+        if resolution < 1.0:
+            size = (round(width * resolution), round(height * resolution))
+            self.canvas = pygame.Surface(size, 0, self.screen)
+            self.target = self.canvas
+
+        self.projections = self._panel_projections(len(self.channel_names), resolution)
+        self.layers = self._create_layers()
+        self._full_frame = True
+
+        # The first waterfall, the only one in the mono layout
+        self.projection = self.projections[0]
+        self.history = self.histories[0]
+        self.layer = self.layers[0]
+
+    def _update_line_widths(self):
+        """Scale the line and connector widths to the drawing resolution."""
+        resolution = self._quality["resolution"]
+        self._line_width = max(1, round(config.LINE_THICKNESS * resolution))
+        self._connector_width = config.LINE_THICKNESS // 2
+        if self._connector_width > 0:
+            self._connector_width = max(1, round(self._connector_width * resolution))
+
+    def _on_config_change(self, changed):
+        """
+        Rebuild what depends on the changed settings.
+
+        Histories keep their newest spectra unless the band count changed
+        or they were history pyramids.
+
+        Args:
+            changed: Names of the changed settings
+
+        Raises:
+            ValueError: If the raster style or the history pyramid settings
+                are invalid
+        """
+        if config.RASTER_STYLE not in RASTER_STYLES:
+            raise ValueError(f"Unknown raster style: {config.RASTER_STYLE}")
+
+        if changed.intersection(HISTORY_FIELDS):
+            for index, old in enumerate(self.histories):
+                history = create_history(
+                    config.TIME_HISTORY_LENGTH, config.NUM_FREQUENCY_BANDS
+                )
+                # Pyramid slices are pooled and cannot be replayed
+                if old.num_bands == history.num_bands and old.scrolls:
+                    for row in old.view()[-history.span :]:
+                        history.append(row)
+                self.histories[index] = history
+        if "LINE_THICKNESS" in changed:
+            self._update_line_widths()
+        if changed.intersection(PROJECTION_FIELDS):
+            self.projections = self._panel_projections(
+                len(self.channel_names), self._quality["resolution"]
+            )
+        self.layers = self._create_layers()
+        self._full_frame = True
+
+        self.projection = self.projections[0]
+        self.history = self.histories[0]
+        self.layer = self.layers[0]
+
+    def _create_layers(self):
+        """
+        Create the backend layer of every waterfall.
+
+        Returns:
+            List with one layer per projection, None entries for the "lines"
+            backend
+        """
+        # Layer backends: "scrolling" rasterizes each slice once and scrolls
+        # it, "raster" rasterizes the whole waterfall with NumPy
+        layer_classes = {"scrolling": ScrollingLayer, "raster": RasterLayer}
+        if config.RENDER_BACKEND not in layer_classes:
+            return [None] * len(self.projections)
+        return [
+            layer_classes[config.RENDER_BACKEND](
+                projection,
+                config.TIME_HISTORY_LENGTH,
+                config.NUM_FREQUENCY_BANDS,
+                transparent=len(self.projections) > 1,
+            )
+            for projection in self.projections
+        ]
+
+    def _channel_names(self, layout):
+        """
+        Return the label of every waterfall of a channel layout.
+
+        Args:
+            layout: "mono", "split" or "midside"
+
+        Returns:
+            List of names, one per waterfall
+        """
+        if layout == "midside":
+            return ["Mid", "Side"]
+        if layout == "split":
+            if config.CHANNELS == 2:
+                return ["L", "R"]
+            return [f"Ch {channel + 1}" for channel in range(config.CHANNELS)]
+        return ["Mono"]
+
+    def _panel_grid(self, count):
+        """Return the (columns, rows) of the panel grid for count waterfalls."""
+        cols = math.ceil(math.sqrt(count))
+        return cols, math.ceil(count / cols)
+
+    def _panel_projections(self, count, resolution=1.0):
+        """
+        Create projections that tile the window with count waterfalls.
+
+        Panels are laid out in a near-square grid and every waterfall is
+        scaled down to fit inside its panel.
+
+        Args:
+            count: Number of waterfalls
+            resolution: Size of the drawing surface relative to the window
+
+        Returns:
+            List of IsometricProjection objects
+        """
+        width = round(config.WINDOW_WIDTH * resolution)
+        height = round(config.WINDOW_HEIGHT * resolution)
+        if count == 1:
+            return [IsometricProjection(width, height, scale=resolution)]
+
+        cols, rows = self._panel_grid(count)
+        panel_width = width / cols
+        panel_height = height / rows
+
+        # Scale the full waterfall at its tallest to fit a panel and center
+        # its bounding box there
+        left, top, box_width, box_height = IsometricProjection(
+            width, height, center=(0, 0)
+        ).grid_bounds(config.TIME_HISTORY_LENGTH, config.NUM_FREQUENCY_BANDS, 100)
+        scale = min(panel_width / box_width, panel_height / box_height, resolution)
+
+        projections = []
+        for index in range(count):
+            row, col = divmod(index, cols)
+            center = (
+                int(col * panel_width + (panel_width - box_width * scale) / 2)
+                - int(left * scale),
+                int(row * panel_height + (panel_height - box_height * scale) / 2)
+                - int(top * scale),
+            )
+            projections.append(
+                IsometricProjection(width, height, center=center, scale=scale)
+            )
+        return projections
 
     def add_spectrum(self, spectrum):
         """
         Add a new spectrum to the history buffer.
 
         Args:
-            spectrum: NumPy array of frequency band amplitudes
+            spectrum: NumPy array of frequency band amplitudes, or of shape
+                (channels, bands) with one row per waterfall
         """
-        self.history.append(spectrum.copy())
+        if spectrum.ndim == 1:
+            self.history.append(spectrum)
+            return
+
+        for history, row in zip(self.histories, spectrum):
+            history.append(row)
+
+    def clear_history(self):
+        """Drop the spectra of every waterfall."""
+        for history in self.histories:
+            history.clear()
 
     def render(self):
-        """Render the current frame."""
+        """
+        Render the current frame.
+
+        With DIRTY_RECTS the frame is damage tracked: only the regions the
+        waterfalls and the overlay cover in this frame or covered in the
+        previous one are cleared and presented, with
+        pygame.display.update(rects) instead of a full flip. Everything
+        else still holds the background. A full frame is drawn after the
+        layout changes and when the mode is switched on.
+        """
+        dirty = config.DIRTY_RECTS
+        full = self._full_frame or not dirty
+        self._full_frame = not dirty
+        self._drawn = []
+        self._overlay = []
+
         # Clear screen
-        self.screen.fill(config.BACKGROUND_COLOR)
+        if full:
+            self.target.fill(config.BACKGROUND_COLOR)
+        else:
+            for rect in self._previous_target:
+                self.target.fill(config.BACKGROUND_COLOR, rect)
+            if self.canvas is None:
+                for rect in self._previous_screen:
+                    self.screen.fill(config.BACKGROUND_COLOR, rect)
+        telemetry.lap("clear")
 
         # Draw visualization if we have data
-        if len(self.history) > 0:
-            self._draw_spectrum_lines()
+        for projection, history, layer in zip(
+            self.projections, self.histories, self.layers
+        ):
+            if layer is not None:
+                layer.draw(self.target, history)
+                telemetry.lap("draw")
+                if dirty:
+                    self._drawn.append(layer.bounds)
+            elif len(history) > 0:
+                self._draw_spectrum_lines(projection, history)
+
+        # Scale a reduced-resolution canvas up to the window
+        if self.canvas is not None:
+            pygame.transform.scale(self.canvas, self.screen.get_size(), self.screen)
+            telemetry.lap("upscale")
 
         # Draw UI elements
-        self._draw_ui()
+        if self.show_ui:
+            self._draw_ui()
+        if telemetry.overlay_visible:
+            self._draw_telemetry()
+        telemetry.lap("ui")
 
         # Update display
-        pygame.display.flip()
+        flip_start = time.perf_counter()
+        if dirty:
+            self._present(full)
+        else:
+            pygame.display.flip()
+        self.flip_time = time.perf_counter() - flip_start
+        telemetry.lap("flip")
 
         # Tick clock for FPS tracking
         self.clock.tick()
 
-    def _draw_spectrum_lines(self):
-        """Draw the 3D spectrum visualization."""
-        # Draw from back to front for proper depth
-        for time_idx in range(len(self.history)):
-            spectrum = self.history[time_idx]
-            z = time_idx  # Z coordinate is time index
-
-            # Create points for this time slice
-            points = []
-            for freq_idx in range(len(spectrum)):
-                x = freq_idx  # X coordinate is frequency band
-                y = spectrum[freq_idx] * 100  # Scale amplitude for visibility
-
-                # Project to screen coordinates
-                screen_pos = self.projection.project(x, y, z)
-                points.append(screen_pos)
-
-            # Draw lines connecting the frequency bands
-            if len(points) > 1:
-                # Fade older time slices
-                alpha = int(255 * (time_idx + 1) / len(self.history))
-                color = (
-                    config.LINE_COLOR[0] * alpha // 255,
-                    config.LINE_COLOR[1] * alpha // 255,
-                    config.LINE_COLOR[2] * alpha // 255,
+    def _present(self, full):
+        """
+        Present the damaged regions of a damage-tracked frame.
+
+        Args:
+            full: Present the whole window
+        """
+        drawn = self._drawn
+        if drawn:
+            drawn = [drawn[0].unionall(drawn[1:])]
+        # Target rectangles in screen coordinates, rounded outwards
+        scale = 1 / self._quality["resolution"]
+        damage = [
+            pygame.Rect(
+                int(rect.x * scale) - 1,
+                int(rect.y * scale) - 1,
+                math.ceil(rect.width * scale) + 2,
+                math.ceil(rect.height * scale) + 2,
+            )
+            for rect in drawn + self._previous_target
+        ]
+        damage += self._overlay + self._previous_screen
+        self._previous_target = drawn
+        self._previous_screen = self._overlay
+
+        if full:
+            pygame.display.flip()
+        elif damage:
+            pygame.display.update(damage)
+
+    def _fade_colors(self, count):
+        """
+        Return the faded line colour of every time slice.
+
+        Args:
+            count: Number of time slices in the history
+
+        Returns:
+            List of RGB tuples, oldest slice first
+        """
+        key = (count, config.LINE_COLOR)
+        if self._fade_key != key:
+            self._fade_key = key
+            self._fade_cache = []
+            for time_idx in range(count):
+                alpha = int(255 * (time_idx + 1) / count)
+                self._fade_cache.append(
+                    (
+                        config.LINE_COLOR[0] * alpha // 255,
+                        config.LINE_COLOR[1] * alpha // 255,
+                        config.LINE_COLOR[2] * alpha // 255,
+                    )
                 )
+        return self._fade_cache
+
+    def _fade_groups(self, count, rows=None):
+        """
+        Split the history into colour bands of consecutive slices.
 
-                # Draw the spectrum line
-                pygame.draw.lines(
-                    self.screen, color, False, points, config.LINE_THICKNESS
+        Args:
+            count: Number of time slices in the history
+            rows: Indices of the slices drawn, oldest first, or None for all
+
+        Returns:
+            List of (start, stop, color) tuples over the drawn slices, oldest
+            band first; each band uses the faded colour of its middle slice
+        """
+        key = (count, config.LINE_COLOR, config.FADE_STEPS)
+        if rows is None and self._fade_groups_key == key:
+            return self._fade_groups_cache
+
+        colors = self._fade_colors(count)
+        drawn = count if rows is None else len(rows)
+        steps = max(1, min(config.FADE_STEPS, drawn))
+        edges = [drawn * step // steps for step in range(steps + 1)]
+        groups = []
+        for start, stop in itertools.pairwise(edges):
+            middle = (start + stop - 1) // 2
+            groups.append(
+                (start, stop, colors[middle if rows is None else rows[middle]])
+            )
+
+        if rows is None:
+            self._fade_groups_cache = groups
+            self._fade_groups_key = key
+        return groups
+
+    def _detail_rows(self, history):
+        """
+        Return the slices to draw at the current level of detail.
+
+        The far part of the history keeps every slice_step-th slice, chosen
+        by sequence number so a kept slice stays kept while it ages.
+
+        Args:
+            history: SpectrumHistory to draw
+
+        Returns:
+            Indices into the history view, oldest first, or None for all
+        """
+        step = self._quality["slice_step"]
+        if step == 1:
+            return None
+        count = len(history)
+        near = count - int(count * config.QUALITY_NEAR_FRACTION)
+        index = np.arange(count)
+        keep = (index >= near) | ((history.total - count + index) % step == 0)
+        return np.flatnonzero(keep)
+
+    def _draw_spectrum_lines(self, projection, history):
+        """
+        Draw the 3D spectrum visualization of one waterfall.
+
+        Each slice is one polyline call, and the connectors of each colour
+        band one more. The connectors of a band run as one path that walks
+        each frequency column in alternating time direction, so the steps
+        between columns lie on the band's own spectrum lines.
+
+        Args:
+            projection: IsometricProjection of the waterfall
+            history: SpectrumHistory to draw
+        """
+        rows = self._detail_rows(history)
+        history = history.view()
+        count = len(history)
+        if count == 0 or history.shape[1] < 2:
+            return
+
+        # Project every point of every time slice at once; amplitude is
+        # scaled for visibility
+        points = projection.project_grid(history * 100)
+        if rows is not None:
+            points = points[rows]
+        groups = self._fade_groups(count, rows)
+
+        # Connectors are left out in the far part of the history at reduced
+        # detail
+        far = count - int(count * self._quality["connector_depth"])
+        first_connector = far if rows is None else np.searchsorted(rows, far)
+        telemetry.lap("geometry")
+
+        # Draw from back to front for proper depth, keeping the rectangles
+        # drawn for damage tracking
+        drawn = self._drawn
+        for start, stop, color in groups:
+            # The spectrum lines
+            for line in points[start:stop].tolist():
+                drawn.append(
+                    pygame.draw.lines(self.target, color, False, line, self._line_width)
                 )
 
-                # Draw connection to previous time slice for waterfall effect
-                if time_idx > 0:
-                    prev_spectrum = self.history[time_idx - 1]
-                    for freq_idx in range(len(spectrum)):
-                        x = freq_idx
-                        y1 = spectrum[freq_idx] * 100
-                        y2 = prev_spectrum[freq_idx] * 100
+            # Connections to the previous time slice for the waterfall effect.
+            # The connector back to the previous band's last slice is walked
+            # out and back from the first slice, so the steps between columns
+            # never run along a slice of another band
+            path = np.arange(start, stop)
+            if start > 0:
+                path = np.concatenate([[start, start - 1], path])
+            if len(path) > 1 and start >= first_connector:
+                columns = points[path].transpose(1, 0, 2).copy()
+                columns[1::2] = columns[1::2, ::-1]
+                drawn.append(
+                    pygame.draw.lines(
+                        self.target,
+                        color,
+                        False,
+                        columns.reshape(-1, 2).tolist(),
+                        self._connector_width,
+                    )
+                )
+        telemetry.lap("draw")
 
-                        pos1 = self.projection.project(x, y1, time_idx)
-                        pos2 = self.projection.project(x, y2, time_idx - 1)
+    def _text(self, line, text):
+        """
+        Return the rendered surface of an overlay line.
 
-                        pygame.draw.line(
-                            self.screen, color, pos1, pos2, config.LINE_THICKNESS // 2
-                        )
+        Args:
+            line: Name of the overlay line
+            text: Current text of the line
+
+        Returns:
+            pygame.Surface, rendered again only when the text changed
+        """
+        cached = self._texts.get(line)
+        if cached is None or cached[0] != text:
+            cached = (text, self.font.render(text, True, (150, 150, 150)))
+            self._texts[line] = cached
+        return cached[1]
 
     def _draw_ui(self):
         """Draw UI elements like FPS counter."""
+        overlay = self._overlay
+
         # FPS counter
         fps = int(self.clock.get_fps())
-        fps_text = self.font.render(f"FPS: {fps}", True, (150, 150, 150))
-        self.screen.blit(fps_text, (10, 10))
+        overlay.append(self.screen.blit(self._text("fps", f"FPS: {fps}"), (10, 10)))
 
         # Buffer status
-        buffer_text = self.font.render(
-            f"Buffer: {len(self.history)}/{config.TIME_HISTORY_LENGTH}",
-            True,
-            (150, 150, 150),
+        buffer_text = self._text(
+            "buffer", f"Buffer: {len(self.history)}/{config.TIME_HISTORY_LENGTH}"
         )
-        self.screen.blit(buffer_text, (10, 35))
+        overlay.append(self.screen.blit(buffer_text, (10, 35)))
+
+        # Level of detail, shown while it is reduced
+        if self.quality_level > 0:
+            quality_text = self._text(
+                "quality", f"Quality: {self.quality_level} ({self._quality['name']})"
+            )
+            overlay.append(self.screen.blit(quality_text, (10, 60)))
+
+        # Channel labels
+        for label, position in self._labels:
+            overlay.append(self.screen.blit(label, position))
+
+    def _draw_telemetry(self):
+        """Draw per-stage frame timings in the top-right corner."""
+        now = pygame.time.get_ticks()
+        if now >= self._telemetry_refresh:
+            self._telemetry_refresh = now + config.TELEMETRY_OVERLAY_REFRESH_MS
+            if self._telemetry_font is None:
+                self._telemetry_font = pygame.font.SysFont("monospace", 14)
+
+            lines = [f"{'stage':<10}{'p50':>8}{'p95':>8}{'p99':>8} ms"]
+            for name, stats in telemetry.summary().items():
+                lines.append(
+                    f"{name:<10}{stats['p50']:8.2f}{stats['p95']:8.2f}"
+                    f"{stats['p99']:8.2f}"
+                )
+            self._telemetry_lines = [
+                self._telemetry_font.render(line, True, (150, 150, 150))
+                for line in lines
+            ]
+
+        y = 10
+        for text in self._telemetry_lines:
+            self._overlay.append(
+                self.screen.blit(
+                    text, (self.screen.get_width() - text.get_width() - 10, y)
+                )
+            )
+            y += text.get_height()
 
     def close(self):
         """Clean up resources."""
@@ -1,90 +1,413 @@
 """
 Main entry point for the Viz 3D audio visualizer.
 """
+import argparse
 import sys
-import numpy as np
+import time
 import pygame
 
 from .audio.capture import AudioCapture
-from .audio.analyzer import AudioAnalyzer
+from .audio.analyzer import BAND_FIELDS, AudioAnalyzer
+from .audio.bands import get_band_plan
+from .audio.engine import AnalysisEngine
+from .audio.recording import ReplaySource, SpectrumRecorder
+from .audio.sliding import SlidingAnalyzer
+from .audio.sources import create_source
+from .graphics.quality import QualityGovernor
 from .graphics.renderer import Renderer
+from .net.publisher import SpectrumPublisher
 from .utils.icon import create_app_icon
 from .utils import config
+from .utils.runtime import runtime
+from .utils.startup import StartupProfile
+from .utils.telemetry import telemetry
+from . import IMPORT_STARTED
 
 
 class Visualizer:
     """Main visualizer application class."""
 
-    def __init__(self):
-        """Initialize the visualizer application."""
+    def __init__(self, profile=None):
+        """
+        Initialize the visualizer application.
+
+        The window is created and shows a first, empty frame before audio
+        is set up, so it appears while devices are still being opened.
+
+        Args:
+            profile: StartupProfile that times the startup phases
+        """
+        self.profile = profile or StartupProfile()
         self.running = False
         self.clock = pygame.time.Clock()
 
+        # Settings file, applied before anything reads the config and
+        # reloaded live after that
+        if config.CONFIG_FILE:
+            runtime.load(config.CONFIG_FILE)
+            runtime.watch(config.CONFIG_FILE)
+            print(f"✓ Loaded settings from {config.CONFIG_FILE}")
+            self.profile.mark("config file")
+
         # Initialize pygame
         pygame.init()
+        self.profile.mark("pygame init")
 
         # Set window icon before creating the window
         icon = create_app_icon()
         pygame.display.set_icon(icon)
+        self.profile.mark("icon")
+
+        # A replay brings its own band count and channel count
+        self.replay = None
+        if config.REPLAY_PATH:
+            self._open_replay()
+            self.profile.mark("replay")
+
+        # Analysis settings changed while running reach the analysis
+        # process, the recording and the consumers through this listener.
+        # It comes before the renderer's so a replay can reject a change
+        # before anything is rebuilt.
+        runtime.subscribe(self._on_config_change, BAND_FIELDS + ("SMOOTHING_FACTOR",))
 
         # Initialize renderer (creates the window)
         print("Initializing renderer...")
         self.renderer = Renderer()
+        self.profile.mark("window and renderer")
+
+        # Show the window now rather than after the audio devices open
+        self.renderer.render()
+        self.profile.mark("first frame")
+        self.profile.window_shown()
+
+        # Analysis in a worker process if configured, else in this loop.
+        # The worker captures live audio and publishes mono spectra only.
+        # A replay needs neither.
+        self.engine = None
+        self.audio_source = None
+        self.use_audio = False
+        if self.replay is None:
+            if (
+                config.ANALYSIS_ENGINE == "process"
+                and config.CHANNEL_LAYOUT == "mono"
+                and config.AUDIO_SOURCE == "live"
+            ):
+                self._start_engine()
+            if self.engine is None:
+                self._init_audio()
+            self.profile.mark("audio")
+
+        # Recording of every spectrum added to the display
+        self.recorder = None
+        self._record_start = 0.0  # perf_counter() when the recording began
+        self._next_record_flush = 0.0
+        if config.RECORD_PATH:
+            self._start_recording()
+
+        # Spectra sent to external consumers
+        self.publisher = None
+        if config.PUBLISH_TARGETS:
+            self._start_publishing()
+
+        # Level of detail that follows the measured frame work time
+        self.governor = QualityGovernor() if config.QUALITY_GOVERNOR else None
+
+        # Per-stage frame timings, collected while the overlay is shown or
+        # when enabled or exported from the config
+        if config.TELEMETRY_ENABLED:
+            telemetry.enable()
+        if config.TELEMETRY_EXPORT_PATH:
+            telemetry.start_export(config.TELEMETRY_EXPORT_PATH)
+        self.profile.mark("outputs")
+
+    def _init_audio(self):
+        """Set up the audio source and analysis in this process."""
+        self.audio_source = None
+        self.use_audio = False
+        if config.AUDIO_SOURCE == "live":
+            self._start_capture()
+
+        # Generated or file input, and the demo fallback for live capture
+        if self.audio_source is None:
+            name = "demo" if config.AUDIO_SOURCE == "live" else config.AUDIO_SOURCE
+            self.audio_source = create_source(name)
+            config.SAMPLE_RATE = self.audio_source.sample_rate
+            self.audio_source.start()
+
+        self.audio_analyzer = AudioAnalyzer()
+
+        # Overlapping-window analysis with its own hop, if configured (mono
+        # layout only; split layouts analyze every chunk per channel)
+        self.sliding_analyzer = None
+        if config.ANALYSIS_HOP is not None and config.CHANNEL_LAYOUT == "mono":
+            self.sliding_analyzer = SlidingAnalyzer(self.audio_analyzer)
+
+    def _open_replay(self):
+        """Open the replay recording and adopt its band and channel counts."""
+        print(f"Opening recording {config.REPLAY_PATH}...")
+        self.replay = ReplaySource(
+            config.REPLAY_PATH, speed=config.REPLAY_SPEED, loop=config.REPLAY_LOOP
+        )
+        recording = self.replay.recording
+        config.NUM_FREQUENCY_BANDS = recording.num_bands
+        config.SAMPLE_RATE = recording.sample_rate
+        if recording.channels == 1:
+            config.CHANNEL_LAYOUT = "mono"
+        elif config.CHANNEL_LAYOUT == "mono":
+            config.CHANNEL_LAYOUT = "split"
+        print(
+            f"✓ {len(recording)} spectra, {recording.duration:.1f} s "
+            f"at {recording.rate:.1f} spectra/s"
+        )
 
-        # Initialize audio components
+    def _start_recording(self):
+        """Create the recording file for the spectra of this session."""
+        # Samples between spectra: the hop of the analysis that produces
+        # them, or a frame period when every frame analyzes the latest chunk.
+        # Frame-paced rows are also timestamped, see _frame_paced().
+        hop = round(config.SAMPLE_RATE / config.FPS_TARGET)
+        if self.replay is not None:
+            hop = self.replay.recording.hop
+        elif self.engine is not None and config.ANALYSIS_HOP is None:
+            hop = config.CHUNK_SIZE
+        elif (
+            self.engine is not None or self.sliding_analyzer is not None
+        ) and config.ANALYSIS_HOP != "frame":
+            hop = config.ANALYSIS_HOP
+
+        band_plan = get_band_plan(
+            config.CHUNK_SIZE,
+            config.SAMPLE_RATE,
+            config.NUM_FREQUENCY_BANDS,
+            config.MIN_FREQUENCY,
+            config.MAX_FREQUENCY,
+        )
+        try:
+            self.recorder = SpectrumRecorder(
+                config.RECORD_PATH,
+                config.NUM_FREQUENCY_BANDS,
+                hop,
+                config.SAMPLE_RATE,
+                band_edges=band_plan.edges,
+                channels=len(self.renderer.histories),
+                fmt=config.RECORD_FORMAT,
+            )
+        except (OSError, ValueError) as e:
+            print(f"⚠ Warning: Recording disabled: {e}")
+            return
+        self._record_start = time.perf_counter()
+        self._next_record_flush = self._record_start + config.RECORD_FLUSH_INTERVAL
+        print(f"✓ Recording spectra to {config.RECORD_PATH}")
+
+    def _frame_paced(self):
+        """
+        Return True if spectra come one per rendered frame.
+
+        Their spacing then follows the frame rate rather than a fixed hop,
+        so recorded rows carry the time they were analyzed at.
+        """
+        if self.replay is not None or self.engine is not None:
+            return False
+        return self.sliding_analyzer is None or config.ANALYSIS_HOP == "frame"
+
+    def _start_publishing(self):
+        """Open the sockets that spectra are published on."""
+        try:
+            self.publisher = SpectrumPublisher(
+                config.PUBLISH_TARGETS,
+                config.NUM_FREQUENCY_BANDS,
+                channels=len(self.renderer.histories),
+                batch=config.PUBLISH_BATCH,
+            )
+        except (OSError, ValueError) as e:
+            print(f"⚠ Warning: Publishing disabled: {e}")
+            return
+        print(f"✓ Publishing spectra to {', '.join(config.PUBLISH_TARGETS)}")
+
+    def _add_spectrum(self, spectrum):
+        """Add a spectrum to the display, the recording and the consumers."""
+        self.renderer.add_spectrum(spectrum)
+        if self.recorder is not None:
+            timestamp = None
+            if self._frame_paced():
+                timestamp = time.perf_counter() - self._record_start
+            self.recorder.append(spectrum, timestamp)
+        if self.publisher is not None:
+            self.publisher.publish(spectrum)
+
+    def _read_replay(self):
+        """Add the recorded spectra due this frame."""
+        spectra = self.replay.read(limit=self.renderer.history.span)
+        telemetry.lap("capture")
+        for spectrum in spectra:
+            self._add_spectrum(spectrum)
+        telemetry.lap("history")
+
+    def _seek_replay(self, offset):
+        """
+        Jump through the replay and refill the display history.
+
+        Args:
+            offset: Seconds to move, negative to go back
+        """
+        self.replay.seek(self.replay.time + offset)
+        self.renderer.clear_history()
+        for spectrum in self.replay.preceding(self.renderer.history.span):
+            self.renderer.add_spectrum(spectrum)
+        duration = self.replay.recording.duration
+        print(f"Replay at {self.replay.time:.1f} s of {duration:.1f} s")
+
+    def _set_replay_speed(self, speed):
+        """Change the replay speed within 1/16x to 16x."""
+        self.replay.set_speed(min(max(speed, 1 / 16), 16.0))
+        print(f"Replay speed {self.replay.speed:g}x")
+
+    def _handle_replay_key(self, key):
+        """Seek with Left/Right and change the speed with Up/Down."""
+        if key == pygame.K_LEFT:
+            self._seek_replay(-config.REPLAY_SEEK_STEP)
+        elif key == pygame.K_RIGHT:
+            self._seek_replay(config.REPLAY_SEEK_STEP)
+        elif key == pygame.K_UP:
+            self._set_replay_speed(self.replay.speed * 2)
+        elif key == pygame.K_DOWN:
+            self._set_replay_speed(self.replay.speed / 2)
+
+    def _on_config_change(self, changed):
+        """
+        Apply analysis setting changes outside the analyzer and renderer.
+
+        Args:
+            changed: Names of the changed settings
+
+        Raises:
+            ValueError: If a replay's band count would change
+        """
+        if self.replay is not None:
+            if config.NUM_FREQUENCY_BANDS != self.replay.recording.num_bands:
+                raise ValueError("the band count is set by the replayed recording")
+            return
+
+        # The analysis process works on a copy of the settings. Smoothing
+        # is passed on to the running worker; the band plan needs a restart.
+        if self.engine is not None and "SMOOTHING_FACTOR" in changed:
+            self.engine.set_smoothing(config.SMOOTHING_FACTOR)
+        if self.engine is not None and changed & set(BAND_FIELDS):
+            self.engine.stop()
+            self.engine = None
+            self._start_engine()
+            if self.engine is None:
+                self._init_audio()
+
+        if "NUM_FREQUENCY_BANDS" not in changed:
+            return
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            print("⚠ Recording stopped: the band count changed")
+        if self.publisher is not None:
+            self.publisher.close()
+            self._start_publishing()
+
+    def _start_capture(self):
+        """Start live capture, leaving self.audio_source None on failure."""
         print("Initializing audio capture...")
         try:
-            self.audio_capture = AudioCapture()
-            self.audio_analyzer = AudioAnalyzer()
-            self.use_audio = True
-
-            # Try to start audio capture
-            try:
-                self.audio_capture.start()
-                print("✓ Audio capture started successfully")
-            except RuntimeError as e:
-                print(f"⚠ Warning: {e}")
-                print("⚠ Running in demo mode with generated audio")
-                self.use_audio = False
+            capture = AudioCapture()
         except Exception as e:
             print(f"⚠ Warning: Failed to initialize audio: {e}")
             print("⚠ Running in demo mode with generated audio")
-            self.use_audio = False
-            self.audio_capture = None
-            self.audio_analyzer = AudioAnalyzer()
-
-        # Demo mode variables
-        self.demo_time = 0
-        self.demo_phase = 0
-
-    def _generate_demo_audio(self):
-        """Generate demo audio data for testing when no audio device is available."""
-        # Create a mix of sine waves at different frequencies
-        t = np.linspace(
-            self.demo_time,
-            self.demo_time + config.CHUNK_SIZE / config.SAMPLE_RATE,
-            config.CHUNK_SIZE,
-        )
+            return
 
-        # Base frequencies for demo
-        freq1 = 200 + 100 * np.sin(self.demo_phase)
-        freq2 = 800 + 400 * np.sin(self.demo_phase * 0.7)
-        freq3 = 3000 + 1000 * np.sin(self.demo_phase * 0.5)
-
-        # Generate mixed signal
-        audio = (
-            0.3 * np.sin(2 * np.pi * freq1 * t)
-            + 0.2 * np.sin(2 * np.pi * freq2 * t)
-            + 0.15 * np.sin(2 * np.pi * freq3 * t)
-        )
-
-        # Add some randomness
-        audio += 0.05 * np.random.randn(config.CHUNK_SIZE)
-
-        self.demo_time += config.CHUNK_SIZE / config.SAMPLE_RATE
-        self.demo_phase += 0.05
-
-        return audio.astype(np.float32)
+        try:
+            capture.start()
+        except RuntimeError as e:
+            print(f"⚠ Warning: {e}")
+            print("⚠ Running in demo mode with generated audio")
+            capture.close()
+            return
+
+        self.audio_source = capture
+        self.use_audio = True
+        config.SAMPLE_RATE = capture.sample_rate
+        print("✓ Audio capture started successfully")
+        if capture.factor > 1:
+            print(
+                f"✓ Capturing at {capture.device_rate} Hz, analyzing at "
+                f"{capture.sample_rate} Hz ({capture.factor}x decimation)"
+            )
+
+    def _start_engine(self):
+        """Start the analysis process, leaving self.engine None on failure."""
+        print("Starting analysis process...")
+        engine = AnalysisEngine()
+        try:
+            engine.start()
+        except RuntimeError as e:
+            print(f"⚠ Warning: {e}")
+            print("⚠ Falling back to in-process analysis")
+            return
+
+        self.engine = engine
+        self.use_audio = True
+        self.audio_source = None
+        self.audio_analyzer = None
+        self.sliding_analyzer = None
+        config.SAMPLE_RATE = engine.sample_rate
+        print("✓ Analysis process started successfully")
+
+    def _stop_engine(self):
+        """Stop the analysis process after it crashed and analyze in-process."""
+        print(f"⚠ Warning: Analysis process stopped: {self.engine.error}")
+        print("⚠ Falling back to in-process analysis")
+        self.engine.stop()
+        self.engine = None
+        self._init_audio()
+
+    def _process_audio(self):
+        """Capture and analyze the audio for one frame in this process."""
+        # Get audio data
+        if self.sliding_analyzer is not None:
+            audio_data = self.audio_source.read_available()
+        else:
+            audio_data = self.audio_source.read_chunk()
+        telemetry.lap("capture")
+
+        # Analyze audio
+        if self.sliding_analyzer is not None:
+            for spectrum in self.sliding_analyzer.push(audio_data):
+                self._add_spectrum(spectrum)
+        elif audio_data is not None and config.CHANNEL_LAYOUT != "mono":
+            spectra = self.audio_analyzer.analyze_channels(
+                audio_data, config.CHANNEL_LAYOUT
+            )
+            self._add_spectrum(spectra)
+        elif audio_data is not None:
+            spectrum = self.audio_analyzer.analyze(audio_data)
+            self._add_spectrum(spectrum)
+        telemetry.lap("history")
+
+    def _govern_quality(self, frame_start):
+        """
+        Feed the frame work time to the governor and apply level changes.
+
+        Args:
+            frame_start: perf_counter() value at the start of the frame
+        """
+        work_time = time.perf_counter() - frame_start
+        if config.VSYNC:
+            # Waiting for the vertical blank is idle time, not load
+            work_time -= self.renderer.flip_time
+        if not self.governor.update(work_time):
+            return
+
+        level = self.governor.level
+        name = self.governor.settings["name"]
+        if level > self.renderer.quality_level:
+            print(f"⚠ Frame time over budget, quality lowered to {level} ({name})")
+        else:
+            print(f"✓ Frame time recovered, quality raised to {level} ({name})")
+        self.renderer.set_quality(level)
 
     def run(self):
         """Run the main application loop."""
@@ -92,41 +415,83 @@ class Visualizer:
         print("\n" + "=" * 50)
         print("Viz is running!")
         print("=" * 50)
-        if not self.use_audio:
+        if self.replay is not None:
+            print(f"Mode: REPLAY of {config.REPLAY_PATH}")
+        elif config.AUDIO_SOURCE != "live":
+            print(f"Mode: {config.AUDIO_SOURCE.upper()} source")
+        elif not self.use_audio:
             print("Mode: DEMO (no audio device connected)")
+        elif self.engine is not None:
+            print("Mode: LIVE AUDIO (analysis process)")
         else:
             print("Mode: LIVE AUDIO")
         print("\nControls:")
+        print(f"  - {config.TELEMETRY_OVERLAY_KEY.upper()}: toggle frame timings")
+        for key, (name, step, _, _) in config.KEY_BINDINGS.items():
+            print(f"  - {key}: {name} {step:+g}")
+        if self.replay is not None:
+            print("  - Left/Right: seek, Up/Down: replay speed")
         print("  - Close window or press Ctrl+C to exit")
         print("=" * 50 + "\n")
 
         try:
             while self.running:
+                frame_start = time.perf_counter()
+                telemetry.begin_frame()
+
                 # Handle events
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         self.running = False
                     elif event.type == pygame.KEYDOWN:
+                        name = pygame.key.name(event.key)
                         if event.key == pygame.K_ESCAPE:
                             self.running = False
-
-                # Get audio data
-                if self.use_audio and self.audio_capture:
-                    audio_data = self.audio_capture.read_chunk()
+                        elif name == config.TELEMETRY_OVERLAY_KEY:
+                            telemetry.toggle_overlay()
+                        elif name in config.KEY_BINDINGS:
+                            runtime.handle_key(name)
+                        elif self.replay is not None:
+                            self._handle_replay_key(event.key)
+
+                # Apply an edited settings file
+                runtime.poll()
+                telemetry.lap("events")
+
+                # Get spectra from a recording, the analysis process or
+                # analyze here
+                if self.replay is not None:
+                    self._read_replay()
+                elif self.engine is not None:
+                    spectra = self.engine.read()
+                    telemetry.lap("capture")
+                    if spectra is None:
+                        self._stop_engine()
+                    else:
+                        for spectrum in spectra:
+                            self._add_spectrum(spectrum)
+                    telemetry.lap("history")
                 else:
-                    # Use demo audio
-                    audio_data = self._generate_demo_audio()
+                    self._process_audio()
+
+                # Send spectra held for a partial batch
+                if self.publisher is not None:
+                    self.publisher.flush()
 
-                # Analyze audio
-                if audio_data is not None:
-                    spectrum = self.audio_analyzer.analyze(audio_data)
-                    self.renderer.add_spectrum(spectrum)
+                # Let replays of the file being recorded catch up
+                if self.recorder is not None and frame_start >= self._next_record_flush:
+                    self.recorder.flush()
+                    self._next_record_flush = frame_start + config.RECORD_FLUSH_INTERVAL
 
                 # Render frame
                 self.renderer.render()
+                if self.governor is not None:
+                    self._govern_quality(frame_start)
 
                 # Maintain target FPS
                 self.clock.tick(config.FPS_TARGET)
+                telemetry.lap("pacing")
+                telemetry.end_frame()
 
         except KeyboardInterrupt:
             print("\n\nReceived interrupt signal...")
@@ -141,12 +506,32 @@ class Visualizer:
     def shutdown(self):
         """Clean up and shut down the application."""
         print("Shutting down...")
+        telemetry.close()
+
+        # Finish the recording and release the replay
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"✓ Recorded {self.recorder.count} spectra")
+        if self.replay is not None:
+            self.replay.close()
+        if self.publisher is not None:
+            self.publisher.close()
+            print(
+                f"✓ Published {self.publisher.sequence} spectra "
+                f"({self.publisher.dropped} datagrams dropped)"
+            )
+
+        # Stop the analysis process
+        if self.engine is not None:
+            self.engine.stop()
+            print("✓ Analysis process stopped")
 
         # Stop audio
-        if self.audio_capture:
+        if self.audio_source:
             try:
-                self.audio_capture.close()
-                print("✓ Audio capture closed")
+                self.audio_source.close()
+                if self.use_audio:
+                    print("✓ Audio capture closed")
             except Exception as e:
                 print(f"⚠ Error closing audio: {e}")
 
@@ -160,15 +545,40 @@ class Visualizer:
         print("Goodbye!")
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="viz", description="Real-time 3D audio spectrum visualizer."
+    )
+    parser.add_argument(
+        "--config",
+        default=config.CONFIG_FILE,
+        help="TOML or JSON settings file, applied live when it changes",
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="print the time spent in each startup phase",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main entry point for the visualizer application."""
+    profile = StartupProfile(start=IMPORT_STARTED)
+    profile.mark("imports")
+    args = parse_args(argv)
+    config.CONFIG_FILE = args.config
+
     print("\n" + "=" * 50)
     print("Viz - 3D Audio Visualizer")
     print("=" * 50)
     print("Initializing...\n")
 
     try:
-        app = Visualizer()
+        app = Visualizer(profile)
+        if args.startup_profile:
+            profile.report()
         app.run()
     except Exception as e:
         print(f"\nFatal error: {e}")
@@ -0,0 +1,3 @@
+"""Spectrum publishing to external consumers over local sockets."""
+
+__all__ = ["protocol", "publisher", "subscriber"]
@@ -0,0 +1,131 @@
+"""
+Wire format and addresses of published spectra.
+"""
+import ipaddress
+import socket
+import struct
+import numpy as np
+
+# A datagram holds a batch of consecutive spectra:
+#   header (24 bytes): magic, version, count, channels, bands, first sequence
+#   timestamps: count float64 seconds since the epoch, one per spectrum
+#   spectra: count * channels * bands float32 amplitudes
+# All fields are little-endian and every section is 8-byte aligned, so a
+# receiver can view the sections in place with np.frombuffer.
+MAGIC = b"VZSP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHH4xQ")
+
+# Largest UDP payload, also the most sent over a Unix datagram socket
+MAX_DATAGRAM = 65507
+
+
+def datagram_size(count, channels, num_bands):
+    """
+    Return the size of a datagram in bytes.
+
+    Args:
+        count: Spectra in the datagram
+        channels: Spectra per frame
+        num_bands: Bands per spectrum
+
+    Returns:
+        Datagram size in bytes
+    """
+    return HEADER.size + count * (8 + channels * num_bands * 4)
+
+
+def max_datagram(sock):
+    """
+    Return the largest datagram a socket can send.
+
+    Unix datagrams must fit in the socket's send buffer, which is only
+    2048 bytes by default on macOS (net.local.dgram.maxdgram) and far
+    larger on Linux.
+
+    Args:
+        sock: Datagram socket
+
+    Returns:
+        Size limit in bytes
+    """
+    if sock.family != socket.AF_UNIX:
+        return MAX_DATAGRAM
+    return min(MAX_DATAGRAM, sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF))
+
+
+def max_batch(channels, num_bands, limit=MAX_DATAGRAM):
+    """Return the most spectra that fit in a datagram of at most limit bytes."""
+    return (limit - HEADER.size) // (8 + channels * num_bands * 4)
+
+
+def unpack(buffer, size=None):
+    """
+    Decode a datagram without copying its spectra.
+
+    Args:
+        buffer: Bytes-like object holding the datagram
+        size: Number of valid bytes in buffer (default: all of it)
+
+    Returns:
+        Tuple of (sequences, timestamps, spectra): uint64 sequence numbers,
+        float64 timestamps and float32 spectra of shape (count, channels,
+        bands), the last two viewing buffer
+
+    Raises:
+        ValueError: If the datagram is malformed
+    """
+    if size is None:
+        size = len(buffer)
+    if size < HEADER.size:
+        raise ValueError(f"Datagram too short: {size} bytes")
+    magic, version, count, channels, num_bands, first = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a spectrum datagram")
+    if size != datagram_size(count, channels, num_bands):
+        raise ValueError(f"Datagram size {size} does not match its header")
+
+    timestamps = np.frombuffer(buffer, dtype="<f8", count=count, offset=HEADER.size)
+    spectra = np.frombuffer(
+        buffer,
+        dtype="<f4",
+        count=count * channels * num_bands,
+        offset=HEADER.size + 8 * count,
+    ).reshape(count, channels, num_bands)
+    sequences = first + np.arange(count, dtype=np.uint64)
+    return sequences, timestamps, spectra
+
+
+def parse_address(address):
+    """
+    Parse a publish target or subscribe address.
+
+    Args:
+        address: "udp://HOST:PORT" or "unix://PATH"
+
+    Returns:
+        Tuple of (socket family, socket address)
+
+    Raises:
+        ValueError: If the address has an unknown scheme
+    """
+    scheme, _, rest = address.partition("://")
+    if scheme == "udp":
+        host, _, port = rest.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if scheme == "unix":
+        return socket.AF_UNIX, rest
+    raise ValueError(f"Unknown address scheme: {address}")
+
+
+def format_address(family, address):
+    """Return the address string of a socket address."""
+    if family == socket.AF_UNIX:
+        return f"unix://{address}"
+    host, port = address[:2]
+    return f"udp://{host}:{port}"
+
+
+def is_multicast(host):
+    """Return True if a host name or address is an IPv4 multicast group."""
+    return ipaddress.ip_address(socket.gethostbyname(host)).is_multicast
@@ -0,0 +1,160 @@
+"""
+Publishes spectra to local consumers as UDP or Unix datagrams.
+"""
+import socket
+import time
+import numpy as np
+
+from . import protocol
+
+
+class SpectrumPublisher:
+    """
+    Sends every spectrum to a set of targets, one analysis for all of them.
+
+    Spectra go out as packed binary datagrams (see protocol). Each datagram
+    is packed once and sent to every target with a scatter-gather
+    sendmsg() of the header, the timestamps and the NumPy spectrum memory,
+    so spectra are never serialized to bytes. A UDP multicast group reaches
+    any number of subscribers with a single send.
+
+    Sockets are non-blocking: a datagram that cannot be sent right away, or
+    that has no listener, is dropped and counted rather than stalling the
+    render loop. The first failure of every target is printed.
+    """
+
+    def __init__(self, targets, num_bands, channels=1, batch=1):
+        """
+        Open sockets for the targets.
+
+        Args:
+            targets: Addresses like "udp://127.0.0.1:5005" or
+                "unix:///tmp/viz.sock"
+            num_bands: Bands per spectrum
+            channels: Spectra per frame, one per waterfall
+            batch: Most frames per datagram; frames are held until the batch
+                is full or flush() is called
+
+        Raises:
+            ValueError: If an address is invalid or a batch of spectra does
+                not fit in one datagram of every target
+        """
+        self.num_bands = num_bands
+        self.channels = channels
+        self.batch = batch
+        self.sequence = 0  # sequence number of the next spectrum
+        self.sent = 0  # datagrams sent, summed over targets
+        self.dropped = 0  # datagrams dropped, summed over targets
+
+        self._targets = []
+        self._sockets = {}
+        for target in targets:
+            family, address = protocol.parse_address(target)
+            if family not in self._sockets:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                self._sockets[family] = sock
+            if family == socket.AF_INET and protocol.is_multicast(address[0]):
+                # Keep multicast on the local network, including this host
+                sock = self._sockets[family]
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            self._targets.append((self._sockets[family], address))
+        self._reported = set()  # targets whose send failure was printed
+
+        # Unix datagrams are limited by the send buffer; raise it to fit a
+        # full batch where the system allows
+        size = protocol.datagram_size(batch, channels, num_bands)
+        limit = protocol.MAX_DATAGRAM
+        for sock in self._sockets.values():
+            if protocol.max_datagram(sock) < size:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, size)
+                except OSError:
+                    pass
+            limit = min(limit, protocol.max_datagram(sock))
+        most = protocol.max_batch(channels, num_bands, limit)
+        if batch < 1 or batch > most:
+            for sock in self._sockets.values():
+                sock.close()
+            raise ValueError(
+                f"Batch of {batch} spectra does not fit in a datagram "
+                f"of {limit} bytes (at most {most})"
+            )
+
+        self._header = bytearray(protocol.HEADER.size)
+        self._timestamps = np.empty(batch, dtype="<f8")
+        self._spectra = np.empty((batch, channels, num_bands), dtype="<f4")
+        self._count = 0  # frames held for the next datagram
+
+    def publish(self, spectrum, timestamp=None):
+        """
+        Queue a spectrum and send the batch once it is full.
+
+        Args:
+            spectrum: NumPy array of num_bands amplitudes, or of shape
+                (channels, num_bands)
+            timestamp: Capture time in seconds since the epoch
+                (default: now)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if self.batch == 1:
+            # Send straight from the caller's array
+            self._timestamps[0] = timestamp
+            spectrum = np.ascontiguousarray(spectrum, dtype="<f4")
+            self._send(1, spectrum)
+            return
+
+        self._timestamps[self._count] = timestamp
+        self._spectra[self._count] = spectrum
+        self._count += 1
+        if self._count == self.batch:
+            self.flush()
+
+    def flush(self):
+        """Send the frames held for a partial batch."""
+        if self._count > 0:
+            count = self._count
+            self._count = 0
+            self._send(count, self._spectra[:count])
+
+    def _send(self, count, spectra):
+        """
+        Send one datagram to every target.
+
+        Args:
+            count: Frames in the datagram
+            spectra: Contiguous float32 array of the frames' spectra
+        """
+        protocol.HEADER.pack_into(
+            self._header,
+            0,
+            protocol.MAGIC,
+            protocol.VERSION,
+            count,
+            self.channels,
+            self.num_bands,
+            self.sequence,
+        )
+        self.sequence += count
+        buffers = [self._header, self._timestamps[:count], spectra]
+
+        for sock, address in self._targets:
+            try:
+                sock.sendmsg(buffers, (), 0, address)
+                self.sent += 1
+            except OSError as e:
+                # Full socket buffer, or no subscriber bound to the address
+                self.dropped += 1
+                if address not in self._reported:
+                    self._reported.add(address)
+                    print(f"⚠ Publishing to {address} failed, dropping: {e}")
+
+    def close(self):
+        """Send held frames and close the sockets."""
+        self.flush()
+        for sock in self._sockets.values():
+            sock.close()
+        self._sockets = {}
+        self._targets = []
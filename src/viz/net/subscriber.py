@@ -0,0 +1,169 @@
+"""
+Reference subscriber for published spectra (viz-subscribe).
+"""
+import argparse
+import os
+import socket
+import struct
+import sys
+import time
+import numpy as np
+
+from . import protocol
+
+
+class SpectrumSubscriber:
+    """
+    Receives spectrum datagrams on a UDP port or Unix socket path.
+
+    Datagrams are received into one reusable buffer and decoded in place,
+    so the arrays returned by receive() are only valid until the next call.
+    Gaps in the sequence numbers are counted as lost spectra.
+    """
+
+    def __init__(self, address, timeout=None):
+        """
+        Bind the socket.
+
+        Args:
+            address: "udp://HOST:PORT" (port 0 picks a free one, a multicast
+                group joins it) or "unix://PATH"
+            timeout: Seconds receive() waits for a datagram, None to wait
+                forever
+        """
+        family, bind_address = protocol.parse_address(address)
+        self.family = family
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        self._path = None
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(bind_address):
+                os.unlink(bind_address)
+            self._path = bind_address
+            # A Unix datagram must fit in the receive buffer, which is only a
+            # few KB by default on macOS
+            try:
+                self.sock.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * protocol.MAX_DATAGRAM
+                )
+            except OSError:
+                pass
+        else:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if protocol.is_multicast(bind_address[0]):
+                # Join the group on any interface, so several subscribers on
+                # this host can share the port
+                if hasattr(socket, "SO_REUSEPORT"):
+                    self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                group = socket.inet_aton(socket.gethostbyname(bind_address[0]))
+                membership = struct.pack("4s4s", group, socket.inet_aton("0.0.0.0"))
+                self.sock.setsockopt(
+                    socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership
+                )
+        self.sock.bind(bind_address)
+        self.sock.settimeout(timeout)
+        self.address = protocol.format_address(family, self.sock.getsockname())
+
+        self._buffer = bytearray(protocol.MAX_DATAGRAM)
+        self.received = 0  # spectra received
+        self.lost = 0  # spectra missing from the sequence
+        self._next_sequence = None
+
+    def receive(self):
+        """
+        Wait for the next datagram.
+
+        Returns:
+            Tuple of (sequences, timestamps, spectra) as in protocol.unpack,
+            or None if the timeout expired or the datagram was malformed
+        """
+        try:
+            size = self.sock.recv_into(self._buffer)
+        except TimeoutError:
+            return None
+        try:
+            sequences, timestamps, spectra = protocol.unpack(self._buffer, size)
+        except ValueError:
+            return None
+
+        first = int(sequences[0]) if len(sequences) else None
+        if first is not None:
+            if self._next_sequence is not None and first > self._next_sequence:
+                self.lost += first - self._next_sequence
+            self._next_sequence = first + len(sequences)
+        self.received += len(sequences)
+        return sequences, timestamps, spectra
+
+    def close(self):
+        """Close the socket and remove a Unix socket file."""
+        self.sock.close()
+        if self._path is not None and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="viz-subscribe",
+        description="Receive published Viz spectra and report rate, loss and latency.",
+    )
+    parser.add_argument(
+        "address",
+        nargs="?",
+        default="udp://127.0.0.1:5005",
+        help='"udp://HOST:PORT" or "unix://PATH" (default: udp://127.0.0.1:5005)',
+    )
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between reports"
+    )
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point for the reference subscriber."""
+    args = parse_args(argv)
+    subscriber = SpectrumSubscriber(args.address, timeout=args.interval)
+    print(f"Listening on {subscriber.address}", file=sys.stderr)
+
+    start = time.perf_counter()
+    last_report = start
+    latencies = []
+    spectra_since = 0
+    try:
+        while args.duration is None or time.perf_counter() - start < args.duration:
+            packet = subscriber.receive()
+            if packet is not None:
+                _, timestamps, spectra = packet
+                latencies.extend((time.time() - timestamps).tolist())
+                spectra_since += len(spectra)
+
+            now = time.perf_counter()
+            if now - last_report >= args.interval:
+                line = f"{spectra_since / (now - last_report):8.1f} spectra/s  "
+                line += f"lost {subscriber.lost}"
+                if latencies:
+                    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+                    line += f"  latency p50 {p50:.3f} ms  p99 {p99:.3f} ms"
+                print(line)
+                latencies = []
+                spectra_since = 0
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+    print(
+        f"✓ {subscriber.received} spectra received, {subscriber.lost} lost",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Headless offline renderer: turns an audio file into visualizer frames.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Keep pygame's import banner out of stdout, which may carry raw frames
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from .audio.analyzer import AudioAnalyzer
+from .audio.files import RAW_FORMATS, AudioFileReader
+from .audio.sliding import SlidingAnalyzer
+from .graphics.renderer import Renderer
+from .utils import config
+
+
+def log(message):
+    """Print a status message without touching stdout (used for frames)."""
+    print(message, file=sys.stderr)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="viz-render",
+        description="Render an audio file to visualizer frames without a display.",
+    )
+    parser.add_argument("input", help="WAV file, or raw PCM with --raw")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="frames",
+        help="directory for the PNG sequence, or '-' for raw RGB on stdout",
+    )
+    parser.add_argument(
+        "--fps", type=float, default=config.FPS_TARGET, help="video frame rate"
+    )
+    parser.add_argument("--width", type=int, default=config.WINDOW_WIDTH)
+    parser.add_argument("--height", type=int, default=config.WINDOW_HEIGHT)
+    parser.add_argument(
+        "--raw", choices=sorted(RAW_FORMATS), help="read headerless PCM samples"
+    )
+    parser.add_argument(
+        "--rate", type=int, default=config.SAMPLE_RATE, help="raw PCM sample rate"
+    )
+    parser.add_argument(
+        "--channels", type=int, default=config.CHANNELS, help="raw PCM channels"
+    )
+    parser.add_argument(
+        "--max-frames", type=int, default=None, help="stop after this many frames"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["lines", "scrolling", "raster"],
+        default=config.RENDER_BACKEND,
+        help="waterfall renderer",
+    )
+    parser.add_argument(
+        "--show-ui", action="store_true", help="draw the FPS/buffer overlay"
+    )
+    return parser.parse_args(argv)
+
+
+def render_file(args):
+    """
+    Render every video frame of an audio file.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Number of frames written
+    """
+    reader = AudioFileReader(
+        args.input, raw_format=args.raw, sample_rate=args.rate, channels=args.channels
+    )
+
+    # Configure before the analysis and graphics modules build their state
+    config.SAMPLE_RATE = reader.sample_rate
+    config.WINDOW_WIDTH = args.width
+    config.WINDOW_HEIGHT = args.height
+    config.VSYNC = False
+    config.RENDER_BACKEND = args.backend
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    pygame.init()
+    renderer = Renderer(show_ui=args.show_ui)
+    analyzer = SlidingAnalyzer(AudioAnalyzer(), hop="frame")
+
+    to_stdout = args.output == "-"
+    if not to_stdout:
+        output_dir = Path(args.output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+    stdout = sys.stdout.buffer
+
+    samples_per_frame = reader.sample_rate / args.fps
+    consumed = 0
+    frame = 0
+    log(
+        f"Rendering {args.input} ({reader.duration:.1f}s, {reader.sample_rate} Hz, "
+        f"{reader.channels} ch) at {args.fps:g} fps"
+    )
+
+    start = time.perf_counter()
+    try:
+        while args.max_frames is None or frame < args.max_frames:
+            # Audio up to the end of this video frame
+            target = round((frame + 1) * samples_per_frame)
+            block = reader.read(target - consumed)
+            if len(block) == 0:
+                break
+            consumed += len(block)
+
+            for spectrum in analyzer.push(block):
+                renderer.add_spectrum(spectrum)
+            renderer.render()
+
+            if to_stdout:
+                stdout.write(pygame.image.tobytes(renderer.screen, "RGB"))
+            else:
+                pygame.image.save(
+                    renderer.screen, output_dir / f"frame_{frame:06d}.png"
+                )
+            frame += 1
+    finally:
+        reader.close()
+        pygame.quit()
+
+    elapsed = time.perf_counter() - start
+    if frame > 0 and elapsed > 0:
+        realtime = (consumed / reader.sample_rate) / elapsed
+        log(
+            f"Rendered {frame} frames in {elapsed:.2f}s "
+            f"({frame / elapsed:.1f} fps, {realtime:.1f}x real time)"
+        )
+    return frame
+
+
+def main(argv=None):
+    """Entry point for the offline renderer."""
+    args = parse_args(argv)
+    try:
+        render_file(args)
+    except BrokenPipeError:
+        # The consumer of the raw frames went away
+        sys.exit(0)
+    except (OSError, ValueError, EOFError) as e:
+        log(f"Error: {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
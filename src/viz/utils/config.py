@@ -6,10 +6,39 @@ Configuration settings for the Viz audio visualizer.
 SAMPLE_RATE = 44100  # Hz
 CHUNK_SIZE = 2048  # samples per buffer
 CHANNELS = 2  # stereo
+CAPTURE_MODE = "callback"  # "callback" (non-blocking ring buffer) or "blocking"
+CAPTURE_BUFFER_SIZE = 16384  # frames held by the capture ring buffer
+CAPTURE_BLOCK_SIZE = 512  # frames per stream callback
+CAPTURE_SAMPLE_RATE = None  # Hz, "native" (device default) or None (SAMPLE_RATE)
+CAPTURE_DECIMATE = True  # decimate rates above 2.2x MAX_FREQUENCY before the FFT
+DEVICE_CACHE_PATH = "~/.cache/viz/audio_device.json"  # remembered device, None off
+AUDIO_SOURCE = "live"  # "live" (demo if no device), "demo", "file", "sweep",
+# "pink", "impulses" or "multitone"
+AUDIO_FILE = None  # WAV file played when AUDIO_SOURCE is "file"
+
+# Recording and replay
+RECORD_PATH = None  # file every displayed spectrum is recorded to
+RECORD_FORMAT = "uint8"  # recorded rows: "uint8", "uint16" or "float16"
+RECORD_FLUSH_INTERVAL = 0.5  # seconds between flushes for replays of a live file
+REPLAY_PATH = None  # recording shown instead of live audio, no analysis
+REPLAY_SPEED = 1.0  # replay speed, 1.0 = real time
+REPLAY_LOOP = False  # start the replay over at the end
+REPLAY_SEEK_STEP = 5.0  # seconds skipped by the Left and Right keys
+
+# Spectrum publishing
+PUBLISH_TARGETS = ()  # addresses every spectrum is sent to, e.g.
+# "udp://127.0.0.1:5005", "unix:///tmp/viz.sock" or a UDP multicast group
+PUBLISH_BATCH = 1  # most spectra per datagram; held spectra go out every frame
 
 # Visualization Settings
 NUM_FREQUENCY_BANDS = 64  # number of frequency bins to display
 TIME_HISTORY_LENGTH = 80  # number of time slices to keep
+HISTORY_LEVELS = 1  # >1 splits the slices into levels of ever coarser time slices
+HISTORY_DECIMATION = 2  # slices of a level pooled into one slice of the next
+HISTORY_POOLING = "max"  # pooling of coarser levels: "max" (keeps peaks) or "mean"
+HISTORY_MERGE_BANDS = False  # also pool pairs of bands from one level to the next
+CHANNEL_LAYOUT = "mono"  # "mono", "split" (one waterfall per channel) or
+# "midside" (mid and side waterfalls of the first two channels)
 FPS_TARGET = 60  # target frames per second
 
 # Display Settings
@@ -20,6 +49,7 @@ WINDOW_TITLE = "Viz - 3D Audio Visualizer"
 # Visual Style
 LINE_COLOR = (173, 216, 230)  # pale blue (ADD8E6)
 LINE_THICKNESS = 2  # pixels
+FADE_STEPS = 32  # colour bands of the line fade, one connector draw call each
 BACKGROUND_COLOR = (10, 10, 20)  # dark blue-black
 
 # Isometric Projection Settings
@@ -32,7 +62,49 @@ SCALE_Z = 8  # pixels per time slice
 MIN_FREQUENCY = 20  # Hz
 MAX_FREQUENCY = 20000  # Hz
 SMOOTHING_FACTOR = 0.7  # 0-1, higher = more smoothing
+REALTIME_ANALYSIS = True  # float32 analysis into reusable buffers
+ANALYSIS_HOP = None  # samples between spectra, "frame" = one per render frame,
+# None = one spectrum per CHUNK_SIZE read
+ANALYSIS_ENGINE = "inprocess"  # "process" runs capture and analysis in a worker
+ENGINE_RING_SIZE = 256  # spectra held in the engine's shared memory ring
+ENGINE_START_TIMEOUT = 5.0  # seconds to wait for the worker's audio stream
 
 # Performance
 USE_HARDWARE_ACCELERATION = True
+RENDER_BACKEND = "lines"  # "lines", "scrolling" (cached slices) or "raster" (NumPy)
+RASTER_STYLE = "filled"  # raster backend: "filled" heightmap or "lines" wireframe
+RASTER_FILL_SHADE = 0.35  # brightness of the filled surface relative to its line
 VSYNC = True
+DIRTY_RECTS = False  # clear and present only the regions that changed
+STARTUP_BUDGET = 0.5  # seconds to a visible window, flagged by --startup-profile
+
+# Adaptive quality
+QUALITY_GOVERNOR = True  # lower the detail when frames overrun FPS_TARGET
+QUALITY_MAX_LEVEL = 5  # lowest detail allowed, index into QUALITY_LEVELS
+QUALITY_DEGRADE_LOAD = 0.9  # frame budget fraction above which detail drops
+QUALITY_RECOVER_LOAD = 0.6  # frame budget fraction below which detail returns
+QUALITY_DEGRADE_DELAY = 0.5  # seconds of overload before dropping a level
+QUALITY_RECOVER_DELAY = 3.0  # seconds of headroom before raising a level
+QUALITY_SETTLE_TIME = 1.0  # seconds to measure a new level before judging it
+QUALITY_SMOOTHING = 0.1  # weight of the newest frame in the smoothed load
+QUALITY_NEAR_FRACTION = 0.25  # newest part of the history never decimated
+
+# Live configuration
+CONFIG_FILE = None  # TOML or JSON settings file, applied live when it changes
+CONFIG_RELOAD_INTERVAL = 0.5  # seconds between checks of CONFIG_FILE
+KEY_BINDINGS = {  # pygame key name -> (setting, step, minimum, maximum)
+    "=": ("SCALE_Y", 1, 1, 20),
+    "-": ("SCALE_Y", -1, 1, 20),
+    "]": ("NUM_FREQUENCY_BANDS", 16, 16, 512),
+    "[": ("NUM_FREQUENCY_BANDS", -16, 16, 512),
+    ".": ("SMOOTHING_FACTOR", 0.05, 0.0, 0.95),
+    ",": ("SMOOTHING_FACTOR", -0.05, 0.0, 0.95),
+}
+
+# Telemetry
+TELEMETRY_ENABLED = False  # collect per-stage frame timings from startup
+TELEMETRY_WINDOW = 600  # frames in the rolling percentile window
+TELEMETRY_OVERLAY_KEY = "f3"  # pygame key name that toggles the timing overlay
+TELEMETRY_OVERLAY_REFRESH_MS = 500  # overlay text refresh interval
+TELEMETRY_EXPORT_PATH = None  # .jsonl or .csv file for periodic export
+TELEMETRY_EXPORT_INTERVAL = 1.0  # seconds between exports
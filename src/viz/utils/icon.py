@@ -3,17 +3,24 @@ Application icon generation for the Viz visualizer.
 """
 import pygame
 
+# Icons already drawn in this process, by size
+_icons = {}
+
 
 def create_app_icon(size=64):
     """
     Create a simple application icon for the window.
 
+    The icon is drawn once per size and reused afterwards.
+
     Args:
         size: Icon size in pixels (default 64x64)
 
     Returns:
         pygame.Surface with the icon
     """
+    if size in _icons:
+        return _icons[size]
     icon = pygame.Surface((size, size))
     icon.fill((10, 10, 20))  # Dark background
 
@@ -59,4 +66,5 @@ def create_app_icon(size=64):
         )
         icon.blit(glow_surface, (x_offset - 2, y_start - 2))
 
+    _icons[size] = icon
     return icon
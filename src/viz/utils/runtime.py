@@ -0,0 +1,352 @@
+"""
+Live settings: validated config changes, change listeners and hot reload.
+"""
+import json
+import os
+import time
+import tomllib
+import weakref
+from . import config
+
+# Settings that can change while running. Subsystems subscribe to the ones
+# they depend on and rebuild only what those settings feed into; all other
+# settings are read once at startup.
+LIVE_FIELDS = frozenset(
+    {
+        # Analysis: band plan, analyzer buffers and smoothing
+        "NUM_FREQUENCY_BANDS",
+        "MIN_FREQUENCY",
+        "MAX_FREQUENCY",
+        "SMOOTHING_FACTOR",
+        # Display: histories, projections, layers and fade colours
+        "TIME_HISTORY_LENGTH",
+        "HISTORY_LEVELS",
+        "HISTORY_DECIMATION",
+        "HISTORY_POOLING",
+        "HISTORY_MERGE_BANDS",
+        "ISO_ANGLE",
+        "SCALE_X",
+        "SCALE_Y",
+        "SCALE_Z",
+        "LINE_COLOR",
+        "LINE_THICKNESS",
+        "FADE_STEPS",
+        "BACKGROUND_COLOR",
+        "RENDER_BACKEND",
+        "RASTER_STYLE",
+        "RASTER_FILL_SHADE",
+        # Read every frame
+        "QUALITY_DEGRADE_LOAD",
+        "QUALITY_RECOVER_LOAD",
+        "QUALITY_SMOOTHING",
+        "QUALITY_NEAR_FRACTION",
+        "DIRTY_RECTS",
+        "REPLAY_SEEK_STEP",
+        "TELEMETRY_OVERLAY_REFRESH_MS",
+    }
+)
+
+# Valid range of live numeric settings: name -> (minimum, maximum), None for
+# no bound. KEY_BINDINGS steps within tighter limits of their own.
+FIELD_LIMITS = {
+    "NUM_FREQUENCY_BANDS": (1, 4096),
+    "MIN_FREQUENCY": (1, None),
+    "MAX_FREQUENCY": (1, None),
+    "SMOOTHING_FACTOR": (0.0, 1.0),
+    "TIME_HISTORY_LENGTH": (1, None),
+    "HISTORY_LEVELS": (1, None),
+    "HISTORY_DECIMATION": (2, None),
+    "ISO_ANGLE": (0, 90),
+    "SCALE_X": (1, None),
+    "SCALE_Y": (1, None),
+    "SCALE_Z": (1, None),
+    "LINE_THICKNESS": (1, None),
+    "FADE_STEPS": (1, None),
+    "RASTER_FILL_SHADE": (0.0, 1.0),
+    "QUALITY_DEGRADE_LOAD": (0.0, None),
+    "QUALITY_RECOVER_LOAD": (0.0, None),
+    "QUALITY_SMOOTHING": (0.0, 1.0),
+    "QUALITY_NEAR_FRACTION": (0.0, 1.0),
+    "REPLAY_SEEK_STEP": (0.0, None),
+    "TELEMETRY_OVERLAY_REFRESH_MS": (0, None),
+}
+
+# Settings that take one of a few names: name -> allowed values
+FIELD_CHOICES = {
+    "CAPTURE_MODE": ("callback", "blocking"),
+    "RECORD_FORMAT": ("uint8", "uint16", "float16"),
+    "HISTORY_POOLING": ("max", "mean"),
+    "CHANNEL_LAYOUT": ("mono", "split", "midside"),
+    "ANALYSIS_ENGINE": ("inprocess", "process"),
+    "RENDER_BACKEND": ("lines", "scrolling", "raster"),
+    "RASTER_STYLE": ("filled", "lines"),
+}
+
+# RGB settings, three components from 0 to 255
+COLOR_FIELDS = frozenset({"LINE_COLOR", "BACKGROUND_COLOR"})
+
+# Pairs of settings where the first must stay below the second
+ORDERED_FIELDS = (
+    ("MIN_FREQUENCY", "MAX_FREQUENCY"),
+    ("QUALITY_RECOVER_LOAD", "QUALITY_DEGRADE_LOAD"),
+)
+
+
+def read_config_file(path):
+    """
+    Read settings from a TOML or JSON file.
+
+    Keys are config names, matched case-insensitively.
+
+    Args:
+        path: Path to a .toml or .json file
+
+    Returns:
+        Dictionary mapping config names to values
+
+    Raises:
+        ValueError: If the file cannot be parsed
+        TypeError: If the file does not hold a table
+        OSError: If the file cannot be read
+    """
+    with open(path, "rb") as f:
+        try:
+            if str(path).endswith(".json"):
+                values = json.load(f)
+            else:
+                values = tomllib.load(f)
+        except (json.JSONDecodeError, tomllib.TOMLDecodeError) as e:
+            raise ValueError(f"Cannot parse {path}: {e}") from e
+    if not isinstance(values, dict):
+        raise TypeError(f"{path} does not hold a table of settings")
+    return {name.upper(): value for name, value in values.items()}
+
+
+class RuntimeConfig:
+    """
+    Changes config settings while running and announces what changed.
+
+    Settings stay attributes of the config module, so code keeps reading
+    them directly. update() checks the type, range or allowed names of all
+    new values before any of them is set, applies the ones that differ and
+    calls every listener subscribed to one of them with the set of changed
+    names. Listeners rebuild what depends on those settings; a listener that
+    raises ValueError rejects the change, which is then rolled back.
+    Bound-method listeners are held weakly and drop out when their object
+    is garbage collected.
+    """
+
+    def __init__(self):
+        """Initialize without listeners or a watched file."""
+        self.generation = 0  # number of updates that changed a setting
+        self._listeners = []  # (callback or weak method, fields or None)
+        self._path = None
+        self._mtime = None
+        self._next_check = 0.0
+
+    def subscribe(self, callback, fields=None):
+        """
+        Call a function when settings change.
+
+        Args:
+            callback: Called with the frozenset of changed setting names
+            fields: Names the callback depends on, None for all
+        """
+        if hasattr(callback, "__self__"):
+            callback = weakref.WeakMethod(callback)
+        self._listeners.append((callback, frozenset(fields) if fields else None))
+
+    def update(self, **values):
+        """
+        Change live settings.
+
+        Args:
+            **values: Config names and their new values
+
+        Returns:
+            frozenset of the names whose value changed
+
+        Raises:
+            ValueError: If a name is unknown or not live, a value has the
+                wrong type, is out of range or is not an allowed name, or a
+                listener rejects the change (the previous values are
+                restored)
+        """
+        previous = {}
+        updates = {}
+        for name, value in values.items():
+            if name not in LIVE_FIELDS:
+                if not hasattr(config, name):
+                    raise ValueError(f"Unknown setting: {name}")
+                raise ValueError(f"{name} cannot change while running")
+            value = self._coerce(name, value)
+            if value != getattr(config, name):
+                previous[name] = getattr(config, name)
+                updates[name] = value
+        self._check_order(updates)
+        changed = frozenset(updates)
+        if not changed:
+            return changed
+
+        for name, value in updates.items():
+            setattr(config, name, value)
+        self.generation += 1
+        try:
+            self._notify(changed)
+        except ValueError:
+            for name, value in previous.items():
+                setattr(config, name, value)
+            self._notify(changed)
+            raise
+        return changed
+
+    def _coerce(self, name, value):
+        """Convert a value to the type of the current setting and check it."""
+        current = getattr(config, name)
+        if isinstance(current, tuple) and isinstance(value, list):
+            value = tuple(value)
+        if isinstance(current, float) and isinstance(value, int):
+            value = float(value)
+        if current is not None and type(value) is not type(current):
+            raise ValueError(
+                f"{name} must be {type(current).__name__}, not {type(value).__name__}"
+            )
+        self._check_range(name, value)
+        return value
+
+    def _check_range(self, name, value):
+        """Reject numbers outside FIELD_LIMITS, invalid colours and names."""
+        if name in FIELD_CHOICES and value not in FIELD_CHOICES[name]:
+            choices = ", ".join(f'"{choice}"' for choice in FIELD_CHOICES[name])
+            raise ValueError(f"{name} must be one of {choices}, not {value!r}")
+        if name in COLOR_FIELDS and (
+            len(value) != 3
+            or not all(type(part) is int and 0 <= part <= 255 for part in value)
+        ):
+            raise ValueError(f"{name} must be three integers from 0 to 255")
+        if name not in FIELD_LIMITS:
+            return
+        minimum, maximum = FIELD_LIMITS[name]
+        if minimum is not None and value < minimum:
+            raise ValueError(f"{name} must be at least {minimum}, not {value}")
+        if maximum is not None and value > maximum:
+            raise ValueError(f"{name} must be at most {maximum}, not {value}")
+
+    def _check_order(self, updates):
+        """Reject updates that would leave an ORDERED_FIELDS pair inverted."""
+        for low, high in ORDERED_FIELDS:
+            if low not in updates and high not in updates:
+                continue
+            low_value = updates.get(low, getattr(config, low))
+            high_value = updates.get(high, getattr(config, high))
+            if low_value >= high_value:
+                raise ValueError(f"{low} must be below {high}")
+
+    def _notify(self, changed):
+        """Call the listeners of the changed settings."""
+        # Listeners may subscribe new listeners while being called
+        for entry in list(self._listeners):
+            callback, fields = entry
+            if isinstance(callback, weakref.WeakMethod):
+                callback = callback()
+                if callback is None:
+                    self._listeners.remove(entry)
+                    continue
+            if fields is None or fields & changed:
+                callback(changed)
+
+    def load(self, path):
+        """
+        Apply every setting of a config file, before the subsystems start.
+
+        Args:
+            path: Path to a .toml or .json file
+
+        Raises:
+            ValueError: If the file cannot be parsed, names an unknown
+                setting or holds an invalid value
+            TypeError: If the file does not hold a table
+            OSError: If the file cannot be read
+        """
+        values = read_config_file(path)
+        updates = {}
+        for name, value in values.items():
+            if not hasattr(config, name):
+                raise ValueError(f"Unknown setting in {path}: {name}")
+            updates[name] = self._coerce(name, value)
+        self._check_order(updates)
+        for name, value in updates.items():
+            setattr(config, name, value)
+
+    def watch(self, path):
+        """
+        Reload a config file whenever it changes (see poll).
+
+        Args:
+            path: Path to a .toml or .json file
+        """
+        self._path = str(path)
+        self._mtime = os.path.getmtime(self._path)
+
+    def poll(self):
+        """
+        Reload the watched file if it changed since the last check.
+
+        Checks at most every CONFIG_RELOAD_INTERVAL seconds, so it can be
+        called every frame. Changes to settings that are not live are
+        reported and left for the next start.
+
+        Returns:
+            frozenset of the names whose value changed
+        """
+        now = time.monotonic()
+        if self._path is None or now < self._next_check:
+            return frozenset()
+        self._next_check = now + config.CONFIG_RELOAD_INTERVAL
+
+        try:
+            mtime = os.path.getmtime(self._path)
+            if mtime == self._mtime:
+                return frozenset()
+            self._mtime = mtime
+            values = read_config_file(self._path)
+            live = {}
+            for name, value in values.items():
+                if name in LIVE_FIELDS or not hasattr(config, name):
+                    live[name] = value
+                elif self._coerce(name, value) != getattr(config, name):
+                    print(f"⚠ {name} in {self._path} applies after a restart")
+            changed = self.update(**live)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠ Config not reloaded: {e}")
+            return frozenset()
+        if changed:
+            print(f"✓ Config reloaded: {', '.join(sorted(changed))}")
+        return changed
+
+    def handle_key(self, key):
+        """
+        Step the setting bound to a key in KEY_BINDINGS.
+
+        Args:
+            key: pygame key name
+
+        Returns:
+            True if the key is bound to a setting
+        """
+        if key not in config.KEY_BINDINGS:
+            return False
+        name, step, minimum, maximum = config.KEY_BINDINGS[key]
+        value = min(max(getattr(config, name) + step, minimum), maximum)
+        if isinstance(value, float):
+            value = round(value, 6)
+        try:
+            if self.update(**{name: value}):
+                print(f"✓ {name} = {value}")
+        except ValueError as e:
+            print(f"⚠ {name} not changed: {e}")
+        return True
+
+
+# Shared instance used by the application
+runtime = RuntimeConfig()
@@ -0,0 +1,58 @@
+"""
+Startup phase timing for --startup-profile.
+"""
+import time
+from . import config
+
+
+class StartupProfile:
+    """
+    Times the phases of startup from one mark to the next.
+
+    Phases are lap based like telemetry: mark(name) charges the time since
+    the previous mark to the named phase. Marks are always taken, as they
+    cost a clock read each; report() prints them only when asked for.
+    """
+
+    def __init__(self, start=None):
+        """
+        Initialize the profile.
+
+        Args:
+            start: perf_counter() value startup began at (default: now)
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []  # (name, seconds)
+        self.window_time = None  # seconds from start to a visible window
+        self._last = self.start
+
+    def mark(self, name):
+        """Charge the time since the previous mark to a phase."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def window_shown(self):
+        """Record that the first frame is on screen."""
+        self.window_time = time.perf_counter() - self.start
+
+    @property
+    def total(self):
+        """Seconds from start to the last mark."""
+        return self._last - self.start
+
+    def report(self):
+        """Print the phase table and check the window against STARTUP_BUDGET."""
+        print("\nStartup profile")
+        print("-" * 36)
+        for name, seconds in self.phases:
+            print(f"  {name:<22}{seconds * 1000:9.1f} ms")
+        print("-" * 36)
+        print(f"  {'total':<22}{self.total * 1000:9.1f} ms")
+        if self.window_time is None:
+            return
+        message = f"window shown after {self.window_time * 1000:.1f} ms"
+        if self.window_time > config.STARTUP_BUDGET:
+            print(f"⚠ {message} (budget {config.STARTUP_BUDGET * 1000:.0f} ms)\n")
+        else:
+            print(f"✓ {message}\n")
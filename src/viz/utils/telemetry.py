@@ -0,0 +1,190 @@
+"""
+Per-stage frame timing telemetry.
+"""
+import contextlib
+import csv
+import json
+import time
+import numpy as np
+from . import config
+
+
+def _noop(*args):
+    """Stand-in for the timing methods while telemetry is disabled."""
+
+
+class Telemetry:
+    """
+    Collects per-stage frame timings with rolling percentiles.
+
+    Timing is lap based: begin_frame() starts a frame, every lap(name)
+    charges the time since the previous lap to the named stage, and
+    end_frame() records the per-frame totals into rolling windows. While
+    disabled, these methods are bound to a no-op so instrumented code pays
+    only for an attribute lookup and an empty call. Laps must all come from
+    the thread running the frame loop.
+    """
+
+    def __init__(self, window=None):
+        """
+        Initialize telemetry (disabled).
+
+        Args:
+            window: Number of frames kept for percentiles
+                (default: config.TELEMETRY_WINDOW)
+        """
+        self.window = window or config.TELEMETRY_WINDOW
+        self.enabled = False
+        self.overlay_visible = False
+        self.frames = 0
+        self.stages = {}  # stage name -> rolling per-frame seconds
+        self._current = {}
+        self._frame_start = 0.0
+        self._last = 0.0
+
+        self._export_file = None
+        self._export_writer = None
+        self._export_interval = 1.0
+        self._next_export = 0.0
+
+        self.begin_frame = _noop
+        self.lap = _noop
+        self.end_frame = _noop
+
+    def enable(self, enabled=True):
+        """
+        Turn timing collection on or off.
+
+        Args:
+            enabled: True to collect timings
+        """
+        if enabled and not self.enabled:
+            # Enabling mid-frame skips that frame's begin_frame(); start the
+            # clocks now so its laps do not count from 0.0
+            now = time.perf_counter()
+            self._frame_start = now
+            self._last = now
+        self.enabled = enabled
+        if enabled:
+            self.begin_frame = self._begin_frame
+            self.lap = self._lap
+            self.end_frame = self._end_frame
+        else:
+            self.begin_frame = self.lap = self.end_frame = _noop
+            self._current.clear()
+
+    def toggle_overlay(self):
+        """Show or hide the overlay, collecting timings while it is shown."""
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enable()
+        elif self._export_file is None:
+            self.enable(False)
+
+    def _begin_frame(self):
+        now = time.perf_counter()
+        self._frame_start = now
+        self._last = now
+
+    def _lap(self, name):
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def _end_frame(self):
+        now = time.perf_counter()
+        self._current["frame"] = now - self._frame_start
+        index = self.frames % self.window
+
+        for name in self._current:
+            if name not in self.stages:
+                self.stages[name] = np.zeros(self.window)
+        for name, values in self.stages.items():
+            values[index] = self._current.get(name, 0.0)
+        self._current.clear()
+        self.frames += 1
+
+        if self._export_file is not None and now >= self._next_export:
+            self._next_export = now + self._export_interval
+            self._export()
+
+    def summary(self):
+        """
+        Return latency statistics of every stage over the rolling window.
+
+        Returns:
+            Dictionary of stage name -> {"mean", "p50", "p95", "p99", "max"}
+            in milliseconds, in the order stages were first seen
+        """
+        count = min(self.frames, self.window)
+        if count == 0:
+            return {}
+
+        stats = {}
+        for name, values in self.stages.items():
+            recent = values[:count] * 1000
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+            stats[name] = {
+                "mean": float(recent.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(recent.max()),
+            }
+        return stats
+
+    def start_export(self, path, interval=None):
+        """
+        Append a summary to a file at a fixed interval.
+
+        The format follows the extension: ".csv" writes one row per stage,
+        anything else writes one JSON object per line.
+
+        Args:
+            path: Output file path
+            interval: Seconds between exports
+                (default: config.TELEMETRY_EXPORT_INTERVAL)
+        """
+        self.close()
+        self._export_interval = interval or config.TELEMETRY_EXPORT_INTERVAL
+        self._next_export = time.perf_counter() + self._export_interval
+        # The file stays open until close(), unless writing the header fails
+        with contextlib.ExitStack() as stack:
+            export_file = stack.enter_context(open(path, "a", newline=""))
+            writer = None
+            if str(path).endswith(".csv"):
+                writer = csv.writer(export_file)
+                if export_file.tell() == 0:
+                    writer.writerow(
+                        ["time", "frames", "stage", "mean", "p50", "p95", "p99", "max"]
+                    )
+            stack.pop_all()
+        self._export_file = export_file
+        self._export_writer = writer
+        self.enable()
+
+    def _export(self):
+        """Write the current summary to the export file."""
+        stats = self.summary()
+        timestamp = round(time.time(), 3)
+        if self._export_writer is not None:
+            for name, values in stats.items():
+                self._export_writer.writerow(
+                    [timestamp, self.frames, name]
+                    + [round(values[key], 4) for key in values]
+                )
+        else:
+            record = {"time": timestamp, "frames": self.frames, "stages": stats}
+            self._export_file.write(json.dumps(record) + "\n")
+        self._export_file.flush()
+
+    def close(self):
+        """Stop exporting and close the export file."""
+        if self._export_file is not None:
+            self._export_file.close()
+        self._export_file = None
+        self._export_writer = None
+
+
+# Shared instance used by the frame loop, analyzer and renderer
+telemetry = Telemetry()
@@ -0,0 +1,53 @@
+"""
+Tests for batch spectrogram extraction (viz-analyze).
+"""
+import wave
+
+import numpy as np
+import pytest
+
+from viz import analyze
+from viz.utils import config
+
+
+def write_wav(path, frames=4096, sample_rate=8000):
+    """Write a mono 16-bit WAV file of noise."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    samples = np.random.default_rng(0).integers(-1000, 1000, frames, dtype=np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def test_same_names_from_different_directories_are_rejected(tmp_path, capsys):
+    first = tmp_path / "a" / "song.wav"
+    second = tmp_path / "b" / "song.wav"
+    write_wav(first)
+    write_wav(second)
+    output = tmp_path / "out"
+
+    with pytest.raises(SystemExit) as exit_info:
+        analyze.main([str(first), str(second), "-o", str(output), "-j", "1"])
+
+    assert exit_info.value.code == 1
+    error = capsys.readouterr().err
+    assert str(first) in error
+    assert str(second) in error
+    # Nothing is analyzed, so neither file's spectra replace the other's
+    assert not output.exists()
+
+
+def test_directory_inputs_keep_their_layout(tmp_path):
+    write_wav(tmp_path / "in" / "a" / "song.wav")
+    write_wav(tmp_path / "in" / "b" / "song.wav")
+    output = tmp_path / "out"
+
+    analyze.main(
+        [str(tmp_path / "in"), "-o", str(output), "-j", "1", "--chunk", "1024"]
+    )
+
+    first = np.load(output / "a" / "song.npy")
+    second = np.load(output / "b" / "song.npy")
+    assert first.shape == second.shape == (4, config.NUM_FREQUENCY_BANDS)
@@ -0,0 +1,130 @@
+"""
+Tests for the audio analyzer's realtime and batch paths.
+"""
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from viz.audio.analyzer import AudioAnalyzer
+from viz.utils import config
+
+# Large enough that any temporary buffer, even one spectrum of float32
+# bands, outweighs the few array views a call creates
+CHUNK_SIZE = 65536
+NUM_BANDS = 1024
+SPECTRUM_BYTES = NUM_BANDS * np.dtype(np.float32).itemsize
+
+
+@pytest.fixture
+def large_analysis(monkeypatch):
+    """Configure a chunk and band count with buffers of several KB."""
+    monkeypatch.setattr(config, "CHUNK_SIZE", CHUNK_SIZE)
+    monkeypatch.setattr(config, "NUM_FREQUENCY_BANDS", NUM_BANDS)
+    monkeypatch.setattr(config, "SAMPLE_RATE", 48000)
+
+
+def transient_allocation(func, calls=20):
+    """
+    Return the traced memory a warmed-up function allocates.
+
+    Args:
+        func: Function called with no arguments
+        calls: Number of calls to trace
+
+    Returns:
+        Tuple of (peak bytes above the starting level, bytes still held)
+    """
+    for _ in range(calls):
+        func()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before, current - before
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_realtime_analyze_allocates_nothing(large_analysis, channels):
+    analyzer = AudioAnalyzer(realtime=True)
+    rng = np.random.default_rng(0)
+    shape = (CHUNK_SIZE,) if channels == 1 else (CHUNK_SIZE, channels)
+    audio = rng.standard_normal(shape).astype(np.float32)
+
+    peak, held = transient_allocation(lambda: analyzer.analyze(audio))
+
+    # Array views and NumPy's small-object caches are a few hundred bytes
+    assert peak < SPECTRUM_BYTES
+    assert held < SPECTRUM_BYTES
+
+
+def test_reference_analyze_is_detected(large_analysis):
+    # The non-realtime path allocates per call, so the bound above is tight
+    # enough to catch a buffer allocated in the realtime path
+    analyzer = AudioAnalyzer(realtime=False)
+    audio = np.random.default_rng(0).standard_normal(CHUNK_SIZE).astype(np.float32)
+
+    peak, _ = transient_allocation(lambda: analyzer.analyze(audio))
+
+    assert peak >= SPECTRUM_BYTES
+
+
+@pytest.fixture
+def batch_analysis(monkeypatch):
+    """Configure a small chunk and band count with strong smoothing."""
+    monkeypatch.setattr(config, "CHUNK_SIZE", 1024)
+    monkeypatch.setattr(config, "NUM_FREQUENCY_BANDS", 32)
+    monkeypatch.setattr(config, "SAMPLE_RATE", 48000)
+    monkeypatch.setattr(config, "SMOOTHING_FACTOR", 0.7)
+
+
+def frame_starts(length, hop):
+    """Return the start of every whole frame in a signal of length samples."""
+    return range(0, length - config.CHUNK_SIZE + 1, hop)
+
+
+@pytest.mark.parametrize("hop", [256, 1024])
+@pytest.mark.parametrize("split", [1, 5, 12])
+def test_analyze_batch_matches_sequential_analyze(batch_analysis, hop, split):
+    audio = np.random.default_rng(1).standard_normal(24 * hop + config.CHUNK_SIZE)
+    reference = AudioAnalyzer(realtime=False)
+    expected = np.array(
+        [
+            reference.analyze(audio[start : start + config.CHUNK_SIZE])
+            for start in frame_starts(len(audio), hop)
+        ]
+    )
+
+    # Two consecutive batches, the second continuing the smoothing state
+    # left by the first; the split is counted in frames
+    analyzer = AudioAnalyzer(realtime=False)
+    first = analyzer.analyze_batch(audio[: (split - 1) * hop + config.CHUNK_SIZE], hop)
+    second = analyzer.analyze_batch(audio[split * hop :], hop)
+
+    assert len(first) == split
+    np.testing.assert_allclose(
+        np.concatenate([first, second]), expected, rtol=1e-12, atol=1e-15
+    )
+    np.testing.assert_allclose(
+        analyzer.prev_spectrum, reference.prev_spectrum, rtol=1e-12, atol=1e-15
+    )
+
+
+def test_analyze_batch_continues_from_single_frames(batch_analysis):
+    chunk = config.CHUNK_SIZE
+    frames = np.random.default_rng(2).standard_normal((6, chunk))
+    reference = AudioAnalyzer(realtime=False)
+    expected = np.array([reference.analyze(frame) for frame in frames])
+
+    analyzer = AudioAnalyzer(realtime=False)
+    head = [analyzer.analyze(frame) for frame in frames[:2]]
+    tail = analyzer.analyze_batch(frames[2:])
+
+    np.testing.assert_allclose(
+        np.concatenate([head, tail]), expected, rtol=1e-12, atol=1e-15
+    )
@@ -0,0 +1,129 @@
+"""
+Tests for audio capture driven by the fake PyAudio stream.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from viz.audio import capture
+from viz.audio.capture import AudioCapture
+from viz.audio.fake import FakePyAudio
+from viz.utils import config
+
+
+def counter_source():
+    """Return a source whose samples hold their running frame number."""
+    state = {"next": 0}
+
+    def generate(num_frames, channels, rate):
+        start = state["next"]
+        state["next"] += num_frames
+        values = np.arange(start, start + num_frames, dtype=np.float32)
+        return np.repeat(values[:, np.newaxis], channels, axis=1)
+
+    return generate
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll condition until it holds, failing the test after timeout seconds."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out waiting for audio"
+        time.sleep(0.005)
+
+
+@pytest.fixture(autouse=True)
+def fake_device(monkeypatch):
+    """Capture at SAMPLE_RATE without a device cache or decimation."""
+    monkeypatch.setattr(config, "DEVICE_CACHE_PATH", None)
+    monkeypatch.setattr(config, "CAPTURE_SAMPLE_RATE", None)
+    monkeypatch.setattr(config, "CAPTURE_DECIMATE", False)
+    monkeypatch.setattr(capture, "_found_device", None)
+
+
+def test_callback_mode_delivers_consecutive_frames():
+    audio = AudioCapture(pa=FakePyAudio(source=counter_source()), mode="callback")
+    audio.start()
+    try:
+        wait_for(lambda: audio.ring.available >= config.CHUNK_SIZE)
+        chunk = audio.read_chunk()
+        wait_for(lambda: audio.ring.available > 0)
+        frames = audio.read_available()
+    finally:
+        audio.close()
+
+    assert chunk.shape == (config.CHUNK_SIZE, config.CHANNELS)
+    assert np.all(np.diff(chunk[:, 0]) == 1)
+    assert np.all(chunk[:, 0] == chunk[:, 1])
+    # Frames read afterwards continue where the chunk ended
+    assert frames[0, 0] == chunk[-1, 0] + 1
+    assert np.all(np.diff(frames[:, 0]) == 1)
+
+
+def test_callback_mode_read_without_new_audio_returns_none():
+    pa = FakePyAudio(source=counter_source())
+    audio = AudioCapture(pa=pa, mode="callback")
+    audio.start()
+    wait_for(lambda: audio.ring.available >= config.CHUNK_SIZE)
+    pa.streams[0].stop_stream()
+
+    assert audio.read_chunk() is not None
+    assert audio.read_chunk() is None
+    assert audio.underruns == 1
+    audio.close()
+
+
+def test_callback_mode_counts_frames_lost_to_a_full_ring():
+    # Unpaced callbacks fill the ring far faster than anything reads it
+    pa = FakePyAudio(source=counter_source(), realtime=False)
+    audio = AudioCapture(pa=pa, mode="callback")
+    audio.start()
+    stream = pa.streams[0]
+    wait_for(
+        lambda: stream.callbacks * config.CAPTURE_BLOCK_SIZE > 2 * audio.ring.capacity
+    )
+    stream.stop_stream()
+
+    written = stream.callbacks * config.CAPTURE_BLOCK_SIZE
+    assert audio.overruns == written - audio.ring.capacity
+    frames = audio.read_available()
+    assert frames[-1, 0] == written - 1
+    audio.close()
+
+
+def test_blocking_mode_reads_a_chunk_per_call():
+    audio = AudioCapture(pa=FakePyAudio(source=counter_source()), mode="blocking")
+    audio.start()
+    try:
+        first = audio.read_chunk()
+        second = audio.read_chunk()
+    finally:
+        audio.close()
+
+    np.testing.assert_array_equal(first[:, 0], np.arange(config.CHUNK_SIZE))
+    assert second[0, 0] == config.CHUNK_SIZE
+
+
+def test_native_high_rate_is_decimated(monkeypatch):
+    monkeypatch.setattr(config, "CAPTURE_SAMPLE_RATE", "native")
+    monkeypatch.setattr(config, "CAPTURE_DECIMATE", True)
+    pa = FakePyAudio(default_rate=192000.0)
+    audio = AudioCapture(pa=pa, mode="callback")
+    audio.start()
+    try:
+        wait_for(lambda: audio.read_chunk() is not None)
+    finally:
+        audio.close()
+
+    assert audio.device_rate == 192000
+    assert audio.sample_rate == 192000 // audio.factor
+    assert audio.factor > 1
+
+
+def test_missing_device_fails_to_start():
+    audio = AudioCapture(pa=FakePyAudio(device_name="Built-in Microphone"))
+
+    assert audio.device_index is None
+    with pytest.raises(RuntimeError):
+        audio.start()
@@ -0,0 +1,112 @@
+"""
+Loopback tests for spectrum publishing over UDP and Unix sockets.
+"""
+import os
+import socket
+import tempfile
+
+import numpy as np
+import pytest
+
+from viz.net.publisher import SpectrumPublisher
+from viz.net.subscriber import SpectrumSubscriber
+
+NUM_BANDS = 64
+CHANNELS = 2
+
+
+@pytest.fixture(params=["udp", "unix"])
+def subscriber(request):
+    """Bind a subscriber on a free loopback port or a temporary socket path."""
+    if request.param == "udp":
+        with SpectrumSubscriber("udp://127.0.0.1:0", timeout=2.0) as subscriber:
+            yield subscriber
+        return
+    # Kept short, since Unix socket paths are limited to about 100 bytes
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "viz.sock")
+        with SpectrumSubscriber(f"unix://{path}", timeout=2.0) as subscriber:
+            yield subscriber
+
+
+def spectra(count, start=0):
+    """Return count distinct frames of shape (CHANNELS, NUM_BANDS)."""
+    values = np.arange(count * CHANNELS * NUM_BANDS, dtype=np.float32) + start
+    return values.reshape(count, CHANNELS, NUM_BANDS)
+
+
+def test_single_spectra_arrive_intact(subscriber):
+    publisher = SpectrumPublisher([subscriber.address], NUM_BANDS, CHANNELS)
+    frames = spectra(3)
+    try:
+        for index, frame in enumerate(frames):
+            publisher.publish(frame, timestamp=1000.0 + index)
+            sequences, timestamps, received = subscriber.receive()
+            assert sequences.tolist() == [index]
+            assert timestamps.tolist() == [1000.0 + index]
+            np.testing.assert_array_equal(received, frame[np.newaxis])
+    finally:
+        publisher.close()
+
+    assert publisher.sent == 3
+    assert publisher.dropped == 0
+    assert subscriber.received == 3
+    assert subscriber.lost == 0
+
+
+def test_batches_and_a_flushed_partial_batch_arrive_intact(subscriber):
+    publisher = SpectrumPublisher([subscriber.address], NUM_BANDS, CHANNELS, batch=4)
+    frames = spectra(6)
+    try:
+        for index, frame in enumerate(frames):
+            publisher.publish(frame, timestamp=2000.0 + index / 8)
+        # The first four frames went out as soon as the batch was full
+        sequences, timestamps, received = subscriber.receive()
+        assert sequences.tolist() == [0, 1, 2, 3]
+        assert timestamps.tolist() == [2000.0, 2000.125, 2000.25, 2000.375]
+        np.testing.assert_array_equal(received, frames[:4])
+
+        publisher.flush()
+        sequences, timestamps, received = subscriber.receive()
+        assert sequences.tolist() == [4, 5]
+        assert timestamps.tolist() == [2000.5, 2000.625]
+        np.testing.assert_array_equal(received, frames[4:])
+    finally:
+        publisher.close()
+
+    assert publisher.sent == 2
+    assert subscriber.received == 6
+    assert subscriber.lost == 0
+
+
+def test_skipped_sequence_numbers_count_as_lost(subscriber):
+    publisher = SpectrumPublisher([subscriber.address], NUM_BANDS, CHANNELS, batch=2)
+    frames = spectra(4)
+    try:
+        publisher.publish(frames[0])
+        publisher.publish(frames[1])
+        subscriber.receive()
+        # As if the datagrams of five spectra had been dropped on the way
+        publisher.sequence += 5
+        publisher.publish(frames[2])
+        publisher.publish(frames[3])
+        sequences, _, _ = subscriber.receive()
+    finally:
+        publisher.close()
+
+    assert sequences.tolist() == [7, 8]
+    assert subscriber.received == 4
+    assert subscriber.lost == 5
+
+
+def test_malformed_datagrams_are_ignored(subscriber):
+    with socket.socket(subscriber.family, socket.SOCK_DGRAM) as sock:
+        sock.sendto(b"not a spectrum", subscriber.sock.getsockname())
+
+    assert subscriber.receive() is None
+    assert subscriber.received == 0
+
+
+def test_batch_larger_than_a_datagram_is_rejected():
+    with pytest.raises(ValueError):
+        SpectrumPublisher(["udp://127.0.0.1:9"], 4096, 2, batch=8)
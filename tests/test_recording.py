@@ -0,0 +1,144 @@
+"""
+Tests for spectrum recordings and their replay.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from viz.audio import recording
+from viz.audio.recording import ReplaySource, SpectrumRecorder, SpectrumRecording
+
+NUM_BANDS = 8
+HOP = 512
+SAMPLE_RATE = 8000
+PERIOD = HOP / SAMPLE_RATE  # seconds between rows appended without a time
+
+
+def spectrum(row):
+    """Return a spectrum whose amplitudes identify its row."""
+    return np.full(NUM_BANDS, row / 16, dtype=np.float32)
+
+
+def record(path, rows=10, timestamps=None, fmt="uint16"):
+    """Record rows spectra, one hop apart unless timestamps are given."""
+    with SpectrumRecorder(
+        path,
+        NUM_BANDS,
+        HOP,
+        SAMPLE_RATE,
+        band_edges=np.linspace(20, 4000, NUM_BANDS + 1),
+        fmt=fmt,
+    ) as recorder:
+        for row in range(rows):
+            timestamp = None if timestamps is None else timestamps[row]
+            recorder.append(spectrum(row), timestamp)
+
+
+def row_numbers(spectra):
+    """Return the rows the spectra were recorded from."""
+    return np.rint(spectra[:, 0] * 16).astype(int).tolist()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the clock that paces replay with one the test advances."""
+    now = SimpleNamespace(seconds=0.0)
+    monkeypatch.setattr(
+        recording, "time", SimpleNamespace(perf_counter=lambda: now.seconds)
+    )
+    return now
+
+
+@pytest.mark.parametrize("fmt", sorted(recording.RECORD_FORMATS))
+def test_recorded_spectra_read_back(tmp_path, fmt):
+    path = tmp_path / "spectra.vizrec"
+    record(path, fmt=fmt)
+
+    loaded = SpectrumRecording(path)
+    assert len(loaded) == 10
+    assert loaded.format == fmt
+    assert (loaded.num_bands, loaded.hop, loaded.sample_rate) == (
+        NUM_BANDS,
+        HOP,
+        SAMPLE_RATE,
+    )
+    np.testing.assert_allclose(loaded.band_edges, np.linspace(20, 4000, NUM_BANDS + 1))
+    assert row_numbers(loaded.rows(0, 10)) == list(range(10))
+    assert loaded.duration == pytest.approx(10 * PERIOD)
+    assert loaded.time_at(3) == pytest.approx(3 * PERIOD)
+    loaded.close()
+
+
+def test_row_timestamps_are_kept(tmp_path):
+    path = tmp_path / "spectra.vizrec"
+    record(path, rows=4, timestamps=[0.1, 0.3, 0.35, 0.9])
+
+    loaded = SpectrumRecording(path)
+    assert loaded.duration == 0.9
+    assert loaded.time_at(2) == 0.3
+    assert loaded.rows_until(0.3) == 2
+    assert loaded.rows_until(0.5) == 3
+    assert loaded.rate == pytest.approx(4 / 0.9)
+    loaded.close()
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "noise.bin"
+    path.write_bytes(bytes(256))
+
+    with pytest.raises(ValueError):
+        SpectrumRecording(path)
+
+
+def test_replay_follows_the_row_timestamps(tmp_path, clock):
+    path = tmp_path / "spectra.vizrec"
+    record(path, rows=4, timestamps=[0.1, 0.3, 0.35, 0.9])
+    replay = ReplaySource(path)
+    replay.start()
+
+    clock.seconds = 0.32
+    assert row_numbers(replay.read()) == [0, 1]
+    clock.seconds = 0.5
+    assert row_numbers(replay.read()) == [2]
+    clock.seconds = 1.0
+    assert row_numbers(replay.read()) == [3]
+    assert replay.finished
+    replay.close()
+
+
+@pytest.mark.parametrize(
+    ("limit", "expected"),
+    [(None, [7, 8, 9, 0, 1]), (3, [9, 0, 1]), (1, [1])],
+)
+def test_looping_replay_returns_the_rows_across_the_loop_point(
+    tmp_path, clock, limit, expected
+):
+    path = tmp_path / "spectra.vizrec"
+    record(path)
+    replay = ReplaySource(path, loop=True)
+    replay.start()
+
+    clock.seconds = 0.5
+    assert row_numbers(replay.read()) == list(range(7))
+    # 0.16 s into the second lap: the end of the first lap comes first
+    clock.seconds = 10 * PERIOD + 0.16
+    assert row_numbers(replay.read(limit)) == expected
+    assert replay.position == 2
+    assert not replay.finished
+    replay.close()
+
+
+def test_seek_moves_the_replay_position(tmp_path, clock):
+    path = tmp_path / "spectra.vizrec"
+    record(path)
+    replay = ReplaySource(path)
+    replay.start()
+
+    replay.seek(0.3)
+    assert replay.position == 4
+    assert row_numbers(replay.preceding(2)) == [2, 3]
+    # Pacing restarts from the start of row 4, 0.256 s into the audio
+    clock.seconds = 0.15
+    assert row_numbers(replay.read()) == [4, 5]
+    replay.close()
@@ -0,0 +1,84 @@
+"""
+Tests for the single-producer/single-consumer sample ring buffer.
+"""
+import numpy as np
+
+from viz.audio.ringbuffer import SampleRingBuffer
+
+
+def frames(start, count, channels=2):
+    """Return count frames whose samples hold their running frame number."""
+    values = np.arange(start, start + count, dtype=np.float32)
+    return np.repeat(values[:, np.newaxis], channels, axis=1)
+
+
+def test_read_available_returns_frames_in_order_across_the_wrap():
+    ring = SampleRingBuffer(8, 2)
+    out = np.zeros((8, 2), dtype=np.float32)
+
+    ring.write(frames(0, 5))
+    np.testing.assert_array_equal(ring.read_available(out), frames(0, 5))
+    # Starts at offset 5 and wraps to the front of the buffer
+    ring.write(frames(5, 6))
+    assert ring.available == 6
+    np.testing.assert_array_equal(ring.read_available(out), frames(5, 6))
+    assert ring.overruns == 0
+    assert ring.underruns == 0
+
+
+def test_read_available_with_no_new_frames_is_an_underrun():
+    ring = SampleRingBuffer(8, 2)
+    out = np.zeros((8, 2), dtype=np.float32)
+    ring.write(frames(0, 3))
+    ring.read_available(out)
+
+    assert len(ring.read_available(out)) == 0
+    assert ring.underruns == 1
+
+
+def test_read_available_keeps_the_newest_frames_that_fit():
+    ring = SampleRingBuffer(8, 2)
+    out = np.zeros((4, 2), dtype=np.float32)
+    ring.write(frames(0, 6))
+
+    np.testing.assert_array_equal(ring.read_available(out), frames(2, 4))
+    assert ring.available == 0
+
+
+def test_overwritten_frames_are_counted_and_skipped():
+    ring = SampleRingBuffer(8, 2)
+    out = np.zeros((8, 2), dtype=np.float32)
+    ring.write(frames(0, 6))
+    ring.write(frames(6, 6))
+
+    assert ring.overruns == 4
+    assert ring.available == 8
+    np.testing.assert_array_equal(ring.read_available(out), frames(4, 8))
+
+
+def test_write_larger_than_capacity_keeps_the_newest_frames():
+    ring = SampleRingBuffer(8, 2)
+    out = np.zeros((8, 2), dtype=np.float32)
+    ring.write(frames(0, 11))
+
+    assert ring.overruns == 3
+    np.testing.assert_array_equal(ring.read_available(out), frames(3, 8))
+
+
+def test_read_latest_returns_the_most_recent_frames_once():
+    ring = SampleRingBuffer(8, 2)
+    out = np.zeros((4, 2), dtype=np.float32)
+
+    # Fewer frames than requested have been written so far
+    ring.write(frames(0, 3))
+    assert ring.read_latest(4, out) is None
+    assert ring.underruns == 1
+
+    ring.write(frames(3, 7))
+    np.testing.assert_array_equal(ring.read_latest(4, out), frames(6, 4))
+    assert ring.read_latest(4, out) is None
+    assert ring.underruns == 2
+
+    # The newest frames span the wrap of the buffer
+    ring.write(frames(10, 1))
+    np.testing.assert_array_equal(ring.read_latest(4, out), frames(7, 4))
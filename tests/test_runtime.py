@@ -0,0 +1,84 @@
+"""
+Tests for validated live setting changes.
+"""
+import pytest
+
+from viz.utils import config
+from viz.utils.runtime import RuntimeConfig
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """Return a runtime config whose changes are undone after the test."""
+    for name in (
+        "TIME_HISTORY_LENGTH",
+        "SMOOTHING_FACTOR",
+        "LINE_COLOR",
+        "MIN_FREQUENCY",
+        "MAX_FREQUENCY",
+        "HISTORY_POOLING",
+        "RENDER_BACKEND",
+        "RASTER_STYLE",
+    ):
+        monkeypatch.setattr(config, name, getattr(config, name))
+    return RuntimeConfig()
+
+
+def listener(calls):
+    """Return a listener that records the names of every change."""
+
+    def on_change(changed):
+        calls.append(changed)
+
+    return on_change
+
+
+def test_update_applies_and_reports_changes(runtime):
+    calls = []
+    runtime.subscribe(listener(calls), ["RENDER_BACKEND"])
+
+    changed = runtime.update(RENDER_BACKEND="raster", TIME_HISTORY_LENGTH=120)
+
+    assert changed == {"RENDER_BACKEND", "TIME_HISTORY_LENGTH"}
+    assert config.RENDER_BACKEND == "raster"
+    assert calls == [changed]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"TIME_HISTORY_LENGTH": 0},
+        {"SMOOTHING_FACTOR": 1.5},
+        {"LINE_COLOR": (255, 300, 0)},
+        {"MIN_FREQUENCY": 30000},
+        {"RENDER_BACKEND": "vulkan"},
+        {"HISTORY_POOLING": "median"},
+        {"RASTER_STYLE": "dotted"},
+        {"TIME_HISTORY_LENGTH": "long"},
+    ],
+)
+def test_invalid_values_reject_the_whole_update(runtime, values):
+    calls = []
+    runtime.subscribe(listener(calls))
+    history = config.TIME_HISTORY_LENGTH
+
+    with pytest.raises(ValueError):
+        # A valid change made alongside the invalid one is not applied either
+        runtime.update(**{"TIME_HISTORY_LENGTH": 90} | values)
+
+    assert config.TIME_HISTORY_LENGTH == history
+    assert calls == []
+
+
+def test_rejecting_listener_rolls_the_change_back(runtime):
+    def reject(changed):
+        if config.RENDER_BACKEND == "raster":
+            raise ValueError("no raster here")
+
+    runtime.subscribe(reject, ["RENDER_BACKEND"])
+    backend = config.RENDER_BACKEND
+
+    with pytest.raises(ValueError):
+        runtime.update(RENDER_BACKEND="raster")
+
+    assert config.RENDER_BACKEND == backend